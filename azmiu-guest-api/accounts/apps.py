@@ -1,6 +1,42 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends whose state is private to one process.
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def require_shared_cache() -> None:
+    """
+    Refuse to run, outside DEBUG, with state that must be seen by every
+    worker on a per-process cache: the login token buckets would be kept
+    per worker, and a user change invalidated in one worker only.
+    """
+    if settings.DEBUG:
+        return
+    users = []
+    if any(getattr(settings, 'LOGIN_THROTTLE_RATES', {}).values()):
+        users.append('LOGIN_THROTTLE_RATES')
+    if getattr(settings, 'AUTH_USER_CACHE_TTL', 0):
+        users.append('AUTH_USER_CACHE_TTL')
+    if getattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', False):
+        users.append('AUTH_TRUST_TOKEN_CLAIMS')
+    backend = settings.CACHES['default']['BACKEND']
+    if users and backend in PER_PROCESS_CACHES:
+        raise ImproperlyConfigured(
+            f'{", ".join(users)} need a cache shared by all workers, not {backend}; '
+            'set CACHE_BACKEND (e.g. django.core.cache.backends.redis.RedisCache).'
+        )
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        require_shared_cache()
@@ -0,0 +1,103 @@
+"""
+JWT authentication with a short-lived user cache.
+
+``JWTAuthentication`` loads the user from the DB on every request just to
+learn who the caller is.  ``CachedJWTAuthentication`` keeps resolved
+users in the Django cache for ``AUTH_USER_CACHE_TTL`` seconds (cleared by
+the ``User`` save/delete signals), or — when ``AUTH_TRUST_TOKEN_CLAIMS``
+is on — builds the user straight from the role claims embedded in the
+access token without touching the DB at all.
+
+Claims are only trusted in tokens issued after the user was last changed
+(role, deactivation, deletion); older tokens take the cached/DB path
+until they expire.  Both the user cache and that change stamp only work
+across workers on a shared cache backend.
+"""
+
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+
+def user_cache_key(user_id) -> str:
+    return f'auth:user:{user_id}'
+
+
+def user_changed_key(user_id) -> str:
+    return f'auth:user-changed:{user_id}'
+
+
+def invalidate_cached_user(user_id) -> None:
+    cache.delete(user_cache_key(user_id))
+
+
+def mark_user_changed(user_id) -> None:
+    """Stop trusting the claims of access tokens issued until now."""
+    cache.set(
+        user_changed_key(user_id), time.time(),
+        int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1,
+    )
+
+
+def _claims_are_current(token) -> bool:
+    changed_at = cache.get(user_changed_key(token[api_settings.USER_ID_CLAIM]))
+    return changed_at is None or token.get('iat', 0) > changed_at
+
+
+def _user_from_claims(token) -> User:
+    """An unsaved-looking but pk-bearing User built from token claims."""
+    user = User(
+        id=uuid.UUID(str(token[api_settings.USER_ID_CLAIM])),
+        username=token.get('username', ''),
+        role=token['role'],
+        # Login and refresh only issue tokens to active users, and tokens
+        # from before a deactivation fail _claims_are_current().
+        is_active=True,
+    )
+    # Behave like a row loaded from the DB (FK assignment, comparisons).
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if (
+            getattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', False)
+            and 'role' in validated_token
+            and _claims_are_current(validated_token)
+        ):
+            return _user_from_claims(validated_token)
+
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 0)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not ttl or user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, ttl)
+            return user
+
+        # Same checks JWTAuthentication runs after its DB lookup.
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code='password_changed'
+            )
+        return user
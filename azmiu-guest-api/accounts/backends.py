@@ -0,0 +1,68 @@
+"""
+Authentication backend with an optional fast path for unknown usernames.
+
+Django's ``ModelBackend`` runs the full password hasher even when the
+username does not exist, so that response time does not reveal which
+usernames are valid.  That costs a PBKDF2 run per bogus attempt.  With
+``LOGIN_FAST_REJECT_UNKNOWN`` on, unknown usernames skip the hasher and
+instead *sleep* for about as long as a real check takes (a moving average
+of measured checks, with jitter): the timing stays indistinguishable but
+the CPU is left to real work.
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+
+_lock = threading.Lock()
+_hash_seconds: float | None = None
+
+
+def _observed_hash_seconds() -> float:
+    """Moving average of password-check duration, seeded by one hash."""
+    global _hash_seconds
+    if _hash_seconds is None:
+        with _lock:
+            if _hash_seconds is None:
+                start = time.perf_counter()
+                make_password(None)
+                _hash_seconds = time.perf_counter() - start
+    return _hash_seconds
+
+
+def _record_hash_seconds(elapsed: float) -> None:
+    global _hash_seconds
+    with _lock:
+        _hash_seconds = elapsed if _hash_seconds is None else 0.9 * _hash_seconds + 0.1 * elapsed
+
+
+class FastRejectModelBackend(ModelBackend):
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            if getattr(settings, 'LOGIN_FAST_REJECT_UNKNOWN', False):
+                time.sleep(_observed_hash_seconds() * random.uniform(0.9, 1.1))
+            else:
+                # Same as ModelBackend: burn a hash to mask the timing.
+                UserModel().set_password(password)
+            return None
+
+        start = time.perf_counter()
+        valid = user.check_password(password)
+        _record_hash_seconds(time.perf_counter() - start)
+        if valid and self.user_can_authenticate(user):
+            return user
+        return None
@@ -21,3 +21,17 @@ class IsSuperUser(BasePermission):
             and request.user.is_authenticated
             and request.user.is_superuser_role
         )
+
+
+class CanVerifyQR(BasePermission):
+    """Superusers, and accounts (gate scanners) granted ``qr_requests.verify_qr``."""
+
+    message = 'Only gate scanners can verify QR codes.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user
+            and user.is_authenticated
+            and (user.is_superuser_role or user.has_perm('qr_requests.verify_qr'))
+        )
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user, mark_user_changed
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, update_fields=None, **kwargs):
+    """Saved, deactivated or deleted users must not be served from the auth cache."""
+    invalidate_cached_user(instance.pk)
+    # Every login saves last_login; that changes nothing a token claims.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        mark_user_changed(instance.pk)
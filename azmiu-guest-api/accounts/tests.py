@@ -1,3 +1,156 @@
-from django.test import TestCase
+import base64
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .apps import require_shared_cache
+from .models import User
+from .tokens import issue_tokens
+from .throttling import TokenBucket
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_capacity_then_wait(self):
+        bucket = TokenBucket('test:bucket', '3/min')
+        self.assertEqual([bucket.consume() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.consume(), 20.0, delta=0.5)
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket('test:bucket', '2/min')
+        with mock.patch('accounts.throttling.time.time', return_value=1000.0):
+            bucket.consume()
+            bucket.consume()
+            self.assertGreater(bucket.consume(), 0)
+        with mock.patch('accounts.throttling.time.time', return_value=1030.0):
+            self.assertEqual(bucket.consume(), 0.0)
+
+    def test_concurrent_attempts_cannot_share_a_token(self):
+        start = threading.Barrier(20)
+        allowed = []
+
+        def attempt():
+            start.wait()
+            allowed.append(TokenBucket('test:bucket', '5/min').consume() == 0)
+
+        threads = [threading.Thread(target=attempt) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(allowed), 5)
+
+
+@override_settings(
+    LOGIN_THROTTLE_RATES={'ip': '100/min', 'username': '3/min'},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LoginThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('alice', password='correct-horse')
+
+    def login(self, username, password='wrong', **extra):
+        return APIClient().post(
+            '/api/auth/login/', {'username': username, 'password': password}, format='json',
+            **extra,
+        )
+
+    def test_username_bucket_rejects_before_authenticating(self):
+        self.assertEqual([self.login('alice').status_code for _ in range(3)], [401] * 3)
+        with mock.patch('accounts.views.authenticate') as authenticate:
+            response = self.login('Alice', 'correct-horse')
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+        # Other usernames have their own bucket.
+        self.assertEqual(self.login('bob').status_code, 401)
+
+    def test_successful_login(self):
+        response = self.login('alice', 'correct-horse')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.data)
+
+    @override_settings(LOGIN_THROTTLE_RATES={'ip': '2/min', 'username': None})
+    def test_forwarded_for_cannot_pick_the_ip_bucket(self):
+        codes = [
+            self.login('alice', HTTP_X_FORWARDED_FOR=f'203.0.113.{n}').status_code
+            for n in range(3)
+        ]
+        self.assertEqual(codes, [401, 401, 429])
+
+    def test_basic_auth_only_on_the_throttled_token_view(self):
+        header = 'Basic ' + base64.b64encode(b'alice:correct-horse').decode()
+        client = APIClient(HTTP_AUTHORIZATION=header)
+        self.assertEqual(client.get('/api/qr-requests/').status_code, 401)
+        self.assertEqual(client.get('/api/auth/').status_code, 200)
+
+
+class SharedCacheTests(SimpleTestCase):
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    database = {'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache',
+    }}
+
+    @override_settings(DEBUG=False, CACHES=locmem)
+    def test_refuses_per_process_cache_outside_debug(self):
+        with self.assertRaises(ImproperlyConfigured):
+            require_shared_cache()
+        with self.settings(
+            LOGIN_THROTTLE_RATES={'ip': None, 'username': ''},
+            AUTH_USER_CACHE_TTL=0, AUTH_TRUST_TOKEN_CLAIMS=False,
+        ):
+            require_shared_cache()
+
+    @override_settings(DEBUG=False, CACHES=database)
+    def test_accepts_shared_cache(self):
+        require_shared_cache()
+
+
+@override_settings(AUTH_TRUST_TOKEN_CLAIMS=True, AUTH_USER_CACHE_TTL=60)
+class TokenClaimsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('root', role=User.Role.SUPERUSER)
+
+    def profiles(self, access):
+        return APIClient(HTTP_AUTHORIZATION=f'Bearer {access}').get('/api/profiles/')
+
+    def refresh(self, refresh):
+        return APIClient().post('/api/auth/refresh/', {'refresh': refresh}, format='json')
+
+    def test_claims_only_on_the_access_token(self):
+        tokens = issue_tokens(self.user)
+        self.assertEqual(AccessToken(tokens['token'])['role'], User.Role.SUPERUSER)
+        self.assertNotIn('role', RefreshToken(tokens['refresh']))
+
+    def test_saved_user_invalidates_earlier_claims(self):
+        tokens = issue_tokens(self.user)
+        self.assertEqual(self.profiles(tokens['token']).status_code, 200)
+        with mock.patch('accounts.authentication.time.time', return_value=time.time() + 1):
+            self.user.role = User.Role.MANAGER
+            self.user.save()
+        self.assertEqual(self.profiles(tokens['token']).status_code, 403)
+
+        response = self.refresh(tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['role'], User.Role.MANAGER)
+
+    def test_refresh_rechecks_the_user(self):
+        tokens = issue_tokens(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+        self.assertEqual(self.profiles(tokens['token']).status_code, 401)
+        self.user.delete()
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
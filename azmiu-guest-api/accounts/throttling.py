@@ -0,0 +1,156 @@
+"""
+Token-bucket throttles for the login endpoints.
+
+Each bucket holds up to N tokens and refills at N per period; every login
+attempt takes one token.  Buckets live in the Django cache, keyed by
+client IP or by the username being tried, so a credential-stuffing burst
+is rejected with 429 *before* any password hashing runs.
+
+Rates come from ``LOGIN_THROTTLE_RATES`` (e.g. ``{'ip': '30/min',
+'username': '5/min'}``); ``None`` disables a bucket.
+
+A bucket is read and written under a short cache lock (``cache.add``),
+so concurrent attempts in other threads or workers cannot all spend the
+same token.  An attempt that cannot get the lock in time is throttled.
+This only holds across workers on a shared cache backend; see
+``accounts.apps.require_shared_cache``.
+"""
+
+import base64
+import binascii
+import hashlib
+import secrets
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import get_authorization_header
+from rest_framework.throttling import BaseThrottle
+
+_PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """'5/min' → (capacity 5, refill 5/60 tokens per second)."""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / _PERIODS[period.strip().lower()]
+
+
+class TokenBucket:
+    """A cache-backed token bucket; state is ``(tokens, updated_at)``."""
+
+    lock_timeout = 2        # seconds a crashed holder can block the bucket
+    lock_wait = 0.05        # seconds to wait for a concurrent attempt
+
+    def __init__(self, key: str, rate: str):
+        self.key = key
+        self.capacity, self.refill_per_second = parse_rate(rate)
+
+    def consume(self) -> float:
+        """
+        Take one token.
+
+        Returns 0 when allowed, otherwise the seconds until a token is free.
+        """
+        owner = self._lock()
+        if owner is None:
+            return 1 / self.refill_per_second
+        try:
+            now = time.time()
+            tokens, updated_at = cache.get(self.key, (float(self.capacity), now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+            if tokens < 1:
+                cache.set(self.key, (tokens, now), self._ttl())
+                return (1 - tokens) / self.refill_per_second
+
+            cache.set(self.key, (tokens - 1, now), self._ttl())
+            return 0.0
+        finally:
+            self._unlock(owner)
+
+    def _lock(self) -> str | None:
+        owner = secrets.token_hex(8)
+        deadline = time.monotonic() + self.lock_wait
+        while not cache.add(f'{self.key}:lock', owner, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.002)
+        return owner
+
+    def _unlock(self, owner: str) -> None:
+        # Only release our own lock, not one taken after ours expired.
+        if cache.get(f'{self.key}:lock') == owner:
+            cache.delete(f'{self.key}:lock')
+
+    def _ttl(self) -> int:
+        # Long enough for a drained bucket to refill completely.
+        return int(self.capacity / self.refill_per_second) + 1
+
+
+class _LoginThrottle(BaseThrottle, ABC):
+    scope = ''
+
+    def __init__(self):
+        self._wait = None
+
+    @abstractmethod
+    def get_bucket_key(self, request, view) -> str | None:
+        """Identity the bucket is kept per; None skips the throttle."""
+
+    def allow_request(self, request, view):
+        rate = getattr(settings, 'LOGIN_THROTTLE_RATES', {}).get(self.scope)
+        if not rate:
+            return True
+        ident = self.get_bucket_key(request, view)
+        if ident is None:
+            return True
+        wait = TokenBucket(f'throttle:login:{self.scope}:{ident}', rate).consume()
+        self._wait = wait
+        return wait == 0
+
+    def wait(self):
+        return self._wait
+
+
+class LoginIPThrottle(_LoginThrottle):
+    """
+    One bucket per client IP.  DRF's ``get_ident`` reads X-Forwarded-For
+    only when ``NUM_PROXIES`` is set, so a client cannot pick its bucket.
+    """
+
+    scope = 'ip'
+
+    def get_bucket_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(_LoginThrottle):
+    """
+    One bucket per attempted username, from the JSON body or the Basic
+    auth header.  The header is only decoded, never verified, here.
+    """
+
+    scope = 'username'
+
+    def get_bucket_key(self, request, view):
+        username = _basic_auth_username(request)
+        if username is None and hasattr(request, 'data'):
+            username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        # Hash so arbitrary user input never becomes a raw cache key.
+        return hashlib.sha256(str(username).strip().lower().encode()).hexdigest()
+
+
+def _basic_auth_username(request) -> str | None:
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'basic':
+        return None
+    try:
+        decoded = base64.b64decode(auth[1]).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    return decoded.partition(':')[0] or None
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+
+def add_user_claims(access, user) -> None:
+    """
+    Embed ``role`` and ``username`` so requests can be authorised from the
+    access token alone when AUTH_TRUST_TOKEN_CLAIMS is on.  Refresh tokens
+    never carry them; each access token is stamped from the user row.
+    """
+    access['role'] = user.role
+    access['username'] = user.username
+
+
+def issue_tokens(user) -> dict:
+    """Build the login response payload for ``user``."""
+    refresh = RefreshToken.for_user(user)
+    access = refresh.access_token
+    add_user_claims(access, user)
+
+    return {
+        'token': str(access),
+        'refresh': str(refresh),
+        'user': {
+            'id': str(user.id),
+            'username': user.username,
+            'role': user.role,
+        },
+    }
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-read the user on every refresh: inactive or deleted users get no new
+    access token, and the new one carries the user's current role.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects.filter(**{
+            api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM),
+        }).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account',
+            )
+
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        add_user_claims(access, user)
+        data['access'] = str(access)
+        return data
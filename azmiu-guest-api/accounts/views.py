@@ -4,7 +4,9 @@ from rest_framework.authentication import BasicAuthentication
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+from .tokens import issue_tokens
 
 
 class TokenAuthView(APIView):
@@ -17,20 +19,22 @@ class TokenAuthView(APIView):
     """
     authentication_classes = [BasicAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
+
+    def perform_authentication(self, request):
+        # DRF throttles after authenticating; throttle first so rejected
+        # attempts never reach the password hasher.
+        self.check_throttles(request)
+        self._throttles_checked = True
+        super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        if not getattr(self, '_throttles_checked', False):
+            super().check_throttles(request)
 
     def get(self, request):
         # Generate JWT token for authenticated user
-        refresh = RefreshToken.for_user(request.user)
-        
-        return Response({
-            'token': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': {
-                'id': str(request.user.id),
-                'username': request.user.username,
-                'role': request.user.role,
-            }
-        }, status=status.HTTP_200_OK)
+        return Response(issue_tokens(request.user), status=status.HTTP_200_OK)
 
 
 class LoginView(APIView):
@@ -52,6 +56,7 @@ class LoginView(APIView):
     """
     authentication_classes = []
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
         username = request.data.get('username')
@@ -79,14 +84,4 @@ class LoginView(APIView):
             )
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'token': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': {
-                'id': str(user.id),
-                'username': user.username,
-                'role': user.role,
-            }
-        }, status=status.HTTP_200_OK)
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
@@ -0,0 +1,253 @@
+"""
+Structured, non-blocking logging.
+
+Loggers hand records to ``QueueHandler``, which only puts them on a
+bounded in-memory queue; a listener thread formats and writes them.
+When the queue is full records are dropped (and counted) rather than
+blocking the request.
+
+Before a record is queued, ``LogContextFilter`` stamps it with
+
+* ``request_id`` — the trace ID, also sent to NOVUS as ``X-Request-ID``,
+* ``user_id`` — the authenticated user of the current request,
+* ``novus_step`` / ``novus_step_ms`` — the enclosing ``novus.*`` span
+  and how long it has been running,
+
+and ``JsonFormatter`` writes one JSON object per line, including any
+``extra=`` fields such as ``duration_ms``.  ``SamplingFilter`` keeps only
+a share of the INFO/DEBUG records of noisy loggers; the decision is made
+per request, so a kept request keeps all of its lines.
+
+Threads do not survive ``fork()``: a child process (a Gunicorn worker
+under ``preload_app``) gets a fresh queue and listener of its own.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.utils.functional import LazyObject, empty
+
+from . import tracing
+
+_current_request: ContextVar = ContextVar('log_request', default=None)
+
+_CONTEXT_FIELDS = ('request_id', 'span_id', 'user_id', 'novus_step', 'novus_step_ms')
+
+# Attributes every LogRecord has; anything else arrived through ``extra=``.
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {
+    'message', 'asctime', 'taskName', 'trace_id', *_CONTEXT_FIELDS,
+}
+
+
+@contextmanager
+def bind_request(request):
+    """Make ``request`` the source of ``user_id`` for records logged in the block."""
+    token = _current_request.set(request)
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+# ── Filters ────────────────────────────────────────────────────────
+
+
+class LogContextFilter(tracing.TraceContextFilter):
+    """Stamps request, user and NOVUS step context on every record."""
+
+    def filter(self, record):
+        super().filter(record)
+        record.request_id = record.trace_id
+        if not hasattr(record, 'user_id'):
+            record.user_id = _user_id(_current_request.get())
+        if not hasattr(record, 'novus_step'):
+            step = _novus_step(tracing.current_span())
+            record.novus_step = step.name.removeprefix('novus.') if step else None
+            record.novus_step_ms = round(step.duration_ms, 1) if step else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep ``rate`` of the INFO/DEBUG records of the loggers in ``rates``
+    (``{'core.requests': 0.1}``); WARNING and above are always kept.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # Longest prefix first, so 'novus.client' wins over 'novus'.
+        self.rates = sorted(
+            ((name, float(rate)) for name, rate in (rates or {}).items()),
+            key=lambda item: -len(item[0]),
+        )
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        trace_id = tracing.current_trace_id()
+        if trace_id:
+            return int(trace_id[-8:], 16) < rate * 0x1_0000_0000
+        return random.random() < rate
+
+    def _rate(self, name):
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return rate
+        return 1.0
+
+
+def _user_id(request):
+    if request is None:
+        return None
+    user = vars(request).get('user')
+    if isinstance(user, LazyObject):
+        # Session user not loaded yet; a log line must not cause a query.
+        user = None if user._wrapped is empty else user._wrapped
+    if user is None or not user.is_authenticated:
+        return None
+    return str(user.pk)
+
+
+def _novus_step(span):
+    while span is not None:
+        if span.name.startswith('novus.') and not span.name.startswith('novus.http '):
+            return span
+        span = span.parent
+    return None
+
+
+# ── Handler / formatter ────────────────────────────────────────────
+
+
+_handlers = weakref.WeakSet()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for a listener thread that writes them to ``stream``
+    (stderr by default) or ``filename``.  The configured formatter is
+    applied on the listener thread.
+    """
+
+    def __init__(self, stream=None, filename=None, maxsize=10_000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        if filename:
+            self.target = logging.handlers.WatchedFileHandler(filename, encoding='utf-8')
+        else:
+            self.target = logging.StreamHandler(stream or sys.stderr)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self.start()
+        _handlers.add(self)
+
+    def start(self):
+        """Start the listener of this process; a no-op if it is running."""
+        if self._pid == os.getpid():
+            return
+        # After fork the inherited queue may hold the parent's records
+        # and a lock taken by one of its threads: start over.
+        self.queue = queue.Queue(maxsize=self.maxsize)
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, self.target)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Render the message now (args may be mutated after the call) but
+        # leave formatting, tracebacks included, to the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until the listener has written every queued record."""
+        if self._pid == os.getpid() and self.listener._thread is not None:
+            self.queue.join()
+            self.target.flush()
+
+    def close(self):
+        if self._pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+            self.target.close()
+        super().close()
+
+
+def restart_listeners():
+    """Give every ``QueueHandler`` a listener in the current process."""
+    for handler in list(_handlers):
+        handler.start()
+
+
+os.register_at_fork(after_in_child=restart_listeners)
+
+
+@contextmanager
+def redirect_output(stream):
+    """
+    Send the output of every ``QueueHandler`` that writes to a stream
+    (not a ``LOG_FILE``) to ``stream`` within the block.
+    """
+    redirected = []
+    for handler in list(_handlers):
+        target = handler.target
+        if isinstance(target, logging.StreamHandler) and not isinstance(target, logging.FileHandler):
+            handler.flush()
+            redirected.append((handler, target.stream))
+            target.setStream(stream)
+    try:
+        yield stream
+    finally:
+        for handler, previous in redirected:
+            handler.flush()
+            handler.target.setStream(previous)
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc)
+                  .isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in _CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None and value != '-':
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
@@ -0,0 +1,316 @@
+"""Project-wide middleware."""
+
+import gzip
+import hashlib
+import logging
+import random
+import re
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+from . import logs, tracing
+from .profiling import RequestProfiler
+from .routers import replica_aliases, set_replica_reads, track_writes
+
+access_logger = logging.getLogger('core.requests')
+
+
+class TracingMiddleware:
+    """
+    Open a trace per request and wrap the whole request in a root span.
+
+    The trace ID is returned to the client in ``X-Trace-Id`` so a slow
+    request reported by the frontend can be found in the span export.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tracing.start_trace(request.META.get('HTTP_TRACEPARENT')) as trace:
+            request.trace_id = trace.trace_id
+            with tracing.span(
+                f'{request.method} {request.path}',
+                **{'http.method': request.method, 'http.target': request.path},
+            ) as root:
+                response = self.get_response(request)
+                match = getattr(request, 'resolver_match', None)
+                if match is not None:
+                    root.attributes['http.route'] = match.view_name
+                root.attributes['http.status_code'] = response.status_code
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    root.attributes['user.id'] = str(user.pk)
+        response['X-Trace-Id'] = trace.trace_id
+        return response
+
+
+class RequestLogMiddleware:
+    """
+    Bind the request to the log context (for ``user_id``) and write one
+    access-log line per request to ``core.requests``.
+
+    Must run inside TracingMiddleware so the line carries the request ID.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.monotonic()
+        with logs.bind_request(request):
+            response = self.get_response(request)
+            access_logger.info(
+                '%s %s %s', request.method, request.path, response.status_code,
+                extra={
+                    'status_code': response.status_code,
+                    'duration_ms': round((time.monotonic() - started) * 1000, 1),
+                },
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression: brotli (if installed) or gzip.
+
+    Picks the best encoding the client lists in ``Accept-Encoding`` (``q=0``
+    excludes one).  Bodies smaller than ``COMPRESSION_MIN_SIZE`` and
+    already-compressed content types (images, archives) are sent as is;
+    streaming responses such as the export are gzipped on the fly.
+
+    BREACH: responses that set cookies and the views in
+    ``COMPRESSION_EXCLUDE_VIEWS`` (tokens, CSRF forms) are never
+    compressed, and gzip output gets up to ``COMPRESSION_MAX_RANDOM_BYTES``
+    of random-length padding, as in Django's ``GZipMiddleware``.
+    """
+
+    SKIP_TYPES = ('image/', 'video/', 'audio/', 'application/zip', 'application/gzip')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESSION_ENABLED:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (
+            response.has_header('Content-Encoding')
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.get('Content-Type', '').startswith(self.SKIP_TYPES)
+            or response.cookies
+            or _excluded(request)
+        ):
+            return response
+
+        encoding = _negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), response.streaming)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content,
+                max_random_bytes=settings.COMPRESSION_MAX_RANDOM_BYTES,
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            if encoding == 'br':
+                compressed = brotli.compress(
+                    response.content, quality=settings.COMPRESSION_BROTLI_QUALITY,
+                )
+            else:
+                compressed = _gzip(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The body is no longer byte-identical to the uncompressed one.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def _excluded(request) -> bool:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return False
+    return bool(
+        {match.view_name, *match.namespaces} & set(settings.COMPRESSION_EXCLUDE_VIEWS)
+    )
+
+
+def _gzip(content: bytes) -> bytes:
+    """gzip with a random-length FNAME header, like ``compress_string``."""
+    compressed = gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    if not settings.COMPRESSION_MAX_RANDOM_BYTES:
+        return compressed
+    header = bytearray(compressed[:10])
+    header[3] = gzip.FNAME
+    padding = b'a' * secrets.randbelow(settings.COMPRESSION_MAX_RANDOM_BYTES)
+    return bytes(header) + padding + b'\x00' + compressed[10:]
+
+
+_CODING = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def _negotiate(header: str, streaming: bool) -> str | None:
+    accepted = {}
+    for part in header.split(','):
+        match = _CODING.fullmatch(part)
+        if match:
+            try:
+                accepted[match.group(1).lower()] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    candidates = ['gzip'] if streaming or brotli is None else ['br', 'gzip']
+    best = max(candidates, key=lambda c: accepted.get(c, accepted.get('*', 0)))
+    return best if accepted.get(best, accepted.get('*', 0)) > 0 else None
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in cProfile + SQL capture for selected endpoints.
+
+    A request is profiled when its URL name is listed in
+    ``PROFILING_VIEWS`` and either it falls within ``PROFILING_SAMPLE_RATE``
+    or it carries the ``X-Profile: 1`` header.  The header is only honoured
+    for superusers; since DRF authenticates inside the view, the caller is
+    authenticated here first with the view's own authentication classes,
+    before any profiler starts.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        profiler = getattr(request, '_profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            path = profiler.save(request, response)
+            response['X-Profile-Id'] = path.stem
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            return None
+        if request.resolver_match.view_name not in settings.PROFILING_VIEWS:
+            return None
+
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        sampled = rate > 0 and random.random() < rate
+        if not sampled and not (
+            request.headers.get('X-Profile') == '1'
+            and self._is_superuser(request, view_func)
+        ):
+            return None
+
+        profiler = RequestProfiler()
+        if profiler.start():
+            request._profiler = profiler
+        return None
+
+    @staticmethod
+    def _is_superuser(request, view_func) -> bool:
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            user = getattr(request, 'user', None)
+        else:
+            drf_request = Request(
+                request,
+                authenticators=[auth() for auth in view_class.authentication_classes],
+            )
+            try:
+                user = drf_request.user
+            except APIException:
+                return False
+        return bool(
+            user is not None
+            and user.is_authenticated
+            and getattr(user, 'is_superuser_role', False)
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send reads of ``REPLICA_READ_VIEWS`` GET requests to a read replica.
+
+    Read-your-writes: any request that writes (or uses an unsafe method)
+    pins its client — identified by its Authorization header or session
+    cookie — to the primary for ``REPLICA_PIN_SECONDS``.  Pins live in the
+    default cache, so with replicas configured that cache must be shared
+    by every worker: a pin made in one worker is otherwise invisible to
+    the worker serving the next read.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if (
+            not settings.DEBUG
+            and replica_aliases()
+            and isinstance(caches['default'], (LocMemCache, DummyCache))
+        ):
+            raise ImproperlyConfigured(
+                'Replica read-your-writes pins need a cache shared by all workers; '
+                'set CACHE_BACKEND (e.g. django.core.cache.backends.redis.RedisCache).'
+            )
+
+    def __call__(self, request):
+        with track_writes() as wrote:
+            try:
+                response = self.get_response(request)
+            finally:
+                set_replica_reads(False)
+        if wrote or request.method not in self.SAFE_METHODS:
+            client = self._client_key(request)
+            if client:
+                cache.set(self._pin_key(client), True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in self.SAFE_METHODS:
+            return None
+        if request.resolver_match.view_name not in settings.REPLICA_READ_VIEWS:
+            return None
+        client = self._client_key(request)
+        if client and cache.get(self._pin_key(client)):
+            return None
+        set_replica_reads(True)
+        return None
+
+    @staticmethod
+    def _client_key(request) -> str | None:
+        credential = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credential:
+            return None
+        return hashlib.sha256(credential.encode()).hexdigest()
+
+    @staticmethod
+    def _pin_key(client: str) -> str:
+        return f'replica:pin:{client}'
@@ -0,0 +1,51 @@
+"""
+Paginator for admin changelists over large tables.
+
+An unfiltered changelist shows the database's row estimate instead of
+running ``COUNT(*)`` over the whole table (PostgreSQL ``pg_class``,
+SQLite ``sqlite_stat1`` once ANALYZE has run).  Filtered changelists,
+and tables without an estimate, count at most ``ADMIN_COUNT_LIMIT``
+rows; beyond that the limit is reported as the count.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimated_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        # COUNT(*) over a LIMITed subquery never reads past the limit.
+        return queryset[:limit].count()
+
+
+def estimated_rows(model, using='default') -> int | None:
+    """Planner statistics row count for ``model``'s table, or None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'sqlite':
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None  # e.g. sqlite_stat1 does not exist before the first ANALYZE
+    if row is None:
+        return None
+    estimate = int(float(str(row[0]).split()[0]))
+    return estimate if estimate >= 0 else None  # -1: never analyzed
@@ -0,0 +1,175 @@
+"""
+On-demand request profiling.
+
+A ``RequestProfiler`` captures a cProfile of the view together with every
+SQL query it runs (via ``connection.execute_wrapper``, so it works with
+DEBUG off).  Finished profiles are written to ``PROFILING_DIR`` as a
+pstats dump plus a JSON summary and can be downloaded by superusers from
+``/api/profiles/``.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.permissions import IsSuperUser
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryRecorder:
+    """DB execute wrapper recording SQL text and wall time per query."""
+
+    def __init__(self):
+        self.queries: list[dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'many': many,
+                'time_ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+class RequestProfiler:
+    """Wraps a cProfile run and SQL capture for a single request."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.profile = cProfile.Profile()
+        self.recorder = _QueryRecorder()
+        self._wrappers = []
+        self._started = 0.0
+        self.duration_ms = 0.0
+
+    def start(self) -> bool:
+        try:
+            self.profile.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            return False
+        for alias in connections:
+            wrapper = connections[alias].execute_wrapper(self.recorder)
+            wrapper.__enter__()
+            self._wrappers.append(wrapper)
+        self._started = time.perf_counter()
+        return True
+
+    def stop(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        self.profile.disable()
+        for wrapper in reversed(self._wrappers):
+            wrapper.__exit__(None, None, None)
+        self._wrappers = []
+
+    def save(self, request, response) -> Path:
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        self.profile.dump_stats(directory / f'{self.id}.prof')
+
+        text = io.StringIO()
+        pstats.Stats(self.profile, stream=text).sort_stats('cumulative').print_stats(30)
+
+        user = getattr(request, 'user', None)
+        summary = {
+            'id': self.id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': getattr(getattr(request, 'resolver_match', None), 'view_name', None),
+            'status_code': response.status_code,
+            'user_id': str(user.pk) if user is not None and user.is_authenticated else None,
+            'created_at': time.time(),
+            'duration_ms': round(self.duration_ms, 3),
+            'sql_count': len(self.recorder.queries),
+            'sql_time_ms': round(sum(q['time_ms'] for q in self.recorder.queries), 3),
+            'sql': self.recorder.queries,
+            'top_functions': text.getvalue(),
+        }
+        path = directory / f'{self.id}.json'
+        path.write_text(json.dumps(summary, indent=2, default=str), encoding='utf-8')
+        _prune(directory)
+        return path
+
+
+def _prune(directory: Path) -> None:
+    """Keep only the newest PROFILING_MAX_FILES profiles."""
+    keep = getattr(settings, 'PROFILING_MAX_FILES', 500)
+    summaries = sorted(directory.glob('*.json'), key=lambda p: p.stat().st_mtime)
+    for old in summaries[:-keep] if keep > 0 else []:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def _profile_path(profile_id: str, suffix: str) -> Path | None:
+    # Profile IDs are uuid4 hex; reject anything else to avoid path traversal.
+    try:
+        uuid.UUID(hex=profile_id)
+    except ValueError:
+        return None
+    path = Path(settings.PROFILING_DIR) / f'{profile_id}{suffix}'
+    return path if path.exists() else None
+
+
+# ── Download endpoints (SuperUser only) ────────────────────────────
+
+
+class ProfileListView(APIView):
+    """GET /api/profiles/ — List stored request profiles, newest first."""
+
+    permission_classes = [IsSuperUser]
+
+    def get(self, request):
+        directory = Path(settings.PROFILING_DIR)
+        if not directory.exists():
+            return Response([])
+        results = []
+        for path in sorted(directory.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True):
+            data = json.loads(path.read_text(encoding='utf-8'))
+            data.pop('sql', None)
+            data.pop('top_functions', None)
+            results.append(data)
+        return Response(results)
+
+
+class ProfileDownloadView(APIView):
+    """
+    GET /api/profiles/{id}/ — Download a profile.
+
+    Returns the JSON summary (SQL + top functions) by default, or the raw
+    pstats dump with ``?kind=prof`` for snakeviz / ``python -m pstats``.
+    """
+
+    permission_classes = [IsSuperUser]
+
+    def get(self, request, profile_id):
+        as_prof = request.query_params.get('kind') == 'prof'
+        path = _profile_path(profile_id, '.prof' if as_prof else '.json')
+        if path is None:
+            return Response(
+                {'detail': 'Profile not found.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=path.name,
+            content_type='application/octet-stream' if as_prof else 'application/json',
+        )
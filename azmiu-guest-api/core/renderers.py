@@ -0,0 +1,40 @@
+"""
+JSON renderer backed by orjson, when it is installed.
+
+orjson serialises UUIDs, datetimes (``Z`` for UTC, as DRF does) and
+dict/list/str subclasses such as ``ReturnDict`` and ``ErrorDetail``
+natively; anything else (Decimal, lazy strings, querysets, …) goes
+through DRF's own encoder, so output matches ``JSONRenderer`` apart from
+whitespace, with one exception: NaN and ±Infinity, which
+``JSONRenderer`` refuses with ``ValueError``, are written as ``null``
+(orjson has no strict mode, and no endpoint renders floats).  Without
+orjson this behaves exactly like ``JSONRenderer``.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_fallback = encoders.JSONEncoder()
+
+
+def _default(obj):
+    return _fallback.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
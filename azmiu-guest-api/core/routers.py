@@ -0,0 +1,71 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only when enabled for the current context: by
+``ReplicaRoutingMiddleware`` for the read-only views listed in
+``REPLICA_READ_VIEWS`` (unless the caller is pinned to the primary after
+a recent write), or explicitly with ``replica_reads()``.  Everything
+else, and every write, uses ``default``.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_read_from_replica: ContextVar[bool] = ContextVar('read_from_replica', default=False)
+_wrote: ContextVar[list | None] = ContextVar('replica_router_wrote', default=None)
+
+
+def replica_aliases() -> list[str]:
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def set_replica_reads(enabled: bool) -> None:
+    """Turn replica reads on/off for the current context (see middleware)."""
+    _read_from_replica.set(enabled and bool(replica_aliases()))
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    """Route reads in the block to a replica (if any are configured)."""
+    token = _read_from_replica.set(enabled and bool(replica_aliases()))
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+@contextmanager
+def track_writes():
+    """Yield a list that becomes truthy if anything in the block wrote."""
+    marker = []
+    token = _wrote.set(marker)
+    try:
+        yield marker
+    finally:
+        _wrote.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get():
+            return random.choice(replica_aliases())
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        marker = _wrote.get()
+        if marker is not None and not marker:
+            marker.append(True)
+        # Once a request writes, its later reads must see that write.
+        _read_from_replica.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
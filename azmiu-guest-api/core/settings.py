@@ -11,9 +11,12 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
+from core.database import database_config, replica_configs
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,7 +57,14 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'accounts.User'
 
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.FastRejectModelBackend',
+]
+
 MIDDLEWARE = [
+    'core.middleware.TracingMiddleware',
+    'core.middleware.RequestLogMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -63,6 +73,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -87,11 +99,41 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# Driven by DATABASE_URL (sqlite:/// or postgres://); see core/database.py
+# for the SQLite pragmas and Postgres pooling options.
 
 DATABASES = {
+    'default': database_config(BASE_DIR),
+    **replica_configs(BASE_DIR),
+}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Read-only views whose GET requests may read from a replica, and how long
+# (seconds) a client stays on the primary after a write.
+REPLICA_READ_VIEWS = [
+    'qr_requests:my-list',
+    'qr_requests:all-list',
+    'qr_requests:pending-list',
+    'qr_requests:export',
+    'qr_requests:qr-code-download',
+    'admin:qr_requests_guestqrrequest_changelist',
+]
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Per-process memory by default; point CACHE_BACKEND at a shared backend
+# (e.g. django.core.cache.backends.db.DatabaseCache or redis.RedisCache)
+# so invalidations and counters are seen by every worker.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'azmiu-guest-api'),
     }
 }
 
@@ -136,15 +178,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Proxies in front of the app that append to X-Forwarded-For. 0 keys
+    # client IPs (login throttle) on REMOTE_ADDR and ignores the header,
+    # which any client can set.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+    # orjson-backed when installed; identical to DRF's JSON classes otherwise.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # ── JWT Configuration ────────────────────────────────────────────────
@@ -155,8 +210,31 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Re-checks the user and stamps its current role on the new access token.
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.tokens.UserTokenRefreshSerializer',
 }
 
+# Seconds a resolved JWT user stays cached (0 disables the cache).
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', '60'))
+# Authorise from the role claim in the access token without any DB read.
+# Saving a user (role change, deactivation) stops trusting the claims of
+# its earlier access tokens; new ones come with the next login or refresh.
+# Both settings rely on a cache shared by every worker (see CACHES).
+AUTH_TRUST_TOKEN_CLAIMS = os.environ.get('AUTH_TRUST_TOKEN_CLAIMS', 'False') == 'True'
+
+# ── Login protection ───────────────────────────────────────────────
+# Token buckets for /api/auth/ and /api/auth/login/, checked before any
+# password hashing. Format "<count>/<s|min|hour|day>"; empty disables.
+# The buckets live in the default cache, which must be shared by every
+# worker (see CACHES); outside DEBUG the app refuses to start otherwise.
+LOGIN_THROTTLE_RATES = {
+    'ip': os.environ.get('LOGIN_THROTTLE_IP_RATE', '30/min'),
+    'username': os.environ.get('LOGIN_THROTTLE_USERNAME_RATE', '5/min'),
+}
+# Skip the password hasher for unknown usernames and sleep for the
+# typical hash time instead, keeping timing uniform without the CPU cost.
+LOGIN_FAST_REJECT_UNKNOWN = os.environ.get('LOGIN_FAST_REJECT_UNKNOWN', 'False') == 'True'
+
 
 # ── CORS Configuration ─────────────────────────────────────────────
 # Allow all origins during development
@@ -168,3 +246,226 @@ NOVUS_BASE_URL = os.environ.get('NOVUS_BASE_URL', '')
 NOVUS_USERNAME = os.environ.get('NOVUS_USERNAME', '')
 NOVUS_PASSWORD = os.environ.get('NOVUS_PASSWORD', '')
 NOVUS_ACCESS_LEVEL = int(os.environ.get('NOVUS_ACCESS_LEVEL', '16002'))
+# Days a new or renewed NOVUS credential stays valid.
+NOVUS_QR_VALIDITY_DAYS = int(os.environ.get('NOVUS_QR_VALIDITY_DAYS', '365'))
+
+# Returning guests reuse their NOVUS user. Cached IDs are re-checked
+# against NOVUS: 'always', 'never', or 'stale' (older than N days).
+NOVUS_IDENTITY_VERIFY = os.environ.get('NOVUS_IDENTITY_VERIFY', 'stale')
+NOVUS_IDENTITY_VERIFY_AFTER_DAYS = int(os.environ.get('NOVUS_IDENTITY_VERIFY_AFTER_DAYS', '30'))
+NOVUS_IDENTITY_MATCH_PHONE = os.environ.get('NOVUS_IDENTITY_MATCH_PHONE', 'False') == 'True'
+
+# Pool of NOVUS QR cards created ahead of approvals. When it drops below
+# the low watermark it is refilled up to the high one, in a background
+# thread after approvals (AUTO_REFILL) and/or by `manage.py refill_card_pool`.
+NOVUS_CARD_POOL_ENABLED = os.environ.get('NOVUS_CARD_POOL_ENABLED', 'False') == 'True'
+NOVUS_CARD_POOL_AUTO_REFILL = os.environ.get('NOVUS_CARD_POOL_AUTO_REFILL', 'True') == 'True'
+NOVUS_CARD_POOL_LOW_WATERMARK = int(os.environ.get('NOVUS_CARD_POOL_LOW_WATERMARK', '20'))
+NOVUS_CARD_POOL_HIGH_WATERMARK = int(os.environ.get('NOVUS_CARD_POOL_HIGH_WATERMARK', '100'))
+# Where the NOVUS service layer keeps guest identities and pooled cards.
+NOVUS_PROVISIONING_STORE = 'qr_requests.novus_store.ModelProvisioningStore'
+
+# Outbound NOVUS traffic is limited across all workers on this host via
+# lock files in NOVUS_LIMITER_DIR. Limits are keyed by resource path
+# ('/api/Users') with 'default' as fallback; 'concurrency' is in-flight
+# requests, 'rate' requests/second (0 = unlimited) with 'burst' headroom.
+NOVUS_LIMITER_ENABLED = os.environ.get('NOVUS_LIMITER_ENABLED', 'True') == 'True'
+NOVUS_LIMITER_DIR = os.environ.get(
+    'NOVUS_LIMITER_DIR', os.path.join(tempfile.gettempdir(), 'azmiu-novus-limiter'),
+)
+NOVUS_LIMITER_WAIT_TIMEOUT = float(os.environ.get('NOVUS_LIMITER_WAIT_TIMEOUT', '15'))
+NOVUS_LIMITS = {
+    'default': {
+        'concurrency': int(os.environ.get('NOVUS_MAX_CONCURRENCY', '8')),
+        'rate': float(os.environ.get('NOVUS_MAX_RATE', '0')),
+        'burst': int(os.environ.get('NOVUS_RATE_BURST', '5')),
+    },
+    '/api/Credentials': {
+        'concurrency': int(os.environ.get('NOVUS_CREDENTIALS_CONCURRENCY', '4')),
+    },
+}
+
+# QR numbers are allocated from a DB sequence in per-worker blocks.
+# QR_NUMBER_LENGTH includes the Luhn digit when QR_NUMBER_CHECK_DIGIT is on.
+QR_NUMBER_LENGTH = int(os.environ.get('QR_NUMBER_LENGTH', '6'))
+QR_NUMBER_CHECK_DIGIT = os.environ.get('QR_NUMBER_CHECK_DIGIT', 'False') == 'True'
+QR_NUMBER_BLOCK_SIZE = int(os.environ.get('QR_NUMBER_BLOCK_SIZE', '100'))
+
+# ── Logging ────────────────────────────────────────────────────────
+# Records are queued on the calling thread and written by a listener
+# thread, as JSON lines (LOG_FORMAT=json) or text (plain), to stderr or
+# LOG_FILE. LOG_SAMPLE_RATES keeps a share of the INFO/DEBUG records of
+# noisy loggers, e.g. "core.requests=0.1,novus.client=0.25".
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_FILE = os.environ.get('LOG_FILE', '')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (
+        item.partition('=') for item in os.environ.get('LOG_SAMPLE_RATES', '').split(',')
+    )
+    if name.strip()
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {'()': 'core.logs.SamplingFilter', 'rates': LOG_SAMPLE_RATES},
+        'context': {'()': 'core.logs.LogContextFilter'},
+    },
+    'formatters': {
+        'json': {'()': 'core.logs.JsonFormatter'},
+        'plain': {
+            'format': '%(asctime)s %(levelname)s %(name)s '
+                      '[%(request_id)s user=%(user_id)s] %(message)s',
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'core.logs.QueueHandler',
+            'filename': LOG_FILE or None,
+            'maxsize': LOG_QUEUE_SIZE,
+            'formatter': LOG_FORMAT,
+            'filters': ['sampling', 'context'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': LOG_LEVEL},
+    'loggers': {
+        # Replaces Django's defaults (console in DEBUG, synchronous mail_admins).
+        'django': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
+
+# `manage.py test` captures log output instead of printing it (see
+# core.test_runner); `-v 3` shows it.
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# ── Manager quotas ─────────────────────────────────────────────────
+# Defaults for every manager (0 = unlimited); per-manager overrides are
+# set on ManagerQuota in the admin. See qr_requests.quotas.
+QUOTA_REQUESTS_PER_DAY = int(os.environ.get('QUOTA_REQUESTS_PER_DAY', '200'))
+QUOTA_OPEN_PENDING = int(os.environ.get('QUOTA_OPEN_PENDING', '100'))
+QUOTA_ACTIVE_CREDENTIALS = int(os.environ.get('QUOTA_ACTIVE_CREDENTIALS', '1000'))
+
+# ── Admin ──────────────────────────────────────────────────────────
+# Changelists over large tables never count more rows than this (see
+# core.paginators); bulk approve/reject handles at most ADMIN_BULK_ACTION_MAX
+# requests and starts no new one after ADMIN_BULK_ACTION_SECONDS, keeping
+# the NOVUS calls of one admin request well inside GUNICORN_TIMEOUT.
+ADMIN_COUNT_LIMIT = int(os.environ.get('ADMIN_COUNT_LIMIT', '10000'))
+ADMIN_BULK_ACTION_MAX = int(os.environ.get('ADMIN_BULK_ACTION_MAX', '10'))
+ADMIN_BULK_ACTION_SECONDS = float(os.environ.get('ADMIN_BULK_ACTION_SECONDS', '20'))
+
+# ── Startup ────────────────────────────────────────────────────────
+# `manage.py check_startup` fails when django.setup() plus the URLconf
+# take longer than this in a fresh interpreter, or when a module that
+# should load lazily was imported.
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', '1000'))
+STARTUP_LAZY_MODULES = ['qrcode', 'PIL']
+
+# ── Tracing ────────────────────────────────────────────────────────
+# Spans of sampled requests are exported off the request thread to a
+# JSON-lines file ('jsonl'), an OTLP/HTTP collector ('otlp') or nowhere
+# ('none'). Trace IDs are propagated to NOVUS regardless of sampling.
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'False') == 'True'
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', '1.0'))
+TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'jsonl')
+TRACING_JSONL_PATH = os.environ.get('TRACING_JSONL_PATH', str(BASE_DIR / 'traces.jsonl'))
+TRACING_OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT', '')
+TRACING_SERVICE_NAME = os.environ.get('TRACING_SERVICE_NAME', 'azmiu-guest-api')
+
+# ── Profiling ──────────────────────────────────────────────────────
+# Requests to PROFILING_VIEWS are profiled (cProfile + SQL) at the sample
+# rate, or on demand when a superuser sends "X-Profile: 1". Results are
+# downloadable from /api/profiles/.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.0'))
+PROFILING_VIEWS = [
+    'qr_requests:my-list',
+    'qr_requests:all-list',
+    'qr_requests:pending-list',
+    'qr_requests:qr-code-download',
+]
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', '500'))
+
+# ── Idempotency ────────────────────────────────────────────────────
+# How long (seconds) a stored Idempotency-Key response is replayed.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+# A key still IN_PROGRESS after this many seconds belongs to a worker
+# that died; the next request with the key takes it over.
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = int(os.environ.get('IDEMPOTENCY_IN_PROGRESS_TIMEOUT', '300'))
+
+# ── Bulk guest import ──────────────────────────────────────────────
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '500'))
+IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS', '20000'))
+IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', '1000'))
+
+# ── Export ─────────────────────────────────────────────────────────
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+# ── Batch lookup ───────────────────────────────────────────────────
+# Most request IDs accepted by /api/qr-requests/batch/ in one call.
+REQUEST_BATCH_MAX = int(os.environ.get('REQUEST_BATCH_MAX', '200'))
+
+# ── QR verification ────────────────────────────────────────────────
+# Each worker keeps an in-memory index of approved QR numbers, loaded at
+# startup (QR_VERIFY_PRELOAD), caught up with other workers' changes
+# every SYNC seconds and fully rebuilt every RELOAD seconds.
+QR_VERIFY_PRELOAD = os.environ.get('QR_VERIFY_PRELOAD', 'True') == 'True'
+QR_VERIFY_SYNC_SECONDS = float(os.environ.get('QR_VERIFY_SYNC_SECONDS', '2'))
+QR_VERIFY_RELOAD_SECONDS = float(os.environ.get('QR_VERIFY_RELOAD_SECONDS', '600'))
+QR_VERIFY_BATCH_MAX = int(os.environ.get('QR_VERIFY_BATCH_MAX', '1000'))
+
+# ── Retention ──────────────────────────────────────────────────────
+# `manage.py archive_requests` moves rejected requests and approvals whose
+# credential expired longer ago than these ages into the archive table.
+ARCHIVE_REJECTED_AFTER_DAYS = int(os.environ.get('ARCHIVE_REJECTED_AFTER_DAYS', '90'))
+ARCHIVE_EXPIRED_AFTER_DAYS = int(os.environ.get('ARCHIVE_EXPIRED_AFTER_DAYS', '90'))
+
+# ── Review queue ───────────────────────────────────────────────────
+# Reviewers lease pending requests via /api/qr-requests/queue/claim/.
+REVIEW_LEASE_SECONDS = int(os.environ.get('REVIEW_LEASE_SECONDS', '300'))
+REVIEW_CLAIM_MAX = int(os.environ.get('REVIEW_CLAIM_MAX', '50'))
+# Requests left APPROVING for longer than this (seconds; well above the
+# worker timeout) are returned to PENDING by `manage.py release_stale_approvals`.
+APPROVAL_CLAIM_TIMEOUT = int(os.environ.get('APPROVAL_CLAIM_TIMEOUT', '300'))
+
+# ── Response compression ───────────────────────────────────────────
+# brotli (when installed) or gzip, negotiated via Accept-Encoding, for
+# bodies of at least COMPRESSION_MIN_SIZE bytes.
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True') == 'True'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+# BREACH: view names or namespaces whose bodies carry secrets (JWTs, CSRF
+# tokens) are sent uncompressed, as are responses setting cookies; gzip
+# bodies get 0..N-1 random padding bytes (Django's GZipMiddleware uses 100).
+COMPRESSION_EXCLUDE_VIEWS = ['token_auth', 'login', 'token_refresh', 'admin']
+COMPRESSION_MAX_RANDOM_BYTES = int(os.environ.get('COMPRESSION_MAX_RANDOM_BYTES', '100'))
+
+# ── Email / SMS ────────────────────────────────────────────────────
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '30'))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'no-reply@localhost')
+# Dotted path to a qr_requests.sms backend; empty disables SMS.
+SMS_BACKEND = os.environ.get('SMS_BACKEND', '')
+
+# ── Guest notifications ────────────────────────────────────────────
+# Approval queues the messages; they are sent in batches off the
+# request path (in-process thread and/or `manage.py send_notifications`).
+GUEST_NOTIFICATIONS_ENABLED = os.environ.get('GUEST_NOTIFICATIONS_ENABLED', 'False') == 'True'
+NOTIFY_IN_PROCESS = os.environ.get('NOTIFY_IN_PROCESS', 'True') == 'True'
+NOTIFY_POLL_SECONDS = float(os.environ.get('NOTIFY_POLL_SECONDS', '30'))
+NOTIFY_BATCH_SIZE = int(os.environ.get('NOTIFY_BATCH_SIZE', '50'))
+NOTIFY_MAX_ATTEMPTS = int(os.environ.get('NOTIFY_MAX_ATTEMPTS', '6'))
+NOTIFY_RETRY_SECONDS = int(os.environ.get('NOTIFY_RETRY_SECONDS', '60'))
+NOTIFY_SEND_TIMEOUT = int(os.environ.get('NOTIFY_SEND_TIMEOUT', '300'))
+NOTIFY_EMAIL_SUBJECT = os.environ.get('NOTIFY_EMAIL_SUBJECT', 'Your guest access QR code')
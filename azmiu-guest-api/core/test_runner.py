@@ -0,0 +1,28 @@
+"""
+``manage.py test`` runner that keeps log output off the console.
+
+Records still pass through the whole logging pipeline (filters, queue,
+formatter) but are written to ``log_output`` instead of stderr, so the
+test report stays readable.  Run with ``-v 3`` to see them.
+"""
+
+import io
+from contextlib import ExitStack
+
+from django.test.runner import DiscoverRunner
+
+from . import logs
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.log_output = io.StringIO()
+        self._log_capture = ExitStack()
+        if self.verbosity < 3:
+            self._log_capture.enter_context(logs.redirect_output(self.log_output))
+
+    def teardown_test_environment(self, **kwargs):
+        self._log_capture.close()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,374 @@
+"""
+Lightweight per-request tracing.
+
+Every request gets a trace ID (taken from an incoming W3C ``traceparent``
+header, or freshly generated).  Code wraps interesting steps in
+``span()``; finished spans of *sampled* traces are handed to a background
+exporter that writes them to a JSON-lines file or POSTs them to an
+OTLP/HTTP collector, so exporting never blocks the request thread.
+
+Unsampled traces still carry a trace ID — it is propagated to NOVUS and
+into logs — they just do not record spans.  The local sample rate always
+applies; an incoming ``traceparent`` can only turn sampling off, so a
+client cannot force every request to be traced.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar['Trace | None'] = ContextVar('trace', default=None)
+_current_span: ContextVar['Span | None'] = ContextVar('span', default=None)
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    sampled: bool
+    remote_parent_id: str | None = None
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+    parent: 'Span | None' = field(default=None, repr=False, compare=False)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1_000_000
+
+    def as_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+# ── Context helpers ────────────────────────────────────────────────
+
+
+def _new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def _new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def _parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """Parse ``00-<trace_id>-<parent_id>-<flags>``; None if malformed."""
+    if not header:
+        return None
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32:
+        return None
+    return parts[1], parts[2], bool(flags & 0x01)
+
+
+def _should_sample() -> bool:
+    if not getattr(settings, 'TRACING_ENABLED', False):
+        return False
+    rate = float(getattr(settings, 'TRACING_SAMPLE_RATE', 1.0))
+    return rate >= 1.0 or random.random() < rate
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def current_trace_id() -> str | None:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def current_traceparent() -> str | None:
+    """W3C ``traceparent`` header value for outbound calls, or None."""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    span = _current_span.get()
+    parent_id = span.span_id if span else (trace.remote_parent_id or _new_span_id())
+    return f'00-{trace.trace_id}-{parent_id}-{"01" if trace.sampled else "00"}'
+
+
+@contextmanager
+def start_trace(traceparent: str | None = None):
+    """
+    Open a trace for the duration of the block.
+
+    An incoming ``traceparent`` keeps the caller's trace ID.  The local
+    sample rate decides either way; the caller's sampled flag can only
+    veto it.
+    """
+    parsed = _parse_traceparent(traceparent)
+    if parsed:
+        trace_id, parent_id, sampled = parsed
+        trace = Trace(trace_id, sampled and _should_sample(), parent_id)
+    else:
+        trace = Trace(_new_trace_id(), _should_sample())
+
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Record a nested span around the block.
+
+    Outside of any trace (management commands, shell) a new root trace
+    is opened so the work is still traced.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        with start_trace():
+            with span(name, **attributes) as root:
+                yield root
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=trace.trace_id,
+        span_id=_new_span_id(),
+        parent_id=parent.span_id if parent else trace.remote_parent_id,
+        start_ns=time.time_ns(),
+        attributes=dict(attributes),
+        parent=parent,
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f'{type(exc).__name__}: {exc}'
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if trace.sampled:
+            get_exporter().submit(current)
+
+
+class TraceContextFilter(logging.Filter):
+    """Logging filter that stamps ``trace_id`` / ``span_id`` on every record."""
+
+    def filter(self, record):
+        span_ = _current_span.get()
+        record.trace_id = current_trace_id() or '-'
+        record.span_id = span_.span_id if span_ else '-'
+        return True
+
+
+# ── Exporters ──────────────────────────────────────────────────────
+
+
+class SpanExporter(ABC):
+    """
+    Buffers finished spans and writes them from a daemon thread.
+
+    Subclasses implement ``export(batch)``.  The buffer is bounded; when
+    it is full, spans are dropped rather than blocking the request.
+    """
+
+    batch_size = 256
+    flush_interval = 1.0
+
+    def __init__(self, max_queue: int = 10_000):
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name=f'{type(self).__name__}', daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, span_: Span) -> None:
+        try:
+            self._queue.put_nowait(span_)
+        except queue.Full:
+            pass
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until every span queued so far has been exported, or ``timeout``."""
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(max(deadline - time.monotonic(), 0))
+
+    def shutdown(self) -> None:
+        self.flush(timeout=2.0)
+
+    @abstractmethod
+    def export(self, batch: list[Span]) -> None:
+        """Write ``batch``; called on the exporter thread."""
+
+    def _run(self) -> None:
+        batch: list[Span] = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if isinstance(item, Span):
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                try:
+                    self.export(batch)
+                except Exception:
+                    logger.warning('Failed to export %d spans.', len(batch), exc_info=True)
+                batch = []
+            if isinstance(item, threading.Event):
+                item.set()
+
+
+class NullExporter:
+    def submit(self, span_: Span) -> None:
+        pass
+
+    def flush(self, timeout: float = 5.0) -> None:
+        pass
+
+
+class JsonLinesExporter(SpanExporter):
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__()
+
+    def export(self, batch: list[Span]) -> None:
+        lines = ''.join(json.dumps(s.as_dict(), default=str) + '\n' for s in batch)
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(lines)
+
+
+class OtlpHttpExporter(SpanExporter):
+    """POSTs spans as OTLP/HTTP JSON to ``<endpoint>/v1/traces``."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.endpoint = endpoint.rstrip('/')
+        if not self.endpoint.endswith('/v1/traces'):
+            self.endpoint += '/v1/traces'
+        self.service_name = service_name
+        super().__init__()
+
+    @staticmethod
+    def _attribute(key, value) -> dict:
+        if isinstance(value, bool):
+            return {'key': key, 'value': {'boolValue': value}}
+        if isinstance(value, int):
+            return {'key': key, 'value': {'intValue': str(value)}}
+        if isinstance(value, float):
+            return {'key': key, 'value': {'doubleValue': value}}
+        return {'key': key, 'value': {'stringValue': str(value)}}
+
+    def _otlp_span(self, span_: Span) -> dict:
+        data = {
+            'traceId': span_.trace_id,
+            'spanId': span_.span_id,
+            'name': span_.name,
+            'kind': 1,
+            'startTimeUnixNano': str(span_.start_ns),
+            'endTimeUnixNano': str(span_.end_ns),
+            'attributes': [self._attribute(k, v) for k, v in span_.attributes.items()],
+            'status': {'code': 2, 'message': span_.error} if span_.error else {'code': 1},
+        }
+        if span_.parent_id:
+            data['parentSpanId'] = span_.parent_id
+        return data
+
+    def export(self, batch: list[Span]) -> None:
+        import requests
+
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [
+                    self._attribute('service.name', self.service_name),
+                ]},
+                'scopeSpans': [{
+                    'scope': {'name': 'core.tracing'},
+                    'spans': [self._otlp_span(s) for s in batch],
+                }],
+            }],
+        }
+        requests.post(self.endpoint, json=payload, timeout=(2, 5))
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """Return the process-wide exporter configured by ``TRACING_EXPORTER``."""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                kind = getattr(settings, 'TRACING_EXPORTER', 'jsonl')
+                if kind == 'jsonl':
+                    _exporter = JsonLinesExporter(settings.TRACING_JSONL_PATH)
+                elif kind == 'otlp' and getattr(settings, 'TRACING_OTLP_ENDPOINT', ''):
+                    _exporter = OtlpHttpExporter(
+                        settings.TRACING_OTLP_ENDPOINT,
+                        getattr(settings, 'TRACING_SERVICE_NAME', 'azmiu-guest-api'),
+                    )
+                else:
+                    _exporter = NullExporter()
+    return _exporter
+
+
+def reset_exporter() -> None:
+    """Drop the exporter inherited from a parent process; see ``core.warmup``."""
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if isinstance(exporter, SpanExporter):
+        atexit.unregister(exporter.shutdown)
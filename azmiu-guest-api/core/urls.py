@@ -3,6 +3,7 @@ from django.urls import include, path
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from accounts.views import LoginView, TokenAuthView
+from core.profiling import ProfileDownloadView, ProfileListView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,4 +13,8 @@ urlpatterns = [
     path('api/auth/', TokenAuthView.as_view(), name='token_auth'),  # GET with Basic Auth
     path('api/auth/login/', LoginView.as_view(), name='login'),      # POST with body
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Request profiles (SuperUser only)
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDownloadView.as_view(), name='profile-download'),
 ]
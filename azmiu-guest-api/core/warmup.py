@@ -0,0 +1,79 @@
+"""
+Warm-up for forking servers.
+
+QR rendering (qrcode + PIL) and the NOVUS HTTP stack are imported on
+first use, so a worker that only serves list calls never loads them.
+Under Gunicorn the master can still load them once, before forking
+(``on_starting`` in gunicorn.conf.py); workers then share those pages
+instead of each paying for the import on its first QR or NOVUS call.
+
+Everything else the master set up is inherited by the workers as well,
+threads excepted; ``after_fork()`` (Gunicorn ``post_fork``) restarts or
+resets what must be per process.
+"""
+
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Loaded lazily by the app; preloaded in the master before fork.
+PRELOAD_MODULES = (
+    'qrcode',
+    'qrcode.image.pil',
+    'PIL.Image',
+    'PIL.PngImagePlugin',
+    'requests',
+)
+
+
+def preload_modules() -> None:
+    """Import the lazily loaded modules now; safe without Django set up."""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.warning('Warm-up could not import %s.', name)
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    Image.preinit()  # image plugins are otherwise registered on first save
+
+
+def preload_verification_index() -> None:
+    """Load the QR verification index before the first gate scan arrives."""
+    from django.conf import settings
+    from django.db import DatabaseError, connections
+
+    if not settings.QR_VERIFY_PRELOAD:
+        return
+    from qr_requests.verification import index
+    try:
+        index.load()
+    except DatabaseError:
+        logger.exception('QR verification index preload failed.')
+    finally:
+        # Never hand a connection opened here to forked workers.
+        connections.close_all()
+
+
+def after_fork() -> None:
+    """Reset per-process state a worker inherited from the master."""
+    from django.apps import apps
+
+    from core import logs, tracing
+    from novus.limiter import limiter
+
+    logs.restart_listeners()
+    tracing.reset_exporter()
+    # Slot files opened in the master are shared with every worker.
+    limiter.reset()
+    if not apps.ready:
+        return
+    from qr_requests import allocator, notifications
+
+    # A QR number block reserved in the master would be handed out by
+    # every worker; a dispatcher thread started there is gone.
+    allocator.reset()
+    notifications.dispatcher = notifications.NotificationDispatcher()
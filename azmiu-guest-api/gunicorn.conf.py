@@ -0,0 +1,35 @@
+"""
+Gunicorn settings, picked up from the working directory:
+
+    gunicorn core.wsgi
+
+The app is loaded in the master (``preload_app``) and the lazily
+imported QR/NOVUS modules are loaded there too, before any worker is
+forked; workers start with them (and the QR verification index) shared.
+``post_fork`` then restarts the threads and resets the per-process state
+each worker needs of its own (see core.warmup.after_fork).
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def on_starting(server):
+    if not preload_app:
+        return
+    from core.warmup import preload_modules
+
+    preload_modules()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from core.warmup import after_fork
+
+    after_fork()
@@ -6,11 +6,12 @@ Authenticates against NOVUS using system-level credentials
 """
 
 import logging
+import threading
 
 from django.conf import settings
 
 from .client import NovusClient
-from .exceptions import NovusAuthError, NovusResponseError
+from .exceptions import NovusAPIError, NovusAuthError, NovusResponseError
 
 logger = logging.getLogger(__name__)
 
@@ -51,3 +52,29 @@ def authenticate(client: NovusClient) -> str:
 
     logger.info('Successfully authenticated with NOVUS.')
     return token
+
+
+class SharedToken:
+    """
+    A NOVUS token shared by worker threads of a batch job.
+
+    ``call(fn)`` runs ``fn(token)`` and, if NOVUS answers 401, fetches a
+    new token once (only one thread re-authenticates) and retries.
+    """
+
+    def __init__(self, client: NovusClient):
+        self.client = client
+        self.token = authenticate(client)
+        self._lock = threading.Lock()
+
+    def call(self, fn):
+        token = self.token
+        try:
+            return fn(token)
+        except NovusAPIError as exc:
+            if exc.status_code != 401:
+                raise
+        with self._lock:
+            if self.token == token:
+                self.token = authenticate(self.client)
+        return fn(self.token)
@@ -1,12 +1,16 @@
 import logging
+from typing import TYPE_CHECKING
 
-import requests
-
+from core import tracing
 from .exceptions import (
     NovusAPIError,
     NovusConnectionError,
     NovusResponseError,
 )
+from .limiter import limiter
+
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
@@ -48,29 +52,54 @@ class NovusClient:
         if token:
             headers['Authorization'] = f'Bearer {token}'
 
+        # Imported on first use; only approvals and batch commands call NOVUS.
+        import requests
+
         url = self._url(path)
 
-        # Intentionally log the path but NEVER the token or credentials.
-        logger.info('NOVUS %s %s', method.upper(), path)
-
-        try:
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                json=json,
-                params=params,
-                auth=basic_auth,  # HTTP Basic Auth (username, password)
-                timeout=DEFAULT_TIMEOUT,
+        # The span starts once the shared limiter admits us, so its duration
+        # is NOVUS latency; time spent queueing is recorded separately.
+        with limiter.acquire(path) as waited, tracing.span(
+            f'novus.http {method.upper()} {path}',
+            **{'http.method': method.upper(), 'novus.path': path},
+        ) as span:
+            span.attributes['novus.queue_wait_ms'] = round(waited * 1000, 2)
+
+            # Propagate the trace so NOVUS-side logs can be correlated.
+            traceparent = tracing.current_traceparent()
+            if traceparent:
+                headers['traceparent'] = traceparent
+                headers['X-Request-ID'] = span.trace_id
+
+            try:
+                response = requests.request(
+                    method,
+                    url,
+                    headers=headers,
+                    json=json,
+                    params=params,
+                    auth=basic_auth,  # HTTP Basic Auth (username, password)
+                    timeout=DEFAULT_TIMEOUT,
+                )
+            except requests.ConnectionError as exc:
+                raise NovusConnectionError(
+                    f'Failed to connect to NOVUS at {url}'
+                ) from exc
+            except requests.Timeout as exc:
+                raise NovusConnectionError(
+                    f'NOVUS request timed out: {url}'
+                ) from exc
+            span.attributes['http.status_code'] = response.status_code
+
+            # Intentionally log the path but NEVER the token or credentials.
+            logger.info(
+                'NOVUS %s %s -> %s',
+                method.upper(), path, response.status_code,
+                extra={
+                    'duration_ms': round(span.duration_ms, 1),
+                    'queue_wait_ms': span.attributes['novus.queue_wait_ms'],
+                },
             )
-        except requests.ConnectionError as exc:
-            raise NovusConnectionError(
-                f'Failed to connect to NOVUS at {url}'
-            ) from exc
-        except requests.Timeout as exc:
-            raise NovusConnectionError(
-                f'NOVUS request timed out: {url}'
-            ) from exc
 
         if not response.ok:
             raise NovusAPIError(
@@ -102,10 +131,13 @@ class NovusClient:
     def post(self, path: str, *, token: str | None = None, json: dict | None = None) -> dict:
         return self._request('POST', path, token=token, json=json)
 
+    def put(self, path: str, *, token: str | None = None, json: dict | None = None) -> dict:
+        return self._request('PUT', path, token=token, json=json)
+
 
-def _safe_json(response: requests.Response) -> dict | None:
+def _safe_json(response: 'requests.Response') -> dict | None:
     """Return parsed JSON or None if the body is not valid JSON."""
     try:
         return response.json()
-    except (ValueError, requests.JSONDecodeError):
+    except ValueError:  # includes requests.JSONDecodeError
         return None
@@ -37,3 +37,7 @@ class NovusConnectionError(NovusError):
 
 class NovusResponseError(NovusError):
     """NOVUS returned a response that could not be parsed or is missing expected fields."""
+
+
+class NovusBusyError(NovusError):
+    """The local NOVUS limiter had no capacity within the wait timeout."""
@@ -0,0 +1,251 @@
+"""
+Cross-process concurrency and rate limiter for outbound NOVUS traffic.
+
+All Gunicorn workers (and management commands) on a host share the
+limits through lock files in ``NOVUS_LIMITER_DIR`` — no broker needed:
+
+* **Concurrency** — an endpoint with limit N has N slot files; a caller
+  holds an exclusive ``flock`` on one of them for the duration of its
+  request.  Locks die with the process, so a crashed worker never leaks
+  a slot.
+* **Rate** — a GCRA state file per endpoint holds the theoretical
+  arrival time of the next request, updated under an exclusive lock.
+
+Callers that cannot get through within ``NOVUS_LIMITER_WAIT_TIMEOUT``
+get ``NovusBusyError``.  The time spent queueing is returned to the
+caller so it can be reported apart from NOVUS latency.
+
+``host_lock()`` uses the same directory for one-at-a-time jobs such as
+the card pool refill.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+from .exceptions import NovusBusyError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.005
+_MAX_POLL_INTERVAL = 0.1
+
+
+def endpoint_key(path: str) -> str:
+    """'/api/Users/42' → '/api/Users' (limits apply per resource)."""
+    parts = [p for p in path.split('?')[0].split('/') if p]
+    return '/' + '/'.join(parts[:2])
+
+
+def _limits_for(endpoint: str) -> dict:
+    limits = getattr(settings, 'NOVUS_LIMITS', {})
+    merged = dict(limits.get('default', {}))
+    merged.update(limits.get(endpoint, {}))
+    return merged
+
+
+class _Slots:
+    """N flock-protected slot files for one endpoint."""
+
+    def __init__(self, directory: Path, name: str, size: int):
+        self.paths = [directory / f'{name}.slot{i}' for i in range(size)]
+        self._fds: dict[int, int] = {}
+        self._local_busy: set[int] = set()
+        self._local_lock = threading.Lock()
+
+    def try_acquire(self) -> int | None:
+        with self._local_lock:
+            for index, path in enumerate(self.paths):
+                # flock is per open file: threads of one process must not
+                # share a slot, so track local use separately.
+                if index in self._local_busy:
+                    continue
+                fd = self._fds.get(index)
+                if fd is None:
+                    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+                    self._fds[index] = fd
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                self._local_busy.add(index)
+                return index
+        return None
+
+    def release(self, index: int) -> None:
+        with self._local_lock:
+            fcntl.flock(self._fds[index], fcntl.LOCK_UN)
+            self._local_busy.discard(index)
+
+    def close(self) -> None:
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+class _RateGate:
+    """GCRA over a shared state file: ``rate`` per second, ``burst`` deep."""
+
+    def __init__(self, path: Path, rate: float, burst: int):
+        self.path = path
+        self.interval = 1.0 / rate
+        self.tolerance = self.interval * max(burst - 1, 0)
+
+    def try_pass(self) -> float:
+        """0 if allowed now, else seconds to wait before retrying."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.pread(fd, 64, 0)
+            now = time.time()
+            tat = max(float(raw or 0), now)
+            if tat - now > self.tolerance:
+                return tat - now - self.tolerance
+            data = repr(tat + self.interval).encode()
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, data, 0)
+            return 0.0
+        finally:
+            os.close(fd)
+
+
+class NovusLimiter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: dict[str, _Slots] = {}
+        self._gates: dict[str, _RateGate] = {}
+
+    def reset(self) -> None:
+        """
+        Drop slot files and gates inherited across fork (``after_fork``).
+
+        flock belongs to the open file, which a forked child shares with
+        its parent and siblings: on inherited descriptors every worker
+        would hold the same slot at once.  The child's copies are closed
+        (the parent's stay open and locked) and reopened on next use.
+        """
+        self._lock = threading.Lock()
+        for slots in self._slots.values():
+            slots.close()
+        self._slots = {}
+        self._gates = {}
+
+    @staticmethod
+    def _directory() -> Path:
+        directory = Path(settings.NOVUS_LIMITER_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    @staticmethod
+    def _file_name(endpoint: str) -> str:
+        return endpoint.strip('/').replace('/', '_') or 'root'
+
+    def _get_slots(self, endpoint: str, size: int) -> _Slots:
+        with self._lock:
+            slots = self._slots.get(endpoint)
+            if slots is None or len(slots.paths) != size:
+                slots = _Slots(self._directory(), self._file_name(endpoint), size)
+                self._slots[endpoint] = slots
+            return slots
+
+    def _get_gate(self, endpoint: str, rate: float, burst: int) -> _RateGate:
+        with self._lock:
+            gate = self._gates.get(endpoint)
+            if gate is None or gate.interval != 1.0 / rate:
+                path = self._directory() / f'{self._file_name(endpoint)}.rate'
+                gate = _RateGate(path, rate, burst)
+                self._gates[endpoint] = gate
+            return gate
+
+    @contextmanager
+    def acquire(self, path: str):
+        """
+        Block until ``path``'s endpoint has a free slot and rate budget.
+
+        Yields the seconds spent waiting.  Raises NovusBusyError after
+        ``NOVUS_LIMITER_WAIT_TIMEOUT``.
+        """
+        if fcntl is None or not getattr(settings, 'NOVUS_LIMITER_ENABLED', False):
+            yield 0.0
+            return
+
+        endpoint = endpoint_key(path)
+        limits = _limits_for(endpoint)
+        concurrency = int(limits.get('concurrency', 0))
+        rate = float(limits.get('rate', 0))
+        timeout = settings.NOVUS_LIMITER_WAIT_TIMEOUT
+
+        start = time.monotonic()
+        deadline = start + timeout
+        poll = _POLL_INTERVAL
+
+        slots = self._get_slots(endpoint, concurrency) if concurrency > 0 else None
+        slot = None
+        try:
+            while slots is not None:
+                slot = slots.try_acquire()
+                if slot is not None:
+                    break
+                if time.monotonic() >= deadline:
+                    raise NovusBusyError(
+                        f'No free NOVUS slot for {endpoint} within {timeout}s '
+                        f'(limit {concurrency} concurrent).'
+                    )
+                time.sleep(poll)
+                poll = min(poll * 2, _MAX_POLL_INTERVAL)
+
+            if rate > 0:
+                gate = self._get_gate(endpoint, rate, int(limits.get('burst', 1)))
+                while True:
+                    delay = gate.try_pass()
+                    if delay == 0:
+                        break
+                    if time.monotonic() + delay > deadline:
+                        raise NovusBusyError(
+                            f'NOVUS rate limit for {endpoint} ({rate}/s) '
+                            f'not cleared within {timeout}s.'
+                        )
+                    time.sleep(delay)
+
+            waited = time.monotonic() - start
+            if waited > 0.05:
+                logger.info('Waited %.0f ms for NOVUS %s capacity.', waited * 1000, endpoint)
+            yield waited
+        finally:
+            if slot is not None:
+                slots.release(slot)
+
+
+limiter = NovusLimiter()
+
+
+@contextmanager
+def host_lock(name: str):
+    """
+    Try to take the host-wide lock ``name`` without blocking; yields
+    whether it was taken.  Threads and processes exclude each other.
+    """
+    if fcntl is None:
+        yield True
+        return
+    fd = os.open(NovusLimiter._directory() / f'{name}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
+    finally:
+        os.close(fd)  # also releases the lock
@@ -0,0 +1,107 @@
+"""
+Reconciliation of stored NOVUS IDs against NOVUS itself.
+
+``check_request()`` fetches a request's user, card and credential from
+NOVUS and returns the mismatches it finds.  Storing them is up to the
+host app (``qr_requests.reconciliation``); ``manage.py reconcile_novus``
+drives both over all approved requests.
+"""
+
+import threading
+from datetime import datetime
+
+from django.utils import timezone
+
+from .auth import SharedToken
+from .services import get_credential, get_guest_user, get_qr_card
+
+
+class Kind:
+    """Discrepancy kinds reported by ``check_request()``."""
+
+    USER_MISSING = 'USER_MISSING'
+    CARD_MISSING = 'CARD_MISSING'
+    CARD_NUMBER = 'CARD_NUMBER'
+    CREDENTIAL_MISSING = 'CREDENTIAL_MISSING'
+    CREDENTIAL_LINK = 'CREDENTIAL_LINK'
+    CREDENTIAL_EXPIRY = 'CREDENTIAL_EXPIRY'
+
+
+# Expiry differences below this are formatting/timezone noise.
+EXPIRY_TOLERANCE_SECONDS = 24 * 3600
+
+
+class Reconciler:
+    """Thread-safe checker; NOVUS users shared by several requests are fetched once."""
+
+    def __init__(self, token: SharedToken):
+        self.token = token
+        self._users: dict[str, bool] = {}
+        self._users_lock = threading.Lock()
+
+    def _fetch(self, getter, novus_id):
+        return self.token.call(lambda token: getter(self.token.client, token, int(novus_id)))
+
+    def _user_exists(self, novus_user_id: str) -> bool:
+        with self._users_lock:
+            known = self._users.get(novus_user_id)
+        if known is None:
+            known = self._fetch(get_guest_user, novus_user_id) is not None
+            with self._users_lock:
+                self._users[novus_user_id] = known
+        return known
+
+    def check_request(self, qr_request) -> list[tuple[str, dict]]:
+        """Return ``(kind, detail)`` for every mismatch of ``qr_request``."""
+        findings = []
+
+        if not self._user_exists(qr_request.novus_user_id):
+            findings.append((Kind.USER_MISSING, {'novus_user_id': qr_request.novus_user_id}))
+
+        card = self._fetch(get_qr_card, qr_request.novus_card_id)
+        if card is None:
+            findings.append((Kind.CARD_MISSING, {'novus_card_id': qr_request.novus_card_id}))
+        elif str(card.get('number')) != qr_request.qr_number:
+            findings.append((Kind.CARD_NUMBER, {
+                'expected': qr_request.qr_number, 'novus': card.get('number'),
+            }))
+
+        credential = self._fetch(get_credential, qr_request.novus_credential_id)
+        if credential is None:
+            findings.append((Kind.CREDENTIAL_MISSING, {
+                'novus_credential_id': qr_request.novus_credential_id,
+            }))
+            return findings
+
+        card_ids = {str(c) for c in (credential.get('cards') or []) + (credential.get('qrCodes') or [])}
+        if (str(credential.get('userId')) != qr_request.novus_user_id
+                or qr_request.novus_card_id not in card_ids):
+            findings.append((Kind.CREDENTIAL_LINK, {
+                'expected': {'user': qr_request.novus_user_id, 'card': qr_request.novus_card_id},
+                'novus': {'user': credential.get('userId'), 'cards': sorted(card_ids)},
+            }))
+
+        expiry = _parse_datetime(credential.get('expirationDate'))
+        expected = qr_request.credential_expires_at
+        if expected is not None and (
+            expiry is None
+            or abs((expiry - expected).total_seconds()) > EXPIRY_TOLERANCE_SECONDS
+        ):
+            findings.append((Kind.CREDENTIAL_EXPIRY, {
+                'expected': expected.isoformat(),
+                'novus': credential.get('expirationDate'),
+            }))
+        return findings
+
+
+def _parse_datetime(value) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_default_timezone())
+    return parsed
+
@@ -6,24 +6,39 @@ and the orchestrator that ties them together in the correct order for QR generat
 
 This module is the ONLY place that knows about the NOVUS workflow sequence.
 Views and serializers call `provision_qr_for_request()` — nothing else.
+QR numbers come from the caller (``allocate_qr_number``), and guest
+identities and pooled cards are kept by the app's ``ProvisioningStore``
+(``novus.store``), so this layer does not depend on the app's models.
 """
 
 import logging
-import uuid
+import threading
+from collections.abc import Callable
 from datetime import datetime, timedelta, timezone
 
 from django.conf import settings
+from django.db import connections
+from django.utils import timezone as django_timezone
 
+from core import tracing
 from .auth import authenticate
 from .client import NovusClient
-from .exceptions import NovusResponseError
+from .exceptions import NovusAPIError, NovusResponseError
+from .limiter import host_lock
+from .store import get_store
 
 logger = logging.getLogger(__name__)
 
-# Default QR validity period (days from now).
+# Default QR validity period (days from now); see NOVUS_QR_VALIDITY_DAYS.
 QR_VALIDITY_DAYS = 365
 
 
+def credential_expiry(extra: timedelta = timedelta(0)) -> datetime:
+    """Expiry for a credential created or renewed now."""
+    days = getattr(settings, 'NOVUS_QR_VALIDITY_DAYS', QR_VALIDITY_DAYS)
+    return datetime.now(timezone.utc) + timedelta(days=days) + extra
+
+
 # ── Individual NOVUS operations ────────────────────────────────────
 
 
@@ -61,6 +76,30 @@ def create_guest_user(
     return int(user_id)
 
 
+def get_guest_user(client: NovusClient, token: str, novus_user_id: int) -> dict | None:
+    """
+    GET /api/Users/{id} — fetch a NOVUS user.
+
+    Returns the user payload, or None if NOVUS no longer knows the ID.
+    """
+    try:
+        return client.get(f'/api/Users/{novus_user_id}', token=token)
+    except NovusAPIError as exc:
+        if exc.status_code == 404:
+            return None
+        raise
+
+
+def get_qr_card(client: NovusClient, token: str, novus_card_id: int) -> dict | None:
+    """GET /api/Cards/{id} — fetch a NOVUS card, or None if it is gone."""
+    try:
+        return client.get(f'/api/Cards/{novus_card_id}', token=token)
+    except NovusAPIError as exc:
+        if exc.status_code == 404:
+            return None
+        raise
+
+
 def create_qr_card(
     client: NovusClient,
     token: str,
@@ -109,20 +148,9 @@ def create_credential(
     Returns the NOVUS credential ID (int).
     """
     if expiration_date is None:
-        expiration_date = (
-            datetime.now(timezone.utc) + timedelta(days=QR_VALIDITY_DAYS)
-        ).isoformat()
+        expiration_date = credential_expiry().isoformat()
 
-    access_level = getattr(settings, 'NOVUS_ACCESS_LEVEL', 16002)
-
-    payload = {
-        'accessLevel': access_level,
-        'userId': novus_user_id,
-        'expirationDate': expiration_date,
-        'cards': [novus_card_id],
-        'vehicles': [],
-        'qrCodes': [novus_card_id],
-    }
+    payload = _credential_payload(novus_user_id, novus_card_id, expiration_date)
     data = client.post('/api/Credentials', token=token, json=payload)
 
     credential_id = data.get('id')
@@ -135,22 +163,229 @@ def create_credential(
     return int(credential_id)
 
 
+def get_credential(client: NovusClient, token: str, novus_credential_id: int) -> dict | None:
+    """GET /api/Credentials/{id} — fetch a NOVUS credential, or None if it is gone."""
+    try:
+        return client.get(f'/api/Credentials/{novus_credential_id}', token=token)
+    except NovusAPIError as exc:
+        if exc.status_code == 404:
+            return None
+        raise
+
+
+def renew_credential(
+    client: NovusClient,
+    token: str,
+    *,
+    novus_credential_id: int,
+    novus_user_id: int,
+    novus_card_id: int,
+    expiration_date: str,
+) -> None:
+    """
+    PUT /api/Credentials/{id} — move an existing credential's expiry.
+
+    The card and user stay linked, so the guest's QR code keeps working.
+    """
+    payload = _credential_payload(novus_user_id, novus_card_id, expiration_date)
+    payload['id'] = novus_credential_id
+    client.put(f'/api/Credentials/{novus_credential_id}', token=token, json=payload)
+    logger.info('NOVUS credential %s renewed until %s', novus_credential_id, expiration_date)
+
+
+def _credential_payload(novus_user_id: int, novus_card_id: int, expiration_date: str) -> dict:
+    return {
+        'accessLevel': getattr(settings, 'NOVUS_ACCESS_LEVEL', 16002),
+        'userId': novus_user_id,
+        'expirationDate': expiration_date,
+        'cards': [novus_card_id],
+        'vehicles': [],
+        'qrCodes': [novus_card_id],
+    }
+
+
+# ── Guest identity reuse ───────────────────────────────────────────
+
+
+def _needs_verification(identity) -> bool:
+    mode = getattr(settings, 'NOVUS_IDENTITY_VERIFY', 'stale')
+    if mode == 'always':
+        return True
+    if mode == 'never':
+        return False
+    max_age = timedelta(days=getattr(settings, 'NOVUS_IDENTITY_VERIFY_AFTER_DAYS', 30))
+    checked = identity.verified_at or identity.created_at
+    return django_timezone.now() - checked > max_age
+
+
+def resolve_guest_user(client: NovusClient, token: str, qr_request) -> int:
+    """
+    Return the NOVUS user ID for the request's guest.
+
+    Known guests (matched by normalised email, optionally phone) reuse
+    their existing NOVUS user; the cached ID is re-checked against NOVUS
+    per ``NOVUS_IDENTITY_VERIFY`` ('always', 'never', or 'stale' — older
+    than ``NOVUS_IDENTITY_VERIFY_AFTER_DAYS``).  Unknown guests, and
+    cached IDs NOVUS no longer has, get a new NOVUS user.
+    """
+    store = get_store()
+    identity = store.find_identity(
+        qr_request, match_phone=getattr(settings, 'NOVUS_IDENTITY_MATCH_PHONE', False),
+    )
+    if identity is not None:
+        novus_user_id = int(identity.novus_user_id)
+        if not _needs_verification(identity):
+            store.touch_identity(identity)
+            logger.info('Reusing NOVUS guest user %s', novus_user_id)
+            return novus_user_id
+
+        with tracing.span('novus.verify_guest_user'):
+            found = get_guest_user(client, token, novus_user_id)
+        if found is not None:
+            store.touch_identity(identity, verified=True)
+            logger.info('Reusing verified NOVUS guest user %s', novus_user_id)
+            return novus_user_id
+
+        logger.warning(
+            'Cached NOVUS guest user %s no longer exists; creating a new one.',
+            novus_user_id,
+        )
+        store.forget_identity(identity)
+
+    with tracing.span('novus.create_guest_user'):
+        novus_user_id = create_guest_user(
+            client,
+            token,
+            first_name=qr_request.guest_name,
+            last_name=qr_request.guest_surname,
+            email=qr_request.guest_email,
+            remark=qr_request.remark or '',
+        )
+    store.remember_identity(qr_request, novus_user_id)
+    return novus_user_id
+
+
+# ── Card pool ──────────────────────────────────────────────────────
+#
+# QR cards do not depend on the guest, so they can be created in NOVUS
+# ahead of time. An approval then only takes one from the pool, leaving
+# credential creation (and user creation for new guests) on the critical
+# path.
+
+_refill_lock = threading.Lock()
+
+
+def get_client() -> NovusClient:
+    base_url = getattr(settings, 'NOVUS_BASE_URL', None)
+    if not base_url:
+        raise NovusResponseError('NOVUS_BASE_URL is not configured.')
+    return NovusClient(base_url)
+
+
+def take_pooled_card():
+    """
+    Atomically claim the oldest available pooled card, or return None.
+    Concurrent approvals never get the same card.
+    """
+    return get_store().take_card()
+
+
+def release_pooled_card(entry) -> None:
+    get_store().release_card(entry)
+
+
+def card_pool_available() -> int:
+    return get_store().available_cards()
+
+
+def refill_card_pool(
+    allocate_qr_number: Callable[[], str],
+    client: NovusClient | None = None,
+    token: str | None = None,
+) -> int:
+    """
+    Top the pool up to ``NOVUS_CARD_POOL_HIGH_WATERMARK`` if it has fallen
+    below ``NOVUS_CARD_POOL_LOW_WATERMARK``.  Returns the number of cards
+    created.  Only one refill runs per host at a time (``host_lock``).
+    """
+    if not _refill_lock.acquire(blocking=False):
+        return 0
+    try:
+        with host_lock('card_pool_refill') as held:
+            if not held:
+                return 0
+            available = card_pool_available()
+            if available >= settings.NOVUS_CARD_POOL_LOW_WATERMARK:
+                return 0
+
+            client = client or get_client()
+            token = token or authenticate(client)
+            created = 0
+            for _ in range(settings.NOVUS_CARD_POOL_HIGH_WATERMARK - available):
+                # Another host may be refilling too; stop once it is full.
+                if created and card_pool_available() >= settings.NOVUS_CARD_POOL_HIGH_WATERMARK:
+                    break
+                with tracing.span('novus.pool_create_qr_card'):
+                    card_id, number = create_qr_card(
+                        client, token, qr_number=allocate_qr_number(),
+                    )
+                get_store().add_card(card_id, number)
+                created += 1
+            logger.info('NOVUS card pool refilled with %d cards.', created)
+            return created
+    finally:
+        _refill_lock.release()
+
+
+def release_stale_card_claims(older_than: timedelta, used_card_ids) -> int:
+    """
+    Return cards whose claim was never completed (worker crashed) to the
+    pool, unless a request actually ended up using the card (its ID is in
+    ``used_card_ids``, a list or a single-column queryset).
+    """
+    return get_store().release_stale_card_claims(older_than, used_card_ids)
+
+
+def _refill_in_background(allocate_qr_number: Callable[[], str]) -> None:
+    # Most approvals leave the pool above the low watermark: no thread.
+    if _refill_lock.locked() or card_pool_available() >= settings.NOVUS_CARD_POOL_LOW_WATERMARK:
+        return
+
+    def run():
+        try:
+            refill_card_pool(allocate_qr_number)
+        except Exception:
+            logger.exception('Background NOVUS card pool refill failed.')
+        finally:
+            # This thread's connections are never reused; close them all.
+            connections.close_all()
+
+    threading.Thread(target=run, name='novus-card-pool-refill', daemon=True).start()
+
+
 # ── Orchestrator ───────────────────────────────────────────────────
 
 
-def _generate_qr_number() -> str:
-    """Generate a unique QR number (6-digit numeric string)."""
-    return str(uuid.uuid4().int)[:6]
+def has_live_credential(qr_request) -> bool:
+    """True if an earlier, unfinished approval already provisioned ``qr_request``."""
+    return bool(
+        qr_request.novus_credential_id
+        and qr_request.qr_number
+        and (
+            qr_request.credential_expires_at is None
+            or qr_request.credential_expires_at > django_timezone.now()
+        )
+    )
 
 
-def provision_qr_for_request(qr_request) -> None:
+def provision_qr_for_request(qr_request, allocate_qr_number: Callable[[], str]) -> None:
     """
     Execute the full NOVUS QR provisioning flow for an approved GuestQRRequest.
 
     Sequence:
         1. Authenticate with NOVUS
-        2. Create NOVUS guest user
-        3. Create QR card
+        2. Create NOVUS guest user (or reuse the known one for this guest)
+        3. Create QR card (or take one from the pre-provisioned pool)
         4. Create credential (link user + card)
         5. Persist all NOVUS IDs back into qr_request
 
@@ -158,56 +393,85 @@ def provision_qr_for_request(qr_request) -> None:
     (novus_user_id, novus_card_id, novus_credential_id, qr_number)
     and be saved to the database.
 
-    On failure, any NovusError propagates upward so the caller can roll
-    back the DB transaction.
-    """
-    base_url = getattr(settings, 'NOVUS_BASE_URL', None)
+    On failure, any NovusError propagates upward so the caller can
+    release its claim on the request.
 
-    if not base_url:
-        raise NovusResponseError('NOVUS_BASE_URL is not configured.')
+    The IDs are saved before the caller marks the request approved.  If
+    that step fails (or the worker dies) the request goes back to PENDING
+    with a live credential, which the next approval reuses as is.
 
-    client = NovusClient(base_url)
+    Runs outside of a DB transaction: no lock is held across the NOVUS
+    round trips, and QR number blocks are reserved in their own commits.
+    ``allocate_qr_number`` is called for every card created here.
+    """
+    if has_live_credential(qr_request):
+        logger.info(
+            'QR request %s already has NOVUS credential %s; reusing it.',
+            qr_request.pk, qr_request.novus_credential_id,
+        )
+        return
 
-    # Step 1: Auth
-    token = authenticate(client)
-    # Step 2: Create guest user
-    novus_user_id = create_guest_user(
-        client,
-        token,
-        first_name=qr_request.guest_name,
-        last_name=qr_request.guest_surname,
-        email=qr_request.guest_email,
-        remark=qr_request.remark or '',
-    )
+    client = get_client()
 
-    # Step 3: Create QR card
-    qr_number = _generate_qr_number()
-    novus_card_id, actual_qr_number = create_qr_card(
-        client,
-        token,
-        qr_number=qr_number,
-    )
+    # Step 1: Auth
+    with tracing.span('novus.authenticate'):
+        token = authenticate(client)
+
+    # Step 2: Create guest user (or reuse a returning guest's)
+    novus_user_id = resolve_guest_user(client, token, qr_request)
+
+    # Step 3: Take a pre-provisioned QR card, or create one
+    pooled = None
+    if settings.NOVUS_CARD_POOL_ENABLED:
+        with tracing.span('db.take_pooled_card'):
+            pooled = take_pooled_card()
+        if settings.NOVUS_CARD_POOL_AUTO_REFILL:
+            _refill_in_background(allocate_qr_number)
+
+    if pooled is not None:
+        novus_card_id, actual_qr_number = int(pooled.novus_card_id), pooled.qr_number
+    else:
+        with tracing.span('novus.create_qr_card'):
+            qr_number = allocate_qr_number()
+            novus_card_id, actual_qr_number = create_qr_card(
+                client,
+                token,
+                qr_number=qr_number,
+            )
 
     # Step 4: Create credential (link user + card)
-    novus_credential_id = create_credential(
-        client,
-        token,
-        novus_user_id=novus_user_id,
-        novus_card_id=novus_card_id,
-    )
+    expires_at = credential_expiry()
+    try:
+        with tracing.span('novus.create_credential'):
+            novus_credential_id = create_credential(
+                client,
+                token,
+                novus_user_id=novus_user_id,
+                novus_card_id=novus_card_id,
+                expiration_date=expires_at.isoformat(),
+            )
+    except Exception:
+        if pooled is not None:
+            release_pooled_card(pooled)
+        raise
+    if pooled is not None:
+        get_store().consume_card(pooled)
 
     # Step 5: Persist NOVUS IDs
-    qr_request.novus_user_id = str(novus_user_id)
-    qr_request.novus_card_id = str(novus_card_id)
-    qr_request.novus_credential_id = str(novus_credential_id)
-    qr_request.qr_number = str(actual_qr_number)
-    qr_request.save(update_fields=[
-        'novus_user_id',
-        'novus_card_id',
-        'novus_credential_id',
-        'qr_number',
-        'updated_at',
-    ])
+    with tracing.span('db.save_novus_ids'):
+        qr_request.novus_user_id = str(novus_user_id)
+        qr_request.novus_card_id = str(novus_card_id)
+        qr_request.novus_credential_id = str(novus_credential_id)
+        qr_request.qr_number = str(actual_qr_number)
+        qr_request.credential_expires_at = expires_at
+        qr_request.save(update_fields=[
+            'novus_user_id',
+            'novus_card_id',
+            'novus_credential_id',
+            'qr_number',
+            'credential_expires_at',
+            'updated_at',
+        ])
 
     logger.info(
         'NOVUS provisioning complete for QR request %s '
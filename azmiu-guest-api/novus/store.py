@@ -0,0 +1,68 @@
+"""
+Persistence the NOVUS workflow needs from the host app.
+
+The service layer reuses known guest identities and pre-provisioned QR
+cards, but their tables belong to the app.  ``NOVUS_PROVISIONING_STORE``
+names the ``ProvisioningStore`` implementation to use, so this package
+never imports app models.
+
+Identities expose ``novus_user_id``, ``created_at`` and ``verified_at``;
+pool entries expose ``novus_card_id`` and ``qr_number``.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ProvisioningStore(ABC):
+
+    # ── Guest identities ──────────────────────────────────────────
+
+    @abstractmethod
+    def find_identity(self, qr_request, match_phone: bool = False):
+        """The known identity for the request's guest, or None."""
+
+    @abstractmethod
+    def touch_identity(self, identity, verified: bool = False) -> None:
+        """Record that ``identity`` was reused (and re-checked in NOVUS)."""
+
+    @abstractmethod
+    def forget_identity(self, identity) -> None:
+        """Drop an identity NOVUS no longer knows."""
+
+    @abstractmethod
+    def remember_identity(self, qr_request, novus_user_id: int) -> None:
+        """Record the NOVUS user created for the request's guest."""
+
+    # ── Card pool ─────────────────────────────────────────────────
+
+    @abstractmethod
+    def take_card(self):
+        """Atomically claim the oldest available pooled card, or return None."""
+
+    @abstractmethod
+    def release_card(self, entry) -> None:
+        """Return a claimed card to the pool."""
+
+    @abstractmethod
+    def consume_card(self, entry) -> None:
+        """Remove a claimed card that is now linked to a credential."""
+
+    @abstractmethod
+    def add_card(self, novus_card_id: int, qr_number: str) -> None:
+        """Add a card created in NOVUS to the pool."""
+
+    @abstractmethod
+    def available_cards(self) -> int:
+        """Number of unclaimed cards."""
+
+    @abstractmethod
+    def release_stale_card_claims(self, older_than: timedelta, used_card_ids) -> int:
+        """Unclaim cards claimed before ``older_than`` unless their ID was used."""
+
+
+def get_store() -> ProvisioningStore:
+    return import_string(settings.NOVUS_PROVISIONING_STORE)()
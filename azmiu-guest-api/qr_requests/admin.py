@@ -1,6 +1,36 @@
-from django.contrib import admin
+import time
 
-from .models import GuestQRRequest
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.paginators import EstimatedCountPaginator
+
+from .models import (
+    ArchivedQRRequest,
+    GuestNotification,
+    GuestQRRequest,
+    IdempotencyKey,
+    ManagerQuota,
+    NovusCardPoolEntry,
+    NovusDiscrepancy,
+    NovusGuestIdentity,
+    NovusReconciliationRun,
+    QRNumberSequence,
+)
+from . import quotas
+from .serializers import ApproveSerializer, RejectSerializer
+
+
+class ReviewActionForm(ActionForm):
+    rejection_reason = forms.CharField(
+        required=False,
+        label='Rejection reason',
+        widget=forms.TextInput(attrs={'size': 40}),
+    )
 
 
 @admin.register(GuestQRRequest)
@@ -15,10 +45,19 @@ class GuestQRRequestAdmin(admin.ModelAdmin):
         'approved_by',
         'created_at',
     )
-    list_filter = ('status', 'created_at')
+    list_filter = ('status',)
+    list_select_related = ('manager', 'approved_by')
+    date_hierarchy = 'created_at'
     search_fields = ('guest_name', 'guest_surname', 'guest_email')
     readonly_fields = ('id', 'created_at', 'updated_at')
-    raw_id_fields = ('manager', 'approved_by')
+    raw_id_fields = ('manager', 'approved_by', 'claimed_by')
+
+    # Large-table changelist: estimated/bounded counts only.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    action_form = ReviewActionForm
+    actions = ('approve_selected', 'reject_selected')
 
     fieldsets = (
         ('Guest Information', {
@@ -28,15 +67,19 @@ class GuestQRRequestAdmin(admin.ModelAdmin):
             ),
         }),
         ('Status', {
-            'fields': ('status', 'rejection_reason'),
+            'fields': ('status', 'rejection_reason', 'priority'),
         }),
         ('Workflow', {
-            'fields': ('manager', 'approved_by', 'approved_at'),
+            'fields': (
+                'manager', 'approved_by', 'approved_at',
+                'claimed_by', 'claimed_until',
+            ),
         }),
         ('NOVUS Integration (Phase 2)', {
             'fields': (
                 'novus_user_id', 'novus_card_id',
                 'novus_credential_id', 'qr_number',
+                'credential_expires_at',
             ),
             'classes': ('collapse',),
         }),
@@ -44,3 +87,180 @@ class GuestQRRequestAdmin(admin.ModelAdmin):
             'fields': ('id', 'created_at', 'updated_at'),
         }),
     )
+
+    # ── Bulk review (same serializers, and NOVUS path, as the API) ──
+
+    def has_review_permission(self, request):
+        return request.user.is_superuser_role
+
+    @admin.action(description='Approve selected requests', permissions=['review'])
+    def approve_selected(self, request, queryset):
+        self._review(request, queryset, ApproveSerializer, {}, 'approved')
+
+    @admin.action(description='Reject selected requests', permissions=['review'])
+    def reject_selected(self, request, queryset):
+        reason = request.POST.get('rejection_reason', '').strip()
+        if not reason:
+            self.message_user(request, 'Enter a rejection reason.', messages.ERROR)
+            return
+        self._review(
+            request, queryset, RejectSerializer, {'rejection_reason': reason}, 'rejected',
+        )
+
+    def _review(self, request, queryset, serializer_class, data, verb):
+        limit = settings.ADMIN_BULK_ACTION_MAX
+        selected = list(queryset.select_related('manager').order_by('created_at')[:limit + 1])
+        if len(selected) > limit:
+            self.message_user(
+                request, f'Select at most {limit} requests at a time.', messages.ERROR,
+            )
+            return
+
+        # Each approval makes NOVUS round trips; stop starting new ones in
+        # time for the request to finish well within the worker timeout.
+        deadline = time.monotonic() + settings.ADMIN_BULK_ACTION_SECONDS
+        done, failed, skipped = 0, [], 0
+        for index, qr_request in enumerate(selected):
+            if time.monotonic() >= deadline:
+                skipped = len(selected) - index
+                break
+            serializer = serializer_class(
+                instance=qr_request, data=data, context={'request': request},
+            )
+            try:
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+            except serializers.ValidationError as exc:
+                failed.append(f'{qr_request}: {_first_error(exc.detail)}')
+            else:
+                done += 1
+
+        if done:
+            self.message_user(request, f'{done} request(s) {verb}.', messages.SUCCESS)
+        for error in failed:
+            self.message_user(request, error, messages.ERROR)
+        if skipped:
+            self.message_user(
+                request,
+                f'Stopped after {settings.ADMIN_BULK_ACTION_SECONDS:g}s; '
+                f'{skipped} request(s) were left pending. Run the action again for them.',
+                messages.WARNING,
+            )
+
+
+def _first_error(detail):
+    while isinstance(detail, (list, dict)):
+        if not detail:
+            return ''
+        detail = next(iter(detail.values())) if isinstance(detail, dict) else detail[0]
+    return str(detail)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'scope', 'user', 'state', 'response_status', 'expires_at')
+    list_filter = ('state',)
+    search_fields = ('key', 'scope')
+    raw_id_fields = ('user',)
+
+
+@admin.register(QRNumberSequence)
+class QRNumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'next_value')
+
+
+@admin.register(NovusGuestIdentity)
+class NovusGuestIdentityAdmin(admin.ModelAdmin):
+    list_display = ('email', 'phone', 'novus_user_id', 'verified_at', 'last_used_at')
+    search_fields = ('email', 'phone', 'novus_user_id')
+
+
+@admin.register(NovusCardPoolEntry)
+class NovusCardPoolEntryAdmin(admin.ModelAdmin):
+    list_display = ('novus_card_id', 'qr_number', 'created_at', 'claimed_at')
+    search_fields = ('novus_card_id', 'qr_number')
+
+
+@admin.register(NovusReconciliationRun)
+class NovusReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'started_at', 'finished_at', 'incremental',
+        'checked', 'discrepancies', 'errors',
+    )
+    list_filter = ('incremental',)
+
+
+@admin.register(NovusDiscrepancy)
+class NovusDiscrepancyAdmin(admin.ModelAdmin):
+    list_display = ('qr_request', 'kind', 'first_seen_at', 'last_seen_at', 'resolved_at')
+    list_filter = ('kind', ('resolved_at', admin.EmptyFieldListFilter))
+    raw_id_fields = ('qr_request',)
+    readonly_fields = ('first_seen_at',)
+
+
+@admin.register(ArchivedQRRequest)
+class ArchivedQRRequestAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'guest_name',
+        'guest_surname',
+        'guest_email',
+        'status',
+        'manager',
+        'created_at',
+        'archived_at',
+    )
+    list_filter = ('status', 'archived_at')
+    search_fields = ('guest_name', 'guest_surname', 'guest_email', 'qr_number')
+    raw_id_fields = ('manager', 'approved_by')
+
+    # Archived rows are a read-only record.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(GuestNotification)
+class GuestNotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        'qr_request', 'channel', 'recipient', 'status',
+        'attempts', 'next_attempt_at', 'sent_at',
+    )
+    list_filter = ('channel', 'status')
+    search_fields = ('recipient',)
+    raw_id_fields = ('qr_request',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ('retry_now',)
+
+    @admin.action(description='Retry selected notifications now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=GuestNotification.Status.SENT).update(
+            status=GuestNotification.Status.QUEUED,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f'{updated} notification(s) queued.')
+
+
+@admin.register(ManagerQuota)
+class ManagerQuotaAdmin(admin.ModelAdmin):
+    list_display = (
+        'manager', 'requests_per_day', 'max_open_pending', 'max_active_credentials',
+        'day', 'created_today', 'open_pending', 'active_credentials',
+    )
+    list_select_related = ('manager',)
+    search_fields = ('manager__username', 'manager__email')
+    raw_id_fields = ('manager',)
+    readonly_fields = (
+        'day', 'created_today', 'open_pending', 'active_credentials', 'recounted_at',
+    )
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.day = timezone.localdate()
+            obj.recounted_at = timezone.now()
+        super().save_model(request, obj, form, change)
+        if not change:
+            quotas.recount([obj.pk])
@@ -0,0 +1,117 @@
+"""
+Collision-free QR number allocation.
+
+Numbers come from a DB-backed sequence (``QRNumberSequence``).  Each
+worker process reserves a block of ``QR_NUMBER_BLOCK_SIZE`` values in one
+short transaction and then hands them out from memory, so concurrent
+approvals never pick the same number and the sequence row is touched
+once per block rather than once per card.
+
+A number is ``QR_NUMBER_LENGTH`` digits; with ``QR_NUMBER_CHECK_DIGIT``
+the last of them is a Luhn check digit.  Values already present in
+``GuestQRRequest.qr_number`` (e.g. legacy random numbers) are skipped
+using the unique index on that column.
+
+Call ``allocate_qr_number()`` outside of any long-running transaction:
+the block reservation must commit on its own.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import GuestQRRequest, QRNumberSequence
+
+
+class QRNumberExhausted(Exception):
+    """Every number of the configured length has been handed out."""
+
+
+def luhn_check_digit(digits: str) -> str:
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        value = int(char)
+        if index % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def _body_digits() -> int:
+    length = settings.QR_NUMBER_LENGTH
+    return length - 1 if settings.QR_NUMBER_CHECK_DIGIT else length
+
+
+def format_qr_number(value: int) -> str:
+    body = str(value).zfill(_body_digits())
+    if settings.QR_NUMBER_CHECK_DIGIT:
+        return body + luhn_check_digit(body)
+    return body
+
+
+class QRNumberAllocator:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = None
+        self._next = 0
+        self._end = 0
+
+    def allocate(self) -> str:
+        with self._lock:
+            while True:
+                sequence = self._sequence_name()
+                if sequence != self._sequence or self._next >= self._end:
+                    self._reserve_block(sequence)
+                value = self._next
+                self._next += 1
+                number = format_qr_number(value)
+                if not GuestQRRequest.objects.filter(qr_number=number).exists():
+                    return number
+
+    @staticmethod
+    def _sequence_name() -> str:
+        # A different length/check-digit setup is a different number space.
+        check = 'luhn' if settings.QR_NUMBER_CHECK_DIGIT else 'plain'
+        return f'qr_number:{settings.QR_NUMBER_LENGTH}:{check}'
+
+    def _reserve_block(self, sequence: str) -> None:
+        digits = _body_digits()
+        first = 10 ** (digits - 1)
+        limit = 10 ** digits
+
+        with transaction.atomic():
+            row, _ = QRNumberSequence.objects.select_for_update().get_or_create(
+                name=sequence,
+                defaults={'next_value': first},
+            )
+            start = max(row.next_value, first)
+            end = min(start + settings.QR_NUMBER_BLOCK_SIZE, limit)
+            if start >= end:
+                raise QRNumberExhausted(
+                    f'All {settings.QR_NUMBER_LENGTH}-digit QR numbers are in use; '
+                    f'increase QR_NUMBER_LENGTH.'
+                )
+            row.next_value = end
+            row.save(update_fields=['next_value'])
+
+        self._sequence = sequence
+        self._next = start
+        self._end = end
+
+
+_allocator = QRNumberAllocator()
+
+
+def reset() -> None:
+    """Forget the reserved block; a forked worker must not share its parent's."""
+    global _allocator
+    _allocator = QRNumberAllocator()
+
+
+def allocate_qr_number() -> str:
+    """Return a QR number no other request has or will be given."""
+    return _allocator.allocate()
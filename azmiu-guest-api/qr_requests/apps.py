@@ -5,3 +5,6 @@ class QrRequestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'qr_requests'
     verbose_name = 'QR Requests'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,56 @@
+"""
+Query-string filters shared by the list views and the export endpoint.
+
+Supported parameters:
+    status          one of GuestQRRequest.Status
+    created_after   ISO date/datetime, inclusive
+    created_before  ISO date/datetime, exclusive
+"""
+
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+
+from .models import GuestQRRequest
+
+
+def _parse_moment(name: str, value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise serializers.ValidationError(
+                {name: 'Expected an ISO 8601 date or datetime.'}
+            )
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def apply_request_filters(queryset, params):
+    """Narrow a GuestQRRequest queryset by the supported query parameters."""
+    status_value = params.get('status')
+    if status_value:
+        status_value = status_value.upper()
+        if status_value not in GuestQRRequest.Status.values:
+            raise serializers.ValidationError(
+                {'status': f'Must be one of: {", ".join(GuestQRRequest.Status.values)}.'}
+            )
+        queryset = queryset.filter(status=status_value)
+
+    created_after = params.get('created_after')
+    if created_after:
+        queryset = queryset.filter(
+            created_at__gte=_parse_moment('created_after', created_after),
+        )
+
+    created_before = params.get('created_before')
+    if created_before:
+        queryset = queryset.filter(
+            created_at__lt=_parse_moment('created_before', created_before),
+        )
+
+    return queryset
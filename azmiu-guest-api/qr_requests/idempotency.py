@@ -0,0 +1,131 @@
+"""
+``Idempotency-Key`` support for unsafe endpoints.
+
+Clients that may retry a POST (e.g. after a timeout) send a unique
+``Idempotency-Key`` header.  The first request with a given key runs
+normally and its response is stored; repeats within
+``IDEMPOTENCY_KEY_TTL`` replay the stored response instead of running
+the view again.  A key left IN_PROGRESS by a worker that died is taken
+over after ``IDEMPOTENCY_IN_PROGRESS_TIMEOUT``.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}:{body}'.encode()).hexdigest()
+
+
+def _claim(user, scope: str, key: str, fingerprint: str):
+    """
+    Insert an IN_PROGRESS row for the key.
+
+    Returns ``(record, created)``; an expired row for the same key is
+    replaced so the key can be reused after the TTL, and so is a stale
+    IN_PROGRESS row.
+    """
+    ttl = timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400))
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + ttl,
+                )
+            return record, True
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(
+                user=user, scope=scope, key=key,
+            ).first()
+            if existing is None:
+                continue
+            abandoned = (
+                existing.state == IdempotencyKey.State.IN_PROGRESS
+                and existing.created_at <= stale
+            )
+            if existing.expires_at <= now or abandoned:
+                # Conditional, so only one of several retries takes over.
+                IdempotencyKey.objects.filter(
+                    pk=existing.pk, state=existing.state, created_at=existing.created_at,
+                ).delete()
+                continue
+            return existing, False
+    raise IntegrityError(f'Could not claim idempotency key {key!r}.')
+
+
+def idempotent(view_method):
+    """
+    Decorator making an APIView handler idempotent when ``Idempotency-Key`` is sent.
+
+    Responses the handler returns are stored unless they are 5xx.  A 5xx,
+    or any exception the handler raises, releases the key so a retry runs
+    the handler again; that includes DRF's APIExceptions (validation
+    errors and other 4xx), which only become responses after this wrapper.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        scope = f'{request.resolver_match.view_name}:{request.path}'
+        fingerprint = _fingerprint(request)
+        record, created = _claim(request.user, scope, key, fingerprint)
+
+        if not created:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {'detail': f'{HEADER} was already used with a different request body.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record.state == IdempotencyKey.State.IN_PROGRESS:
+                return Response(
+                    {'detail': 'A request with this Idempotency-Key is still being processed.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            record.state = IdempotencyKey.State.COMPLETED
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['state', 'response_status', 'response_body'])
+        return response
+
+    return wrapper
@@ -0,0 +1,104 @@
+"""
+Streaming row readers for bulk guest import.
+
+Each reader yields ``(row_number, dict)`` one row at a time so an upload
+is never fully materialised in memory.  Column headers are matched
+case-insensitively against the guest fields of ``GuestQRRequest``.
+"""
+
+import codecs
+import csv
+
+IMPORT_FIELDS = (
+    'guest_name',
+    'guest_surname',
+    'guest_email',
+    'guest_phone',
+    'remark',
+)
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file cannot be read as a guest list."""
+
+
+def _normalise_header(header) -> str:
+    return str(header or '').strip().lower().replace(' ', '_')
+
+
+def _check_headers(headers: list[str]) -> None:
+    missing = {'guest_name', 'guest_surname', 'guest_email'} - set(headers)
+    if missing:
+        raise ImportFormatError(
+            f'Missing required column(s): {", ".join(sorted(missing))}.'
+        )
+
+
+def _project(headers: list[str], values) -> dict:
+    row = {}
+    for header, value in zip(headers, values):
+        if header in IMPORT_FIELDS:
+            row[header] = '' if value is None else str(value).strip()
+    return row
+
+
+def iter_csv_rows(upload):
+    """Yield rows from a CSV upload (UTF-8, optional BOM)."""
+    reader = csv.reader(codecs.iterdecode(upload, 'utf-8-sig'))
+    try:
+        headers = [_normalise_header(h) for h in next(reader)]
+    except StopIteration:
+        raise ImportFormatError('The uploaded file is empty.') from None
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError('CSV files must be UTF-8 encoded.') from exc
+    _check_headers(headers)
+
+    try:
+        for row_number, values in enumerate(reader, start=2):
+            if not any(v.strip() for v in values):
+                continue
+            yield row_number, _project(headers, values)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFormatError(f'Could not parse CSV: {exc}') from exc
+
+
+def iter_xlsx_rows(upload):
+    """Yield rows from the first sheet of an XLSX upload (needs openpyxl)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError(
+            'XLSX import requires the "openpyxl" package; upload CSV instead.'
+        ) from None
+
+    try:
+        # read_only mode streams rows instead of loading the whole sheet.
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFormatError(f'Could not open XLSX file: {exc}') from exc
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            headers = [_normalise_header(h) for h in next(rows)]
+        except StopIteration:
+            raise ImportFormatError('The uploaded file is empty.') from None
+        _check_headers(headers)
+
+        for row_number, values in enumerate(rows, start=2):
+            if not any(v not in (None, '') for v in values):
+                continue
+            yield row_number, _project(headers, values)
+    finally:
+        workbook.close()
+
+
+def iter_rows(upload):
+    """Pick a reader by file extension / content type."""
+    name = (upload.name or '').lower()
+    content_type = getattr(upload, 'content_type', '') or ''
+    if name.endswith('.xlsx') or 'spreadsheetml' in content_type:
+        return iter_xlsx_rows(upload)
+    if name.endswith('.csv') or content_type in ('text/csv', 'application/csv'):
+        return iter_csv_rows(upload)
+    raise ImportFormatError('Unsupported file type; upload a .csv or .xlsx file.')
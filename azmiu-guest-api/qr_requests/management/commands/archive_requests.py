@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from qr_requests.retention import archivable, archive_chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Move rejected requests and expired approvals past their retention '
+        'age into the archive table, in small committed chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows archived per transaction.')
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help='Seconds to pause between chunks.')
+        parser.add_argument('--max-rows', type=int, default=0,
+                            help='Stop after about this many rows (0 = no limit).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the rows that are due.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['dry_run']:
+            self.stdout.write(f'{archivable(now).count()} requests are due for archiving.')
+            return
+
+        total = 0
+        while not options['max_rows'] or total < options['max_rows']:
+            moved = archive_chunk(options['batch_size'], now)
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'{total} archived')
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} requests.'))
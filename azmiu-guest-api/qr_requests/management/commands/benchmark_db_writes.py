@@ -0,0 +1,172 @@
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from core.database import sqlite_init_command, sqlite_pragmas
+from qr_requests.models import GuestQRRequest
+
+SCHEMA = """
+CREATE TABLE request (
+    id TEXT PRIMARY KEY,
+    guest_email TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX request_status ON request (status);
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare write throughput of database profiles with concurrent '
+        'create + approve style transactions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--transactions', type=int, default=200,
+                            help='Transactions per worker.')
+        parser.add_argument(
+            '--include-configured', action='store_true',
+            help='Also benchmark the configured default database through '
+                 'the ORM (rows are created under a temporary user and '
+                 'removed afterwards).',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        per_worker = options['transactions']
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            results.append(self._bench_sqlite(
+                'sqlite-default', Path(tmp) / 'default.db',
+                pragmas={}, immediate=False, workers=workers, per_worker=per_worker,
+            ))
+            results.append(self._bench_sqlite(
+                'sqlite-tuned', Path(tmp) / 'tuned.db',
+                pragmas=sqlite_pragmas(), immediate=True, workers=workers, per_worker=per_worker,
+            ))
+        if options['include_configured']:
+            results.append(self._bench_configured(workers, per_worker))
+
+        self.stdout.write(
+            f'{"profile":<22}{"tx/s":>10}{"ok":>8}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}'
+        )
+        for name, elapsed, latencies, errors in results:
+            ok = len(latencies)
+            p50 = statistics.median(latencies) * 1000 if latencies else 0
+            p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if ok >= 20 else 0
+            self.stdout.write(
+                f'{name:<22}{ok / elapsed:>10.1f}{ok:>8}{errors:>8}{p50:>10.2f}{p95:>10.2f}'
+            )
+
+    # ── runners ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _run_threads(workers, target):
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+
+        def record(elapsed=None):
+            with lock:
+                if elapsed is None:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+
+        threads = [threading.Thread(target=target, args=(record,)) for _ in range(workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, latencies, errors[0]
+
+    def _bench_sqlite(self, name, path, *, pragmas, immediate, workers, per_worker):
+        setup = sqlite3.connect(path)
+        setup.executescript(SCHEMA)
+        setup.close()
+
+        def worker(record):
+            conn = sqlite3.connect(
+                path,
+                timeout=int(pragmas.get('busy_timeout', 5000)) / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            if pragmas:
+                conn.executescript(sqlite_init_command(pragmas))
+            for _ in range(per_worker):
+                start = time.perf_counter()
+                try:
+                    request_id = uuid.uuid4().hex
+                    conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+                    conn.execute(
+                        'INSERT INTO request VALUES (?, ?, ?, ?)',
+                        (request_id, 'guest@example.com', 'PENDING', time.time()),
+                    )
+                    conn.execute('SELECT COUNT(*) FROM request WHERE status = ?', ('PENDING',))
+                    conn.execute(
+                        'UPDATE request SET status = ?, updated_at = ? WHERE id = ? AND status = ?',
+                        ('APPROVED', time.time(), request_id, 'PENDING'),
+                    )
+                    conn.execute('COMMIT')
+                    record(time.perf_counter() - start)
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    record()
+            conn.close()
+
+        elapsed, latencies, errors = self._run_threads(workers, worker)
+        return name, elapsed, latencies, errors
+
+    def _bench_configured(self, workers, per_worker):
+        User = get_user_model()
+        manager = User.objects.create(
+            username=f'__bench_{uuid.uuid4().hex[:8]}',
+            role=User.Role.MANAGER,
+            is_active=False,
+        )
+
+        def worker(record):
+            try:
+                for _ in range(per_worker):
+                    start = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            obj = GuestQRRequest.objects.create(
+                                manager=manager,
+                                guest_name='Bench',
+                                guest_surname='Guest',
+                                guest_email='guest@example.com',
+                            )
+                            GuestQRRequest.objects.filter(
+                                pk=obj.pk, status=GuestQRRequest.Status.PENDING,
+                            ).update(
+                                status=GuestQRRequest.Status.APPROVED,
+                                updated_at=timezone.now(),
+                            )
+                        record(time.perf_counter() - start)
+                    except Exception:
+                        record()
+            finally:
+                close_old_connections()
+                connection.close()
+
+        try:
+            elapsed, latencies, errors = self._run_threads(workers, worker)
+        finally:
+            manager.delete()
+        vendor = connection.vendor
+        return f'configured-{vendor}', elapsed, latencies, errors
@@ -0,0 +1,109 @@
+import gzip
+import io
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from core.middleware import brotli
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from qr_requests.models import GuestQRRequest
+from qr_requests.serializers import GuestQRRequestListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure CPU time and bytes per list page for the stdlib and orjson '
+        'JSON renderers/parsers and for gzip/brotli compression. Uses '
+        'in-memory objects; the database is not touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='20,100,500',
+                            help='Comma-separated page sizes.')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; fast = stdlib.'))
+        sizes = [int(size) for size in options['page_sizes'].split(',')]
+        repeat = options['repeat']
+
+        self.stdout.write(f'{"page":>6} {"step":<18}{"ms/page":>10}{"bytes":>10}')
+        for size in sizes:
+            data = self._page(size)
+            rows = []
+
+            body = None
+            for name, renderer in (('render stdlib', JSONRenderer()),
+                                   ('render orjson', FastJSONRenderer())):
+                elapsed, body = self._time(repeat, lambda r=renderer: r.render(data))
+                rows.append((name, elapsed, len(body)))
+
+            for name, parser in (('parse stdlib', JSONParser()),
+                                 ('parse orjson', FastJSONParser())):
+                elapsed, _ = self._time(repeat, lambda p=parser: p.parse(io.BytesIO(body)))
+                rows.append((name, elapsed, len(body)))
+
+            level = settings.COMPRESSION_GZIP_LEVEL
+            elapsed, packed = self._time(
+                repeat, lambda: gzip.compress(body, compresslevel=level, mtime=0),
+            )
+            rows.append((f'gzip -{level}', elapsed, len(packed)))
+            if brotli is not None:
+                quality = settings.COMPRESSION_BROTLI_QUALITY
+                elapsed, packed = self._time(
+                    repeat, lambda: brotli.compress(body, quality=quality),
+                )
+                rows.append((f'brotli q{quality}', elapsed, len(packed)))
+
+            for name, elapsed, length in rows:
+                self.stdout.write(f'{size:>6} {name:<18}{elapsed * 1000:>10.3f}{length:>10}')
+
+    @staticmethod
+    def _time(repeat, fn):
+        result = fn()
+        start = time.process_time()
+        for _ in range(repeat):
+            fn()
+        return (time.process_time() - start) / repeat, result
+
+    @staticmethod
+    def _page(size):
+        now = timezone.now()
+        manager = User(id=uuid.uuid4(), username='manager', email='m@example.com',
+                       role=User.Role.MANAGER)
+        reviewer = User(id=uuid.uuid4(), username='reviewer', email='r@example.com',
+                        role=User.Role.SUPERUSER)
+        requests = [
+            GuestQRRequest(
+                id=uuid.uuid4(),
+                manager=manager,
+                approved_by=reviewer,
+                guest_name='Guest',
+                guest_surname=f'Number {i}',
+                guest_email=f'guest{i}@example.com',
+                guest_phone='+994501234567',
+                remark='Visiting the Baku office',
+                status=GuestQRRequest.Status.APPROVED,
+                approved_at=now,
+                novus_user_id=str(10000 + i),
+                novus_card_id=str(20000 + i),
+                novus_credential_id=str(30000 + i),
+                qr_number=str(100000 + i),
+                credential_expires_at=now + timedelta(days=365),
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(size)
+        ]
+        results = GuestQRRequestListSerializer(requests, many=True).data
+        return {'count': size * 10, 'next': 'http://testserver/api/qr-requests/all/?page=2',
+                'previous': None, 'results': results}
@@ -0,0 +1,101 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: what a worker does before its first request.
+_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+done = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (setup_done - started) * 1000,
+    'urls_ms': (done - setup_done) * 1000,
+    'loaded': [name for name in sys.argv[1:] if name in sys.modules],
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold worker startup (django.setup() and URLconf import) in '
+        'fresh interpreters. Fails when the median exceeds STARTUP_BUDGET_MS '
+        'or when a module in STARTUP_LAZY_MODULES was imported at startup.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help='Override STARTUP_BUDGET_MS.')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                            help='Also list the N slowest imports (python -X importtime).')
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms'] or settings.STARTUP_BUDGET_MS
+        lazy = list(settings.STARTUP_LAZY_MODULES)
+
+        runs = [self._probe(lazy) for _ in range(options['runs'])]
+        setup = statistics.median(run['setup_ms'] for run in runs)
+        urls = statistics.median(run['urls_ms'] for run in runs)
+        process = statistics.median(run['process_ms'] for run in runs)
+        total = setup + urls
+        loaded = sorted({name for run in runs for name in run['loaded']})
+
+        self.stdout.write(f'django.setup()   {setup:8.1f} ms')
+        self.stdout.write(f'URLconf + views  {urls:8.1f} ms')
+        self.stdout.write(f'startup          {total:8.1f} ms  (budget {budget:.0f} ms)')
+        self.stdout.write(f'whole process    {process:8.1f} ms')
+        if options['importtime']:
+            self._importtime(options['importtime'])
+
+        problems = []
+        if total > budget:
+            problems.append(f'startup took {total:.0f} ms, budget is {budget:.0f} ms')
+        if loaded:
+            problems.append(f'imported at startup but meant to be lazy: {", ".join(loaded)}')
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('Startup is within budget.'))
+
+    def _probe(self, lazy):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', _PROBE, *lazy],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=self._env(),
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.returncode:
+            raise CommandError(f'Startup probe failed:\n{result.stderr}')
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run['process_ms'] = elapsed
+        return run
+
+    def _importtime(self, top):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _PROBE],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=self._env(),
+        )
+        rows = []
+        for line in result.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[1].strip().isdigit():
+                rows.append((int(parts[1]), parts[2].strip()))
+        self.stdout.write('Slowest imports (cumulative):')
+        for cumulative, name in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+    @staticmethod
+    def _env():
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')
+        return env
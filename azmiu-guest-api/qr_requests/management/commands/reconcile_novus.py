@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from novus.auth import SharedToken
+from novus.exceptions import NovusError
+from novus.reconciliation import Reconciler
+from novus.services import get_client
+from qr_requests.models import GuestQRRequest, NovusDiscrepancy, NovusReconciliationRun
+from qr_requests.reconciliation import record_findings
+
+
+class Command(BaseCommand):
+    help = (
+        'Verify the NOVUS users, cards and credentials of approved requests '
+        'against NOVUS and record discrepancies. By default only requests '
+        'changed since the last finished run are checked; use --full for a '
+        'complete pass (NOVUS-side changes are only caught by full runs).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Check every approved request.')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Concurrent NOVUS calls.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Requests fetched and recorded per batch.')
+
+    def handle(self, *args, **options):
+        previous = (
+            NovusReconciliationRun.objects
+            .filter(finished_at__isnull=False)
+            .order_by('-started_at')
+            .first()
+        )
+        since = None if options['full'] or previous is None else previous.started_at
+
+        run = NovusReconciliationRun.objects.create(
+            started_at=timezone.now(), incremental=since is not None,
+        )
+        requests = GuestQRRequest.objects.filter(
+            status=GuestQRRequest.Status.APPROVED,
+            novus_credential_id__isnull=False,
+        )
+        if since is not None:
+            # Open discrepancies are re-checked too, so fixes get resolved.
+            open_ids = NovusDiscrepancy.objects.filter(
+                resolved_at__isnull=True,
+            ).values('qr_request_id')
+            requests = requests.filter(Q(updated_at__gte=since) | Q(pk__in=open_ids))
+            self.stdout.write(f'Checking requests changed since {since:%Y-%m-%d %H:%M}.')
+
+        reconciler = Reconciler(SharedToken(get_client()))
+        started = time.monotonic()
+        last_pk = None
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = requests.order_by('pk')
+                if last_pk is not None:
+                    batch = batch.filter(pk__gt=last_pk)
+                batch = list(batch.only(
+                    'pk', 'novus_user_id', 'novus_card_id', 'novus_credential_id',
+                    'qr_number', 'credential_expires_at',
+                )[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+
+                results, errors = {}, 0
+                for qr_request, findings in zip(batch, pool.map(self._check(reconciler), batch)):
+                    if findings is None:
+                        errors += 1
+                    else:
+                        results[qr_request] = findings
+                found = record_findings(results)
+
+                NovusReconciliationRun.objects.filter(pk=run.pk).update(
+                    checked=F('checked') + len(results),
+                    discrepancies=F('discrepancies') + found,
+                    errors=F('errors') + errors,
+                )
+                run.refresh_from_db()
+                self.stdout.write(
+                    f'{run.checked} checked, {run.discrepancies} discrepancies, '
+                    f'{run.errors} errors ({time.monotonic() - started:.0f}s)'
+                )
+
+        run.finished_at = timezone.now()
+        run.save(update_fields=['finished_at'])
+        style = self.style.SUCCESS if not run.discrepancies else self.style.WARNING
+        self.stdout.write(style(
+            f'Checked {run.checked} requests: {run.discrepancies} discrepancies, '
+            f'{run.errors} could not be checked.'
+        ))
+
+    def _check(self, reconciler):
+        def check(qr_request):
+            try:
+                return reconciler.check_request(qr_request)
+            except (NovusError, ValueError, TypeError) as exc:
+                self.stderr.write(f'{qr_request.pk}: {exc}')
+                return None
+        return check
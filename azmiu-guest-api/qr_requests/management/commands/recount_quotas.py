@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from qr_requests import quotas
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute every manager\'s quota counters from the requests table. '
+        'Counters are also recounted on each manager\'s first use of the day; '
+        'run this after bulk changes made outside the API.'
+    )
+
+    def handle(self, *args, **options):
+        count = quotas.recount()
+        self.stdout.write(self.style.SUCCESS(f'Recounted quotas of {count} managers.'))
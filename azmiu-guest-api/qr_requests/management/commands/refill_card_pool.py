@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from novus.exceptions import NovusError
+from novus.services import card_pool_available, refill_card_pool, release_stale_card_claims
+from qr_requests.allocator import allocate_qr_number
+from qr_requests.models import GuestQRRequest
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep the pre-provisioned NOVUS QR card pool between its low and '
+        'high watermarks. Run once (e.g. from cron) or with --loop.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running.')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Seconds between checks with --loop.')
+        parser.add_argument('--stale-claim-minutes', type=int, default=15,
+                            help='Release claims older than this back to the pool.')
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_stale_card_claims(
+                timedelta(minutes=options['stale_claim_minutes']),
+                GuestQRRequest.objects.filter(
+                    novus_card_id__isnull=False,
+                ).values('novus_card_id'),
+            )
+            try:
+                created = refill_card_pool(allocate_qr_number)
+            except NovusError as exc:
+                self.stderr.write(self.style.ERROR(f'Refill failed: {exc}'))
+                created = 0
+            self.stdout.write(
+                f'Card pool: {card_pool_available()} available '
+                f'(+{created} created, {released} stale claims released).'
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from qr_requests.queue import release_stale_approvals
+
+
+class Command(BaseCommand):
+    help = (
+        'Return requests left APPROVING by a worker that died to PENDING, '
+        'so they can be approved again. Run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=None,
+                            help='Seconds a request must have been APPROVING '
+                                 '(default: APPROVAL_CLAIM_TIMEOUT).')
+
+    def handle(self, *args, **options):
+        older_than = options['older_than']
+        released = release_stale_approvals(
+            timedelta(seconds=older_than) if older_than else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Released {released} stale approvals.'))
@@ -0,0 +1,157 @@
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from novus.auth import SharedToken
+from novus.exceptions import NovusError
+from novus.services import credential_expiry, get_client, renew_credential
+from qr_requests.models import GuestQRRequest
+
+
+class Command(BaseCommand):
+    help = (
+        'Renew NOVUS credentials of approved requests that expire within '
+        'the given number of days. Credentials are renewed concurrently in '
+        'batches; with --checkpoint an interrupted run resumes where it '
+        'stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Renew credentials expiring within this many days.')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Concurrent NOVUS calls.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows fetched and saved per batch.')
+        parser.add_argument('--spread-days', type=int, default=0,
+                            help='Add 0..N random days to each new expiry so '
+                                 'renewed credentials do not expire together again.')
+        parser.add_argument('--checkpoint', metavar='PATH',
+                            help='JSON file recording progress after every batch.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the credentials that would be renewed.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        state = self._load_checkpoint(options['checkpoint'])
+        cutoff = datetime.fromisoformat(state['cutoff'])
+
+        due = GuestQRRequest.objects.filter(
+            status=GuestQRRequest.Status.APPROVED,
+            novus_credential_id__isnull=False,
+            credential_expires_at__lte=cutoff,
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{due.count()} credentials expire before {cutoff:%Y-%m-%d %H:%M}.')
+            return
+
+        self.token = SharedToken(get_client())
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = self._next_batch(due, state['cursor'])
+                if not batch:
+                    break
+                last = batch[-1]
+                cursor = [last.credential_expires_at.isoformat(), str(last.pk)]
+                results = list(pool.map(self._renew, batch))
+                self._save_batch(results, state)
+                state['cursor'] = cursor
+                self._write_checkpoint(options['checkpoint'], state)
+                self.stdout.write(
+                    f'{state["renewed"]} renewed, {state["failed"]} failed '
+                    f'({time.monotonic() - started:.0f}s)'
+                )
+
+        state['done'] = True
+        self._write_checkpoint(options['checkpoint'], state)
+        style = self.style.SUCCESS if not state['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f'Renewed {state["renewed"]} credentials; {state["failed"]} failed.'
+        ))
+
+    # ── batches ────────────────────────────────────────────────────
+
+    def _next_batch(self, due, cursor):
+        queryset = due
+        if cursor:
+            expires_at, pk = datetime.fromisoformat(cursor[0]), cursor[1]
+            # Keyset pagination: failed rows stay due but are not retried
+            # within the same run.
+            queryset = queryset.filter(
+                Q(credential_expires_at__gt=expires_at)
+                | Q(credential_expires_at=expires_at, pk__gt=pk)
+            )
+        return list(
+            queryset
+            .order_by('credential_expires_at', 'pk')
+            .only('pk', 'novus_user_id', 'novus_card_id',
+                  'novus_credential_id', 'credential_expires_at')
+            [:self.options['batch_size']]
+        )
+
+    def _renew(self, qr_request):
+        spread = self.options['spread_days']
+        expires_at = credential_expiry(
+            timedelta(seconds=random.uniform(0, spread * 86400)) if spread else timedelta(0)
+        )
+        try:
+            self.token.call(lambda token: renew_credential(
+                self.token.client,
+                token,
+                novus_credential_id=int(qr_request.novus_credential_id),
+                novus_user_id=int(qr_request.novus_user_id),
+                novus_card_id=int(qr_request.novus_card_id),
+                expiration_date=expires_at.isoformat(),
+            ))
+        except (NovusError, ValueError, TypeError) as exc:
+            return qr_request, None, exc
+        return qr_request, expires_at, None
+
+    def _save_batch(self, results, state):
+        now = timezone.now()
+        renewed = []
+        for qr_request, expires_at, error in results:
+            if error is not None:
+                state['failed'] += 1
+                self.stderr.write(f'{qr_request.pk}: {error}')
+                continue
+            qr_request.credential_expires_at = expires_at
+            qr_request.updated_at = now
+            renewed.append(qr_request)
+        GuestQRRequest.objects.bulk_update(
+            renewed, ['credential_expires_at', 'updated_at'],
+        )
+        state['renewed'] += len(renewed)
+
+    # ── checkpoint ─────────────────────────────────────────────────
+
+    def _load_checkpoint(self, path):
+        if path and os.path.exists(path):
+            with open(path) as fh:
+                try:
+                    state = json.load(fh)
+                except ValueError as exc:
+                    raise CommandError(f'Unreadable checkpoint {path}: {exc}') from exc
+            if not state.get('done'):
+                self.stdout.write(f'Resuming from checkpoint {path}.')
+                return state
+        cutoff = timezone.now() + timedelta(days=self.options['days'])
+        return {'cutoff': cutoff.isoformat(), 'cursor': None, 'renewed': 0, 'failed': 0}
+
+    @staticmethod
+    def _write_checkpoint(path, state):
+        if not path:
+            return
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(state, fh)
+        os.replace(tmp, path)
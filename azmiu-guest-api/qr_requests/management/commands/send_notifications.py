@@ -0,0 +1,38 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from qr_requests.notifications import deliver_due
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued guest notifications (QR code email / SMS) in batches, '
+        'retrying failures with backoff. Runs once, or with --loop as a '
+        'dedicated worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages per batch (default NOTIFY_BATCH_SIZE).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for due messages.')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between polls with --loop '
+                                 '(default NOTIFY_POLL_SECONDS).')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.NOTIFY_POLL_SECONDS
+        while True:
+            totals = Counter()
+            while outcome := deliver_due(options['batch_size']):
+                totals += outcome
+            if totals:
+                self.stdout.write(', '.join(
+                    f'{count} {status.lower()}' for status, count in sorted(totals.items())
+                ))
+            if not options['loop']:
+                break
+            time.sleep(interval)
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0002_idempotency_and_approving_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QRNumberSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'qr_requests_qrnumbersequence',
+            },
+        ),
+        migrations.AlterField(
+            model_name='guestqrrequest',
+            name='qr_number',
+            field=models.CharField(blank=True, default=None, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0003_qr_number_allocator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NovusGuestIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(max_length=254, unique=True)),
+                ('phone', models.CharField(blank=True, db_index=True, default='', max_length=20)),
+                ('novus_user_id', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'NOVUS guest identity',
+                'verbose_name_plural': 'NOVUS guest identities',
+                'db_table': 'qr_requests_novusguestidentity',
+            },
+        ),
+    ]
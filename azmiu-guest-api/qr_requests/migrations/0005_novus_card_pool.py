@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0004_novus_guest_identity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NovusCardPoolEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('novus_card_id', models.CharField(max_length=100, unique=True)),
+                ('qr_number', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'NOVUS card pool entry',
+                'verbose_name_plural': 'NOVUS card pool',
+                'db_table': 'qr_requests_novuscardpoolentry',
+                'indexes': [models.Index(fields=['claimed_at', 'created_at'], name='card_pool_available_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:28
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_expiry(apps, schema_editor):
+    # Credentials created so far were valid for 365 days from approval.
+    GuestQRRequest = apps.get_model('qr_requests', 'GuestQRRequest')
+    GuestQRRequest.objects.filter(
+        novus_credential_id__isnull=False,
+        approved_at__isnull=False,
+        credential_expires_at__isnull=True,
+    ).update(credential_expires_at=F('approved_at') + timedelta(days=365))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0005_novus_card_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guestqrrequest',
+            name='credential_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, null=True),
+        ),
+        migrations.RunPython(backfill_expiry, migrations.RunPython.noop),
+    ]
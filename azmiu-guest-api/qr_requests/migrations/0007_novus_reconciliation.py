@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:30
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0006_credential_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NovusReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('incremental', models.BooleanField(default=False)),
+                ('checked', models.PositiveIntegerField(default=0)),
+                ('discrepancies', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'NOVUS reconciliation run',
+                'db_table': 'qr_requests_novusreconciliationrun',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NovusDiscrepancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('USER_MISSING', 'User missing in NOVUS'), ('CARD_MISSING', 'Card missing in NOVUS'), ('CARD_NUMBER', 'Card number differs'), ('CREDENTIAL_MISSING', 'Credential missing in NOVUS'), ('CREDENTIAL_LINK', 'Credential linked to another user or card'), ('CREDENTIAL_EXPIRY', 'Credential expiry differs')], max_length=20)),
+                ('detail', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField()),
+                ('resolved_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('qr_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='novus_discrepancies', to='qr_requests.guestqrrequest')),
+            ],
+            options={
+                'verbose_name': 'NOVUS discrepancy',
+                'verbose_name_plural': 'NOVUS discrepancies',
+                'db_table': 'qr_requests_novusdiscrepancy',
+                'ordering': ['-last_seen_at'],
+                'constraints': [models.UniqueConstraint(fields=('qr_request', 'kind'), name='uniq_discrepancy_per_request_kind')],
+            },
+        ),
+    ]
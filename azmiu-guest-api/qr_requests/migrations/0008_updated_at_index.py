@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0007_novus_reconciliation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guestqrrequest',
+            index=models.Index(fields=['updated_at'], name='qr_request_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0008_updated_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedQRRequest',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('guest_name', models.CharField(max_length=150)),
+                ('guest_surname', models.CharField(max_length=150)),
+                ('guest_email', models.EmailField(max_length=254)),
+                ('guest_phone', models.CharField(blank=True, default='', max_length=20)),
+                ('remark', models.TextField(blank=True, default='')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVING', 'Approving'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=10)),
+                ('rejection_reason', models.TextField(blank=True, default='')),
+                ('approved_at', models.DateTimeField(blank=True, null=True)),
+                ('novus_user_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('novus_card_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('novus_credential_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('qr_number', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('credential_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('approved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_archived_qr_requests', to=settings.AUTH_USER_MODEL)),
+                ('manager', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_qr_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived QR Request',
+                'verbose_name_plural': 'Archived QR Requests',
+                'db_table': 'qr_requests_archivedqrrequest',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0011_guest_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guestqrrequest',
+            index=models.Index(fields=['-created_at'], name='qr_request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guestqrrequest',
+            index=models.Index(fields=['status', '-created_at'], name='qr_request_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('qr_requests', '0012_request_created_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManagerQuota',
+            fields=[
+                ('manager', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quota', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('requests_per_day', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_open_pending', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_active_credentials', models.PositiveIntegerField(blank=True, null=True)),
+                ('day', models.DateField()),
+                ('created_today', models.IntegerField(default=0)),
+                ('open_pending', models.IntegerField(default=0)),
+                ('active_credentials', models.IntegerField(default=0)),
+                ('recounted_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'qr_requests_managerquota',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_requests', '0013_manager_quotas'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='guestqrrequest',
+            options={'ordering': ['-created_at'], 'permissions': [('verify_qr', 'Can verify scanned QR codes')], 'verbose_name': 'Guest QR Request', 'verbose_name_plural': 'Guest QR Requests'},
+        ),
+    ]
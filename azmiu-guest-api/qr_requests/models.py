@@ -1,6 +1,7 @@
 import uuid
 
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -8,6 +9,7 @@ class GuestQRRequest(models.Model):
 
     class Status(models.TextChoices):
         PENDING = 'PENDING', 'Pending'
+        APPROVING = 'APPROVING', 'Approving'
         APPROVED = 'APPROVED', 'Approved'
         REJECTED = 'REJECTED', 'Rejected'
 
@@ -59,8 +61,23 @@ class GuestQRRequest(models.Model):
         max_length=100, null=True, blank=True, default=None,
     )
     qr_number = models.CharField(
-        max_length=100, null=True, blank=True, default=None,
+        max_length=100, null=True, blank=True, default=None, unique=True,
+    )
+    credential_expires_at = models.DateTimeField(
+        null=True, blank=True, default=None, db_index=True,
+    )
+
+    # Review queue: higher priority is reviewed first; a reviewer's claim
+    # on a pending request lasts until claimed_until (see queue.py).
+    priority = models.SmallIntegerField(default=0)
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claimed_qr_requests',
     )
+    claimed_until = models.DateTimeField(null=True, blank=True)
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -71,6 +88,22 @@ class GuestQRRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Guest QR Request'
         verbose_name_plural = 'Guest QR Requests'
+        indexes = [
+            # Delta syncs of the verification index and incremental
+            # reconciliation runs filter on updated_at.
+            models.Index(fields=['updated_at'], name='qr_request_updated_idx'),
+            models.Index(
+                fields=['status', '-priority', 'created_at'],
+                name='qr_request_review_queue_idx',
+            ),
+            # Default ordering, admin date hierarchy and status filter.
+            models.Index(fields=['-created_at'], name='qr_request_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='qr_request_status_created_idx'),
+        ]
+        permissions = [
+            # Gate scanners: read the active QR numbers (see QRVerify* views).
+            ('verify_qr', 'Can verify scanned QR codes'),
+        ]
 
     def __str__(self):
         return f'QR Request for {self.guest_name} {self.guest_surname} ({self.status})'
@@ -78,3 +111,325 @@ class GuestQRRequest(models.Model):
     @property
     def is_pending(self):
         return self.status == self.Status.PENDING
+
+
+class ArchivedQRRequest(models.Model):
+    """
+    A GuestQRRequest moved out of the hot table by ``archive_requests``.
+
+    Same columns (values copied verbatim, no auto timestamps or unique
+    constraints) plus ``archived_at``.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    manager = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_qr_requests',
+    )
+    guest_name = models.CharField(max_length=150)
+    guest_surname = models.CharField(max_length=150)
+    guest_email = models.EmailField()
+    guest_phone = models.CharField(max_length=20, blank=True, default='')
+    remark = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=10, choices=GuestQRRequest.Status.choices)
+    rejection_reason = models.TextField(blank=True, default='')
+    approved_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reviewed_archived_qr_requests',
+    )
+    approved_at = models.DateTimeField(null=True, blank=True)
+    novus_user_id = models.CharField(max_length=100, null=True, blank=True)
+    novus_card_id = models.CharField(max_length=100, null=True, blank=True)
+    novus_credential_id = models.CharField(max_length=100, null=True, blank=True)
+    qr_number = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    credential_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'qr_requests_archivedqrrequest'
+        ordering = ['-created_at']
+        verbose_name = 'Archived QR Request'
+        verbose_name_plural = 'Archived QR Requests'
+
+    def __str__(self):
+        return f'Archived QR Request for {self.guest_name} {self.guest_surname} ({self.status})'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a request sent with an ``Idempotency-Key`` header.
+
+    A row is inserted (IN_PROGRESS) before the view runs; the unique
+    constraint makes concurrent duplicates fail fast.  Once the view
+    finishes, its response is stored so retries replay it until
+    ``expires_at``.
+    """
+
+    class State(models.TextChoices):
+        IN_PROGRESS = 'IN_PROGRESS', 'In progress'
+        COMPLETED = 'COMPLETED', 'Completed'
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+    )
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(
+        max_length=11,
+        choices=State.choices,
+        default=State.IN_PROGRESS,
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'qr_requests_idempotencykey'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'scope', 'key'],
+                name='uniq_idempotency_key_per_user_scope',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} [{self.key}] ({self.state})'
+
+
+class QRNumberSequence(models.Model):
+    """
+    Next unallocated value of a QR number space.
+
+    Workers reserve blocks of values from this row (see
+    ``qr_requests.allocator``) instead of picking random numbers.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'qr_requests_qrnumbersequence'
+
+    def __str__(self):
+        return f'{self.name}: {self.next_value}'
+
+
+class NovusGuestIdentity(models.Model):
+    """
+    Local index of guests already created in NOVUS.
+
+    Maps a normalised guest email (and, optionally, phone) to the NOVUS
+    user ID so returning guests skip the create-user round trip.
+    """
+
+    email = models.CharField(max_length=254, unique=True)
+    phone = models.CharField(max_length=20, blank=True, default='', db_index=True)
+    novus_user_id = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'qr_requests_novusguestidentity'
+        verbose_name = 'NOVUS guest identity'
+        verbose_name_plural = 'NOVUS guest identities'
+
+    def __str__(self):
+        return f'{self.email} → {self.novus_user_id}'
+
+    @staticmethod
+    def normalise_email(email: str) -> str:
+        return (email or '').strip().lower()
+
+    @staticmethod
+    def normalise_phone(phone: str) -> str:
+        phone = (phone or '').strip()
+        digits = ''.join(ch for ch in phone if ch.isdigit())
+        return f'+{digits}' if phone.startswith('+') and digits else digits
+
+
+class NovusCardPoolEntry(models.Model):
+    """
+    A NOVUS QR card created ahead of time, waiting to be linked to a guest.
+
+    ``claimed_at`` is set when an approval takes the card and the row is
+    deleted once the credential exists; a failed approval releases it.
+    """
+
+    novus_card_id = models.CharField(max_length=100, unique=True)
+    qr_number = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'qr_requests_novuscardpoolentry'
+        verbose_name = 'NOVUS card pool entry'
+        verbose_name_plural = 'NOVUS card pool'
+        indexes = [
+            models.Index(
+                fields=['claimed_at', 'created_at'],
+                name='card_pool_available_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Card {self.novus_card_id} ({self.qr_number})'
+
+
+class NovusReconciliationRun(models.Model):
+    """
+    One pass of ``manage.py reconcile_novus``.
+
+    Incremental runs only check requests updated since the ``started_at``
+    of the last finished run.
+    """
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    incremental = models.BooleanField(default=False)
+    checked = models.PositiveIntegerField(default=0)
+    discrepancies = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'qr_requests_novusreconciliationrun'
+        ordering = ['-started_at']
+        verbose_name = 'NOVUS reconciliation run'
+
+    def __str__(self):
+        kind = 'incremental' if self.incremental else 'full'
+        return f'{kind} run at {self.started_at:%Y-%m-%d %H:%M}'
+
+
+class NovusDiscrepancy(models.Model):
+    """
+    A mismatch between a request's stored NOVUS IDs and NOVUS itself.
+
+    One row per request and kind; later runs update ``last_seen_at``, or
+    set ``resolved_at`` once the mismatch is gone.
+    """
+
+    class Kind(models.TextChoices):
+        USER_MISSING = 'USER_MISSING', 'User missing in NOVUS'
+        CARD_MISSING = 'CARD_MISSING', 'Card missing in NOVUS'
+        CARD_NUMBER = 'CARD_NUMBER', 'Card number differs'
+        CREDENTIAL_MISSING = 'CREDENTIAL_MISSING', 'Credential missing in NOVUS'
+        CREDENTIAL_LINK = 'CREDENTIAL_LINK', 'Credential linked to another user or card'
+        CREDENTIAL_EXPIRY = 'CREDENTIAL_EXPIRY', 'Credential expiry differs'
+
+    qr_request = models.ForeignKey(
+        GuestQRRequest,
+        on_delete=models.CASCADE,
+        related_name='novus_discrepancies',
+    )
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    detail = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        db_table = 'qr_requests_novusdiscrepancy'
+        ordering = ['-last_seen_at']
+        verbose_name = 'NOVUS discrepancy'
+        verbose_name_plural = 'NOVUS discrepancies'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['qr_request', 'kind'],
+                name='uniq_discrepancy_per_request_kind',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} ({self.qr_request_id})'
+
+
+class GuestNotification(models.Model):
+    """
+    One message to a guest (email with the QR image, or SMS), queued on
+    approval and delivered in batches by ``qr_requests.notifications``.
+    """
+
+    class Channel(models.TextChoices):
+        EMAIL = 'EMAIL', 'Email'
+        SMS = 'SMS', 'SMS'
+
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', 'Queued'
+        SENDING = 'SENDING', 'Sending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    qr_request = models.ForeignKey(
+        GuestQRRequest,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+    )
+    channel = models.CharField(max_length=5, choices=Channel.choices)
+    recipient = models.CharField(max_length=254)
+    status = models.CharField(
+        max_length=7,
+        choices=Status.choices,
+        default=Status.QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'qr_requests_guestnotification'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='notification_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_channel_display()} to {self.recipient} ({self.status})'
+
+
+class ManagerQuota(models.Model):
+    """
+    A manager's quota overrides and usage counters (see qr_requests.quotas).
+
+    Empty limits fall back to the QUOTA_* settings; 0 means unlimited.
+    """
+
+    manager = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='quota',
+    )
+    requests_per_day = models.PositiveIntegerField(null=True, blank=True)
+    max_open_pending = models.PositiveIntegerField(null=True, blank=True)
+    max_active_credentials = models.PositiveIntegerField(null=True, blank=True)
+
+    # Usage, maintained by qr_requests.quotas and recounted daily.
+    day = models.DateField()
+    created_today = models.IntegerField(default=0)
+    open_pending = models.IntegerField(default=0)
+    active_credentials = models.IntegerField(default=0)
+    recounted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'qr_requests_managerquota'
+
+    def __str__(self):
+        return f'Quota of {self.manager}'
@@ -0,0 +1,308 @@
+"""
+Guest notifications: the QR code by email (and optionally SMS) on approval.
+
+Approval only inserts ``GuestNotification`` rows inside its own
+transaction; nothing is rendered or sent on the request path.  Delivery
+happens in batches:
+
+* ``deliver_due()`` claims up to ``NOTIFY_BATCH_SIZE`` due messages,
+  sends all emails of the batch over one mail connection and all SMS
+  over one SMS backend connection, and records a status per message.
+* Failed messages are retried with exponential backoff
+  (``NOTIFY_RETRY_SECONDS`` · 2ⁿ) until ``NOTIFY_MAX_ATTEMPTS``, then
+  marked FAILED.  A claim lasts ``NOTIFY_SEND_TIMEOUT`` seconds, so
+  messages of a crashed worker are picked up again.
+* In each web process a daemon thread (``dispatcher``) is woken after
+  every approval commits and also polls every ``NOTIFY_POLL_SECONDS``;
+  ``manage.py send_notifications`` does the same from cron or a
+  dedicated worker.
+
+Concurrent senders never take the same message: rows are claimed with
+``SKIP LOCKED`` where available, otherwise by conditional UPDATE.  The
+claim sets ``next_attempt_at`` to the end of the lease; a sender stops
+sending once its lease is over and only records results for rows it
+still holds, so a batch that overran and was reclaimed is neither sent
+twice nor overwritten.
+"""
+
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import GuestNotification
+from .qrimage import render_qr_png
+from .sms import SMSMessage, get_sms_connection
+
+logger = logging.getLogger(__name__)
+
+_DUE_STATUSES = (GuestNotification.Status.QUEUED, GuestNotification.Status.SENDING)
+
+
+# ── Enqueue ────────────────────────────────────────────────────────
+
+
+def enqueue_approval(qr_request) -> list:
+    """
+    Queue the approval messages for ``qr_request``.
+
+    Call inside the approval transaction: the rows commit (or roll back)
+    with the approval, and the dispatcher is woken once it has committed.
+    """
+    if not settings.GUEST_NOTIFICATIONS_ENABLED:
+        return []
+    now = timezone.now()
+    notifications = []
+    if qr_request.guest_email:
+        notifications.append(GuestNotification(
+            qr_request=qr_request,
+            channel=GuestNotification.Channel.EMAIL,
+            recipient=qr_request.guest_email,
+            next_attempt_at=now,
+        ))
+    if qr_request.guest_phone and settings.SMS_BACKEND:
+        notifications.append(GuestNotification(
+            qr_request=qr_request,
+            channel=GuestNotification.Channel.SMS,
+            recipient=qr_request.guest_phone,
+            next_attempt_at=now,
+        ))
+    if notifications:
+        GuestNotification.objects.bulk_create(notifications)
+        if settings.NOTIFY_IN_PROCESS:
+            transaction.on_commit(dispatcher.wake)
+    return notifications
+
+
+# ── Delivery ───────────────────────────────────────────────────────
+
+
+def due(now=None):
+    now = now or timezone.now()
+    return GuestNotification.objects.filter(
+        status__in=_DUE_STATUSES, next_attempt_at__lte=now,
+    )
+
+
+def deliver_due(batch_size: int | None = None) -> Counter:
+    """Claim and send one batch; returns the resulting statuses counted."""
+    now = timezone.now()
+    batch = _claim(batch_size or settings.NOTIFY_BATCH_SIZE, now)
+    if not batch:
+        return Counter()
+
+    errors = {}
+    emails = [n for n in batch if n.channel == GuestNotification.Channel.EMAIL]
+    texts = [n for n in batch if n.channel == GuestNotification.Channel.SMS]
+    if emails:
+        errors.update(_send_emails(emails))
+    if texts:
+        errors.update(_send_texts(texts))
+    return _record(batch, errors)
+
+
+def _claim(size: int, now) -> list:
+    lease = now + timedelta(seconds=settings.NOTIFY_SEND_TIMEOUT)
+    claim = {
+        'status': GuestNotification.Status.SENDING,
+        'next_attempt_at': lease,
+        'attempts': F('attempts') + 1,
+    }
+    candidates = due(now).order_by('next_attempt_at')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                candidates.select_for_update(skip_locked=True)
+                .values_list('pk', flat=True)[:size]
+            )
+            GuestNotification.objects.filter(pk__in=ids).update(**claim)
+    else:
+        ids = [
+            pk for pk in candidates.values_list('pk', flat=True)[:size]
+            if due(now).filter(pk=pk).update(**claim)
+        ]
+    return list(
+        GuestNotification.objects
+        .filter(pk__in=ids)
+        .select_related('qr_request', 'qr_request__manager')
+    )
+
+
+def _send_emails(notifications) -> dict:
+    """Send over one connection; returns ``{notification pk: error}``."""
+    errors = {}
+    mail = get_connection()
+    try:
+        mail.open()
+    except Exception as exc:
+        logger.warning('Could not open the mail connection: %s', exc)
+        return {n.pk: f'connection: {exc}' for n in notifications}
+    try:
+        for notification in notifications:
+            if _lease_expired(notification):
+                errors[notification.pk] = 'claim expired before sending'
+                continue
+            try:
+                if not mail.send_messages([_email(notification)]):
+                    errors[notification.pk] = 'not accepted by the mail backend'
+            except Exception as exc:
+                errors[notification.pk] = str(exc) or type(exc).__name__
+    finally:
+        mail.close()
+    return errors
+
+
+def _send_texts(notifications) -> dict:
+    errors = {}
+    sms = get_sms_connection()
+    if sms is None:
+        return {n.pk: 'SMS is disabled (SMS_BACKEND is empty)' for n in notifications}
+    try:
+        sms.open()
+    except Exception as exc:
+        logger.warning('Could not open the SMS connection: %s', exc)
+        return {n.pk: f'connection: {exc}' for n in notifications}
+    try:
+        for notification in notifications:
+            if _lease_expired(notification):
+                errors[notification.pk] = 'claim expired before sending'
+                continue
+            try:
+                if not sms.send_messages([_text(notification)]):
+                    errors[notification.pk] = 'not accepted by the SMS backend'
+            except Exception as exc:
+                errors[notification.pk] = str(exc) or type(exc).__name__
+    finally:
+        sms.close()
+    return errors
+
+
+def _lease_expired(notification) -> bool:
+    # While claimed, next_attempt_at is the end of the claim.
+    return timezone.now() >= notification.next_attempt_at
+
+
+def _record(batch, errors) -> Counter:
+    now = timezone.now()
+    outcome = Counter()
+    for notification in batch:
+        lease = notification.next_attempt_at
+        error = errors.get(notification.pk)
+        if error is None:
+            notification.status = GuestNotification.Status.SENT
+            notification.sent_at = now
+            notification.last_error = ''
+        elif notification.attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            notification.status = GuestNotification.Status.FAILED
+            notification.last_error = error
+        else:
+            notification.status = GuestNotification.Status.QUEUED
+            notification.last_error = error
+            backoff = settings.NOTIFY_RETRY_SECONDS * 2 ** (notification.attempts - 1)
+            notification.next_attempt_at = now + timedelta(seconds=backoff)
+
+        # Only while the claim is still ours: once it expired another
+        # sender may have reclaimed the row, and its result wins.
+        updated = GuestNotification.objects.filter(
+            pk=notification.pk,
+            status=GuestNotification.Status.SENDING,
+            next_attempt_at=lease,
+        ).update(
+            status=notification.status,
+            sent_at=notification.sent_at,
+            last_error=notification.last_error,
+            next_attempt_at=notification.next_attempt_at,
+        )
+        if not updated:
+            logger.warning(
+                'Lost the claim on %s notification %s; its result (%s) was not recorded.',
+                notification.channel, notification.pk, notification.status,
+            )
+            continue
+        if notification.status == GuestNotification.Status.FAILED:
+            logger.error(
+                'Giving up on %s notification %s after %d attempts: %s',
+                notification.channel, notification.pk, notification.attempts, error,
+            )
+        outcome[notification.status] += 1
+    return outcome
+
+
+# ── Messages ───────────────────────────────────────────────────────
+
+
+def _email(notification) -> EmailMessage:
+    qr_request = notification.qr_request
+    host = qr_request.manager.get_full_name() or qr_request.manager.username
+    lines = [
+        f'Dear {qr_request.guest_name} {qr_request.guest_surname},',
+        '',
+        f'Your visit has been approved (host: {host}).',
+        'Please show the attached QR code at the entrance gate.',
+        '',
+        f'QR number: {qr_request.qr_number}',
+    ]
+    if qr_request.credential_expires_at:
+        lines.append(f'Valid until: {qr_request.credential_expires_at:%Y-%m-%d}')
+    message = EmailMessage(
+        subject=settings.NOTIFY_EMAIL_SUBJECT,
+        body='\n'.join(lines) + '\n',
+        to=[notification.recipient],
+    )
+    message.attach(
+        f'qr_{qr_request.qr_number}.png',
+        render_qr_png(qr_request.qr_number),
+        'image/png',
+    )
+    return message
+
+
+def _text(notification) -> SMSMessage:
+    qr_request = notification.qr_request
+    body = f'Your guest access is approved. QR number: {qr_request.qr_number}.'
+    if qr_request.credential_expires_at:
+        body += f' Valid until {qr_request.credential_expires_at:%Y-%m-%d}.'
+    return SMSMessage(to=notification.recipient, body=body)
+
+
+# ── In-process dispatcher ──────────────────────────────────────────
+
+
+class NotificationDispatcher:
+    """Daemon thread that drains the queue when woken, and on a timer."""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name='guest-notifications', daemon=True,
+                    )
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(settings.NOTIFY_POLL_SECONDS)
+            self._wakeup.clear()
+            try:
+                while sum(deliver_due().values()):
+                    pass
+            except Exception:
+                logger.exception('Guest notification delivery failed.')
+            finally:
+                close_old_connections()
+
+
+dispatcher = NotificationDispatcher()
@@ -0,0 +1,89 @@
+"""
+Model-backed ``ProvisioningStore`` for the NOVUS service layer
+(``NOVUS_PROVISIONING_STORE``): guest identities in ``NovusGuestIdentity``,
+the card pool in ``NovusCardPoolEntry``.
+"""
+
+from django.db import IntegrityError
+from django.utils import timezone
+
+from novus.store import ProvisioningStore
+from .models import NovusCardPoolEntry, NovusGuestIdentity
+
+
+class ModelProvisioningStore(ProvisioningStore):
+
+    # ── Guest identities ──────────────────────────────────────────
+
+    def find_identity(self, qr_request, match_phone=False):
+        email = NovusGuestIdentity.normalise_email(qr_request.guest_email)
+        identity = NovusGuestIdentity.objects.filter(email=email).first()
+        if identity is None and match_phone:
+            phone = NovusGuestIdentity.normalise_phone(qr_request.guest_phone)
+            if phone:
+                identity = NovusGuestIdentity.objects.filter(phone=phone).first()
+        return identity
+
+    def touch_identity(self, identity, verified=False):
+        if verified:
+            identity.verified_at = timezone.now()
+            identity.save(update_fields=['verified_at', 'last_used_at'])
+        else:
+            identity.save(update_fields=['last_used_at'])
+
+    def forget_identity(self, identity):
+        identity.delete()
+
+    def remember_identity(self, qr_request, novus_user_id):
+        email = NovusGuestIdentity.normalise_email(qr_request.guest_email)
+        try:
+            NovusGuestIdentity.objects.update_or_create(
+                email=email,
+                defaults={
+                    'novus_user_id': str(novus_user_id),
+                    'phone': NovusGuestIdentity.normalise_phone(qr_request.guest_phone),
+                    'verified_at': timezone.now(),
+                },
+            )
+        except IntegrityError:
+            # A concurrent approval for the same guest recorded it first.
+            pass
+
+    # ── Card pool ─────────────────────────────────────────────────
+
+    def take_card(self):
+        # Claiming is a conditional UPDATE, so concurrent approvals never
+        # get the same card.
+        for _ in range(5):
+            entry = (
+                NovusCardPoolEntry.objects
+                .filter(claimed_at__isnull=True)
+                .order_by('created_at')
+                .first()
+            )
+            if entry is None:
+                return None
+            claimed = NovusCardPoolEntry.objects.filter(
+                pk=entry.pk, claimed_at__isnull=True,
+            ).update(claimed_at=timezone.now())
+            if claimed:
+                return entry
+        return None
+
+    def release_card(self, entry):
+        NovusCardPoolEntry.objects.filter(pk=entry.pk).update(claimed_at=None)
+
+    def consume_card(self, entry):
+        entry.delete()
+
+    def add_card(self, novus_card_id, qr_number):
+        NovusCardPoolEntry.objects.create(novus_card_id=str(novus_card_id), qr_number=qr_number)
+
+    def available_cards(self):
+        return NovusCardPoolEntry.objects.filter(claimed_at__isnull=True).count()
+
+    def release_stale_card_claims(self, older_than, used_card_ids):
+        cutoff = timezone.now() - older_than
+        stale = NovusCardPoolEntry.objects.filter(claimed_at__lt=cutoff)
+        stale.filter(novus_card_id__in=used_card_ids).delete()
+        return stale.update(claimed_at=None)
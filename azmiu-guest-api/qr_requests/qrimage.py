@@ -0,0 +1,21 @@
+import io
+
+
+def render_qr_png(qr_number: str) -> bytes:
+    """PNG image of the QR code a gate scanner reads for ``qr_number``."""
+    # qrcode pulls in PIL; load both on the first image, not at startup.
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(qr_number)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color='black', back_color='white')
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -0,0 +1,133 @@
+"""
+Review queue: leases on pending requests so reviewers never collide.
+
+``claim_next(user, count)`` hands a reviewer up to ``count`` pending
+requests nobody else holds, highest ``priority`` first, then oldest.
+A claim lasts ``REVIEW_LEASE_SECONDS``; claiming again renews the
+reviewer's existing leases.  Expired leases are free for anyone.
+
+On databases with ``SELECT … FOR UPDATE SKIP LOCKED`` (PostgreSQL)
+concurrent claimers skip each other's candidate rows.  Elsewhere
+(SQLite) each candidate is taken with a conditional UPDATE, which only
+succeeds if the row is still unclaimed.
+
+An approval claims its request by moving it to APPROVING (see
+``ApproveSerializer``).  ``release_stale_approvals()`` returns requests
+whose approving worker died to PENDING.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import GuestQRRequest
+
+
+def claimable_by(user, now) -> Q:
+    """Rows ``user`` may claim: unclaimed, lease expired, or already theirs."""
+    return (
+        Q(claimed_by__isnull=True)
+        | Q(claimed_until__isnull=True)
+        | Q(claimed_until__lte=now)
+        | Q(claimed_by=user)
+    )
+
+
+def held_by_other(qr_request, user, now=None) -> bool:
+    now = now or timezone.now()
+    return (
+        qr_request.claimed_by_id is not None
+        and qr_request.claimed_by_id != user.pk
+        and qr_request.claimed_until is not None
+        and qr_request.claimed_until > now
+    )
+
+
+def leases_of(user):
+    """Pending requests ``user`` currently holds a lease on."""
+    return GuestQRRequest.objects.filter(
+        status=GuestQRRequest.Status.PENDING,
+        claimed_by=user,
+        claimed_until__gt=timezone.now(),
+    ).order_by('-priority', 'created_at')
+
+
+def claim_next(user, count: int, lease_seconds: int | None = None) -> list:
+    """Renew ``user``'s leases and top them up to ``count``; return the held requests."""
+    now = timezone.now()
+    until = now + timedelta(seconds=lease_seconds or settings.REVIEW_LEASE_SECONDS)
+
+    held = GuestQRRequest.objects.filter(
+        status=GuestQRRequest.Status.PENDING,
+        claimed_by=user,
+        claimed_until__gt=now,
+    )
+    held.update(claimed_until=until)
+    wanted = count - held.count()
+
+    if wanted > 0:
+        candidates = (
+            GuestQRRequest.objects
+            .filter(status=GuestQRRequest.Status.PENDING)
+            .filter(Q(claimed_by__isnull=True) | Q(claimed_until__lte=now) | Q(claimed_until__isnull=True))
+            .order_by('-priority', 'created_at')
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            _claim_skip_locked(candidates, user, until, wanted)
+        else:
+            _claim_conditional(candidates, user, until, wanted, now)
+
+    return list(leases_of(user).select_related('manager', 'approved_by', 'claimed_by'))
+
+
+def _claim_skip_locked(candidates, user, until, wanted) -> None:
+    with transaction.atomic():
+        ids = list(
+            candidates
+            .select_for_update(skip_locked=True, of=('self',))
+            .values_list('pk', flat=True)[:wanted]
+        )
+        GuestQRRequest.objects.filter(pk__in=ids).update(
+            claimed_by=user, claimed_until=until,
+        )
+
+
+def _claim_conditional(candidates, user, until, wanted, now) -> None:
+    # Read a few more candidates than needed: some may be taken by a
+    # concurrent reviewer between our read and our update.
+    for _ in range(3):
+        ids = list(candidates.values_list('pk', flat=True)[:wanted * 2])
+        if not ids:
+            return
+        for pk in ids:
+            wanted -= GuestQRRequest.objects.filter(
+                Q(pk=pk, status=GuestQRRequest.Status.PENDING) & claimable_by(user, now),
+            ).update(claimed_by=user, claimed_until=until)
+            if wanted <= 0:
+                return
+
+
+def release(user, ids=None) -> int:
+    """Give up ``user``'s leases (all of them, or only ``ids``)."""
+    leases = GuestQRRequest.objects.filter(claimed_by=user)
+    if ids is not None:
+        leases = leases.filter(pk__in=ids)
+    return leases.update(claimed_by=None, claimed_until=None)
+
+
+def release_stale_approvals(older_than: timedelta | None = None) -> int:
+    """
+    Return requests stuck in APPROVING for longer than ``older_than``
+    (default ``APPROVAL_CLAIM_TIMEOUT``) to PENDING.
+    """
+    older_than = older_than or timedelta(seconds=settings.APPROVAL_CLAIM_TIMEOUT)
+    now = timezone.now()
+    # The approval claim stamps updated_at; a live approval finishes (or
+    # is killed with its worker) long before the timeout.
+    return GuestQRRequest.objects.filter(
+        status=GuestQRRequest.Status.APPROVING,
+        updated_at__lt=now - older_than,
+    ).update(status=GuestQRRequest.Status.PENDING, updated_at=now)
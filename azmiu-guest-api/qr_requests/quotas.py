@@ -0,0 +1,196 @@
+"""
+Per-manager request quotas.
+
+Three limits per manager, taken from settings unless overridden on the
+manager's ``ManagerQuota`` row (0 means unlimited):
+
+* ``QUOTA_REQUESTS_PER_DAY`` — requests created per day,
+* ``QUOTA_OPEN_PENDING`` — requests waiting for review,
+* ``QUOTA_ACTIVE_CREDENTIALS`` — unexpired credentials plus pending
+  requests (each of which may become one).
+
+Usage lives in counters on ``ManagerQuota`` instead of being counted on
+every create.  ``reserve()`` checks and increments them in one
+conditional UPDATE, so concurrent creates cannot overshoot a limit; the
+approve, reject and delete paths adjust them with ``F()`` updates.  The
+first use of the day (and ``manage.py recount_quotas``) recomputes the
+counters from the requests table, which retires expired credentials and
+repairs drift from changes made outside the API.
+
+Counters sit in a table rather than the cache because the default cache
+is per-process and the counts must be shared by every worker.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import GuestQRRequest, ManagerQuota
+
+_OPEN = (GuestQRRequest.Status.PENDING, GuestQRRequest.Status.APPROVING)
+
+
+class QuotaExceeded(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = 'Request quota exceeded.'
+    default_code = 'quota_exceeded'
+
+
+@dataclass(frozen=True)
+class Usage:
+    name: str
+    used: int
+    limit: int | None
+
+    @property
+    def remaining(self) -> int | None:
+        return None if self.limit is None else max(self.limit - self.used, 0)
+
+    def as_dict(self) -> dict:
+        return {'used': self.used, 'limit': self.limit, 'remaining': self.remaining}
+
+
+_MESSAGES = {
+    'requests_today': 'Daily request quota reached ({limit} per day).',
+    'open_pending': 'Too many requests waiting for review (limit {limit}).',
+    'active_credentials': 'Active credential quota reached (limit {limit}, pending requests included).',
+}
+
+
+# ── Reading ────────────────────────────────────────────────────────
+
+
+def current(manager) -> ManagerQuota:
+    """The manager's quota row, rolled over to today if needed."""
+    today = timezone.localdate()
+    quota = ManagerQuota.objects.filter(pk=manager.pk).first()
+    if quota is None:
+        quota = _create(manager, today)
+    elif quota.day != today:
+        _recount(manager.pk, today, only_before=today)
+        quota.refresh_from_db()
+    return quota
+
+
+def usage(quota: ManagerQuota) -> list[Usage]:
+    return [
+        Usage('requests_today', quota.created_today,
+              _limit(quota.requests_per_day, settings.QUOTA_REQUESTS_PER_DAY)),
+        Usage('open_pending', quota.open_pending,
+              _limit(quota.max_open_pending, settings.QUOTA_OPEN_PENDING)),
+        Usage('active_credentials', quota.active_credentials + quota.open_pending,
+              _limit(quota.max_active_credentials, settings.QUOTA_ACTIVE_CREDENTIALS)),
+    ]
+
+
+# ── Reserving ──────────────────────────────────────────────────────
+
+
+def reserve(manager, count: int = 1, partial: bool = False) -> int:
+    """
+    Take ``count`` requests from the manager's quota and return how many
+    were granted.  Raises ``QuotaExceeded`` when none (or, unless
+    ``partial``, fewer than ``count``) are available.
+
+    Call inside the transaction that creates the requests, so a failed
+    insert gives the reservation back.
+    """
+    for _ in range(5):
+        quota = current(manager)
+        limits = usage(quota)
+        bounded = [u for u in limits if u.limit is not None]
+        granted = min([count, *(u.remaining for u in bounded)])
+        if granted <= 0 or (granted < count and not partial):
+            exhausted = min(bounded, key=lambda u: u.remaining)
+            raise QuotaExceeded(_MESSAGES[exhausted.name].format(limit=exhausted.limit))
+
+        # The limits are re-checked by the UPDATE itself; if a concurrent
+        # create got there first no row matches and we try again.
+        conditions = Q(pk=manager.pk, day=quota.day)
+        daily, pending, active = (u.limit for u in limits)
+        if daily is not None:
+            conditions &= Q(created_today__lte=daily - granted)
+        if pending is not None:
+            conditions &= Q(open_pending__lte=pending - granted)
+        if active is not None:
+            conditions &= Q(active_credentials__lte=Value(active - granted) - F('open_pending'))
+        if ManagerQuota.objects.filter(conditions).update(
+            created_today=F('created_today') + granted,
+            open_pending=F('open_pending') + granted,
+        ):
+            return granted
+    raise QuotaExceeded('Quota is busy; please retry.')
+
+
+# ── Transitions ────────────────────────────────────────────────────
+
+
+def record_approved(manager_id) -> None:
+    ManagerQuota.objects.filter(pk=manager_id).update(
+        open_pending=Greatest(F('open_pending') - 1, 0),
+        active_credentials=F('active_credentials') + 1,
+    )
+
+
+def record_closed(manager_id) -> None:
+    """A pending request was rejected or deleted."""
+    ManagerQuota.objects.filter(pk=manager_id).update(
+        open_pending=Greatest(F('open_pending') - 1, 0),
+    )
+
+
+# ── Recounting ─────────────────────────────────────────────────────
+
+
+def recount(manager_ids=None) -> int:
+    """Recompute the counters of ``manager_ids`` (default: all rows)."""
+    today = timezone.localdate()
+    if manager_ids is None:
+        manager_ids = list(ManagerQuota.objects.values_list('pk', flat=True))
+    for manager_id in manager_ids:
+        _recount(manager_id, today)
+    return len(manager_ids)
+
+
+def _counts(manager_id, today) -> dict:
+    now = timezone.now()
+    start_of_day = timezone.make_aware(datetime.combine(today, time.min))
+    return GuestQRRequest.objects.filter(manager_id=manager_id).aggregate(
+        created_today=Count('pk', filter=Q(created_at__gte=start_of_day)),
+        open_pending=Count('pk', filter=Q(status__in=_OPEN)),
+        active_credentials=Count('pk', filter=Q(
+            Q(credential_expires_at__isnull=True) | Q(credential_expires_at__gt=now),
+            status=GuestQRRequest.Status.APPROVED,
+        )),
+    )
+
+
+def _recount(manager_id, today, only_before=None) -> None:
+    rows = ManagerQuota.objects.filter(pk=manager_id)
+    if only_before is not None:
+        # Only the first caller of the day rolls the row over.
+        rows = rows.filter(day__lt=only_before)
+    rows.update(day=today, recounted_at=timezone.now(), **_counts(manager_id, today))
+
+
+def _create(manager, today) -> ManagerQuota:
+    try:
+        with transaction.atomic():
+            return ManagerQuota.objects.create(
+                manager=manager, day=today, recounted_at=timezone.now(),
+                **_counts(manager.pk, today),
+            )
+    except IntegrityError:
+        return ManagerQuota.objects.get(pk=manager.pk)
+
+
+def _limit(override, default) -> int | None:
+    value = default if override is None else override
+    return value or None
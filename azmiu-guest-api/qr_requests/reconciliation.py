@@ -0,0 +1,38 @@
+"""
+Storage of ``novus.reconciliation`` findings as ``NovusDiscrepancy`` rows.
+"""
+
+from django.utils import timezone
+
+from .models import NovusDiscrepancy
+
+
+def record_findings(results: dict) -> int:
+    """
+    Store ``{qr_request: findings}`` for requests that were fully checked.
+
+    Open discrepancies of those requests that were not found again are
+    marked resolved.  Returns the number of findings stored.
+    """
+    now = timezone.now()
+    clean = [request.pk for request, findings in results.items() if not findings]
+    NovusDiscrepancy.objects.filter(
+        qr_request_id__in=clean, resolved_at__isnull=True,
+    ).update(resolved_at=now)
+
+    stored = 0
+    for qr_request, findings in results.items():
+        if not findings:
+            continue
+        kinds = [kind for kind, _ in findings]
+        NovusDiscrepancy.objects.filter(
+            qr_request=qr_request, resolved_at__isnull=True,
+        ).exclude(kind__in=kinds).update(resolved_at=now)
+        for kind, detail in findings:
+            NovusDiscrepancy.objects.update_or_create(
+                qr_request=qr_request,
+                kind=kind,
+                defaults={'detail': detail, 'last_seen_at': now, 'resolved_at': None},
+            )
+            stored += 1
+    return stored
@@ -0,0 +1,53 @@
+"""
+Retention: move old requests out of the hot table.
+
+Rejected requests older than ``ARCHIVE_REJECTED_AFTER_DAYS`` and approved
+requests whose credential expired more than ``ARCHIVE_EXPIRED_AFTER_DAYS``
+ago are copied to ``ArchivedQRRequest`` and deleted, one small chunk per
+transaction, so no lock is held for long and the job can be stopped and
+resumed at any point.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedQRRequest, GuestQRRequest
+
+_COLUMNS = [
+    field.attname
+    for field in ArchivedQRRequest._meta.concrete_fields
+    if field.name != 'archived_at'
+]
+
+
+def archivable(now=None):
+    """Requests due for archiving."""
+    now = now or timezone.now()
+    rejected_before = now - timedelta(days=settings.ARCHIVE_REJECTED_AFTER_DAYS)
+    expired_before = now - timedelta(days=settings.ARCHIVE_EXPIRED_AFTER_DAYS)
+    return GuestQRRequest.objects.filter(
+        Q(status=GuestQRRequest.Status.REJECTED, updated_at__lt=rejected_before)
+        | Q(status=GuestQRRequest.Status.APPROVED, credential_expires_at__lt=expired_before)
+    )
+
+
+def archive_chunk(size: int, now=None) -> int:
+    """Archive up to ``size`` due requests in one transaction; returns the count."""
+    with transaction.atomic():
+        due = archivable(now).order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # Rows another transaction is working on are left for a later chunk.
+            due = due.select_for_update(skip_locked=True)
+        rows = list(due.values(*_COLUMNS)[:size])
+        if not rows:
+            return 0
+        ArchivedQRRequest.objects.bulk_create(
+            [ArchivedQRRequest(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        GuestQRRequest.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
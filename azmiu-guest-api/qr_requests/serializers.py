@@ -1,13 +1,19 @@
 import logging
 
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 
 from accounts.serializers import UserBriefSerializer
+from core import tracing
 from novus.exceptions import NovusError
 from novus.services import provision_qr_for_request
-from .models import GuestQRRequest
+from .allocator import QRNumberExhausted, allocate_qr_number
+from .models import ArchivedQRRequest, GuestNotification, GuestQRRequest
+from .notifications import enqueue_approval
+from . import quotas
+from .queue import claimable_by, held_by_other
 
 logger = logging.getLogger(__name__)
 
@@ -30,38 +36,87 @@ class GuestQRRequestCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'status', 'manager', 'created_at')
 
     def create(self, validated_data):
-        validated_data['manager'] = self.context['request'].user
-        return super().create(validated_data)
+        manager = self.context['request'].user
+        validated_data['manager'] = manager
+        # The reservation commits (or rolls back) with the new row.
+        with transaction.atomic():
+            quotas.reserve(manager)
+            return super().create(validated_data)
+
+
+# Columns shared by live and archived requests.
+REQUEST_FIELDS = (
+    'id',
+    'guest_name',
+    'guest_surname',
+    'guest_email',
+    'guest_phone',
+    'remark',
+    'status',
+    'rejection_reason',
+    'manager',
+    'approved_by',
+    'approved_at',
+    'novus_user_id',
+    'novus_card_id',
+    'novus_credential_id',
+    'qr_number',
+    'credential_expires_at',
+    'created_at',
+    'updated_at',
+)
 
 
 class GuestQRRequestListSerializer(serializers.ModelSerializer):
     manager = UserBriefSerializer(read_only=True)
     approved_by = UserBriefSerializer(read_only=True)
+    claimed_by = UserBriefSerializer(read_only=True)
 
     class Meta:
         model = GuestQRRequest
+        fields = REQUEST_FIELDS + ('priority', 'claimed_by', 'claimed_until')
+        read_only_fields = fields
+
+
+class ArchivedQRRequestSerializer(serializers.ModelSerializer):
+    manager = UserBriefSerializer(read_only=True)
+    approved_by = UserBriefSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedQRRequest
+        fields = REQUEST_FIELDS + ('archived_at',)
+        read_only_fields = fields
+
+
+class QuotaSerializer(serializers.Serializer):
+    """A manager's quota usage; ``limit``/``remaining`` are null when unlimited."""
+
+    day = serializers.DateField()
+    requests_today = serializers.DictField()
+    open_pending = serializers.DictField()
+    active_credentials = serializers.DictField()
+    remaining = serializers.IntegerField(allow_null=True)
+
+
+class GuestNotificationSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = GuestNotification
         fields = (
-            'id',
-            'guest_name',
-            'guest_surname',
-            'guest_email',
-            'guest_phone',
-            'remark',
-            'status',
-            'rejection_reason',
-            'manager',
-            'approved_by',
-            'approved_at',
-            'novus_user_id',
-            'novus_card_id',
-            'novus_credential_id',
-            'qr_number',
-            'created_at',
-            'updated_at',
+            'id', 'channel', 'recipient', 'status', 'attempts',
+            'last_error', 'next_attempt_at', 'created_at', 'sent_at',
         )
         read_only_fields = fields
 
 
+def _check_lease(instance, user):
+    if held_by_other(instance, user):
+        raise serializers.ValidationError(
+            f'This request is claimed by {instance.claimed_by.username} '
+            f'until {instance.claimed_until:%H:%M:%S}.'
+        )
+
+
 class ApproveSerializer(serializers.Serializer):
 
     def validate(self, attrs):
@@ -73,35 +128,88 @@ class ApproveSerializer(serializers.Serializer):
                 f'Cannot approve a request with status "{instance.status}". '
                 f'Only PENDING requests can be approved.'
             )
+        _check_lease(instance, self.context['request'].user)
         return attrs
 
     def update(self, instance, validated_data):
         """
         Approve a QR request with full NOVUS provisioning.
 
-        Everything runs inside a DB transaction:
-          1. Provision QR in NOVUS (user → card → credential)
-          2. Mark request as APPROVED with reviewer info
-          3. Commit
+          1. Atomically claim the request (PENDING → APPROVING, claimed_by
+             the reviewer) with a conditional UPDATE, so only one
+             concurrent approval proceeds
+          2. Provision QR in NOVUS (user → card → credential); this runs
+             outside a DB transaction so no lock is held across NOVUS
+             round trips — the claim is what guards the request
+          3. Mark request as APPROVED with reviewer info in one transaction,
+             again conditional on the claim still being this reviewer's
 
-        If NOVUS fails at any step the transaction rolls back,
-        the status stays PENDING, and a clear error is raised.
+        If NOVUS fails at any step the claim is released back to PENDING
+        and a clear error is raised.  If the claim was lost meanwhile
+        (released as stale, perhaps claimed again), nothing is marked,
+        queued or counted; the credential stays on the request for the
+        next attempt to reuse.
         """
+        now = timezone.now()
+        user = self.context['request'].user
+        with tracing.span('db.claim_for_approval'):
+            claimed = GuestQRRequest.objects.filter(
+                claimable_by(user, now),
+                pk=instance.pk,
+                status=GuestQRRequest.Status.PENDING,
+            ).update(
+                status=GuestQRRequest.Status.APPROVING,
+                claimed_by=user,
+                updated_at=timezone.now(),
+            )
+        if not claimed:
+            raise serializers.ValidationError(
+                'This request is already being processed by another reviewer.'
+            )
+        instance.status = GuestQRRequest.Status.APPROVING
+
         try:
-            with transaction.atomic():
-                # NOVUS provisioning (creates user, card, credential).
-                # On success, NOVUS IDs are saved to the instance inside
-                # provision_qr_for_request via update_fields.
-                provision_qr_for_request(instance)
-
-                # Mark approved only after NOVUS succeeds.
-                instance.status = GuestQRRequest.Status.APPROVED
-                instance.approved_by = self.context['request'].user
-                instance.approved_at = timezone.now()
-                instance.save(update_fields=[
-                    'status', 'approved_by', 'approved_at', 'updated_at',
-                ])
-        except NovusError as exc:
+            # NOVUS provisioning (creates user, card, credential).
+            # On success, NOVUS IDs are saved to the instance inside
+            # provision_qr_for_request via update_fields; a credential
+            # left by an earlier attempt that failed below is reused.
+            with tracing.span('novus.provision', **{'qr_request.id': str(instance.pk)}):
+                provision_qr_for_request(instance, allocate_qr_number)
+
+            # Mark approved only after NOVUS succeeds.
+            with tracing.span('db.mark_approved'), transaction.atomic():
+                approved_at = timezone.now()
+                marked = GuestQRRequest.objects.filter(
+                    pk=instance.pk,
+                    status=GuestQRRequest.Status.APPROVING,
+                    claimed_by=user,
+                ).update(
+                    status=GuestQRRequest.Status.APPROVED,
+                    approved_by=user,
+                    approved_at=approved_at,
+                    updated_at=approved_at,
+                )
+                if marked:
+                    instance.status = GuestQRRequest.Status.APPROVED
+                    instance.approved_by = user
+                    instance.approved_at = instance.updated_at = approved_at
+                    # Only queued here; sending happens off the request path.
+                    enqueue_approval(instance)
+                    quotas.record_approved(instance.manager_id)
+        except Exception as exc:
+            GuestQRRequest.objects.filter(
+                pk=instance.pk,
+                status=GuestQRRequest.Status.APPROVING,
+                claimed_by=user,
+            ).update(
+                status=GuestQRRequest.Status.PENDING,
+                updated_at=timezone.now(),
+            )
+            instance.status = GuestQRRequest.Status.PENDING
+            if isinstance(exc, QRNumberExhausted):
+                raise serializers.ValidationError({'qr_number': str(exc)}) from exc
+            if not isinstance(exc, NovusError):
+                raise
             logger.error(
                 'NOVUS provisioning failed for QR request %s: %s',
                 instance.pk, exc,
@@ -110,6 +218,15 @@ class ApproveSerializer(serializers.Serializer):
                 {'novus': f'NOVUS integration failed: {exc}'}
             ) from exc
 
+        if not marked:
+            instance.refresh_from_db()
+            logger.warning(
+                'Approval claim on QR request %s was lost before it was marked.',
+                instance.pk,
+            )
+            raise serializers.ValidationError(
+                'The approval took too long and was released; approve the request again.'
+            )
         return instance
 
 
@@ -125,15 +242,44 @@ class RejectSerializer(serializers.Serializer):
                 f'Cannot reject a request with status "{instance.status}". '
                 f'Only PENDING requests can be rejected.'
             )
+        _check_lease(instance, self.context['request'].user)
         return attrs
 
     def update(self, instance, validated_data):
-        instance.status = GuestQRRequest.Status.REJECTED
-        instance.rejection_reason = validated_data['rejection_reason']
-        instance.approved_by = self.context['request'].user
-        instance.approved_at = timezone.now()
-        instance.save(update_fields=[
-            'status', 'rejection_reason', 'approved_by', 'approved_at',
-            'updated_at',
-        ])
+        # Conditional update: never reject a request another reviewer has
+        # meanwhile claimed for approval.
+        now = timezone.now()
+        rejected = GuestQRRequest.objects.filter(
+            claimable_by(self.context['request'].user, now),
+            pk=instance.pk,
+            status=GuestQRRequest.Status.PENDING,
+        ).update(
+            status=GuestQRRequest.Status.REJECTED,
+            rejection_reason=validated_data['rejection_reason'],
+            approved_by=self.context['request'].user,
+            approved_at=now,
+            updated_at=now,
+        )
+        if not rejected:
+            raise serializers.ValidationError(
+                'This request is already being processed by another reviewer.'
+            )
+        quotas.record_closed(instance.manager_id)
+        instance.refresh_from_db()
         return instance
+
+
+class ReviewClaimSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, default=10)
+    lease_seconds = serializers.IntegerField(min_value=30, max_value=3600, required=False)
+
+    def validate_count(self, value):
+        if value > settings.REVIEW_CLAIM_MAX:
+            raise serializers.ValidationError(
+                f'At most {settings.REVIEW_CLAIM_MAX} requests can be claimed at once.'
+            )
+        return value
+
+
+class ReviewReleaseSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False)
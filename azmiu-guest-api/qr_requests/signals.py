@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import GuestQRRequest
+from .verification import index
+
+
+@receiver(post_save, sender=GuestQRRequest)
+def update_verification_index(sender, instance, **kwargs):
+    """Approved codes become verifiable (and others stop being) once committed."""
+    transaction.on_commit(lambda: index.record_changed(instance))
+
+
+@receiver(post_delete, sender=GuestQRRequest)
+def drop_from_verification_index(sender, instance, **kwargs):
+    # Django clears instance.pk after the delete; capture it now.
+    request_id = instance.pk
+    transaction.on_commit(lambda: index.record_removed(request_id))
@@ -0,0 +1,77 @@
+"""
+Pluggable SMS backends, modelled on ``django.core.mail`` backends.
+
+``SMS_BACKEND`` is a dotted path to a ``BaseSMSBackend`` subclass; an
+empty value disables SMS.  Console and locmem backends are provided for
+development and tests; a gateway backend only needs ``send_messages``.
+"""
+
+import sys
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Messages sent through LocmemSMSBackend (cleared by tests as needed).
+outbox: list['SMSMessage'] = []
+
+
+@dataclass
+class SMSMessage:
+    to: str
+    body: str
+
+
+class BaseSMSBackend(ABC):
+
+    def __init__(self, fail_silently: bool = False, **kwargs):
+        self.fail_silently = fail_silently
+
+    def open(self):
+        """Open a connection to the gateway; reused until ``close``."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @abstractmethod
+    def send_messages(self, messages: list[SMSMessage]) -> int:
+        """Send ``messages`` and return how many were sent."""
+
+
+class ConsoleSMSBackend(BaseSMSBackend):
+
+    def __init__(self, *args, stream=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self._lock:
+            for message in messages:
+                self.stream.write(f'SMS to {message.to}: {message.body}\n')
+            self.stream.flush()
+        return len(messages)
+
+
+class LocmemSMSBackend(BaseSMSBackend):
+
+    def send_messages(self, messages):
+        outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_connection(backend: str | None = None, **kwargs) -> BaseSMSBackend | None:
+    """An SMS backend instance, or None when SMS is disabled."""
+    path = backend if backend is not None else settings.SMS_BACKEND
+    if not path:
+        return None
+    return import_string(path)(**kwargs)
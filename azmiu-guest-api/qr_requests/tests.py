@@ -1,3 +1,1280 @@
-from django.test import TestCase
+import csv
+import fcntl
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import Permission
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+from accounts.models import User
+from accounts.tokens import issue_tokens
+from core import logs, tracing
+from core.database import database_config, replica_configs, sqlite_pragmas
+from core.middleware import CompressionMiddleware, ReplicaRoutingMiddleware
+from core.routers import set_replica_reads
+from core.warmup import after_fork
+from novus import services as novus_services
+from novus.exceptions import NovusAPIError, NovusBusyError
+from novus.limiter import NovusLimiter, endpoint_key
+from novus.reconciliation import Kind, Reconciler
+from . import allocator, notifications, quotas, sms
+from .allocator import QRNumberAllocator, QRNumberExhausted, luhn_check_digit
+from .models import (
+    ArchivedQRRequest,
+    GuestNotification,
+    GuestQRRequest,
+    IdempotencyKey,
+    ManagerQuota,
+    NovusCardPoolEntry,
+    NovusDiscrepancy,
+    NovusGuestIdentity,
+    QRNumberSequence,
+)
+from .queue import claim_next, leases_of, release, release_stale_approvals
+from .reconciliation import record_findings
+from .serializers import ApproveSerializer
+from .verification import QRVerificationIndex
+
+
+def make_request(manager, **fields):
+    fields.setdefault('guest_name', 'Guest')
+    fields.setdefault('guest_surname', 'One')
+    fields.setdefault('guest_email', 'guest@example.com')
+    return GuestQRRequest.objects.create(manager=manager, **fields)
+
+
+def fake_provision(qr_request, allocate_qr_number):
+    qr_request.novus_user_id = '1'
+    qr_request.novus_card_id = '2'
+    qr_request.novus_credential_id = '3'
+    qr_request.qr_number = f'Q{qr_request.pk.hex[:8]}'
+    qr_request.save(update_fields=[
+        'novus_user_id', 'novus_card_id', 'novus_credential_id', 'qr_number', 'updated_at',
+    ])
+
+
+class UsersMixin:
+
+    def setUp(self):
+        self.manager = User.objects.create_user('manager', role=User.Role.MANAGER)
+        self.reviewer = User.objects.create_user('reviewer', role=User.Role.SUPERUSER)
+        self.other_reviewer = User.objects.create_user('reviewer2', role=User.Role.SUPERUSER)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+# ── Approval claim ─────────────────────────────────────────────────
+
+
+@mock.patch('qr_requests.serializers.provision_qr_for_request', side_effect=fake_provision)
+class ApprovalTests(UsersMixin, TestCase):
+
+    def approve(self, qr_request, user=None):
+        return self.client_for(user or self.reviewer).post(
+            reverse('qr_requests:approve', args=[qr_request.pk]),
+        )
+
+    def test_approve_provisions_and_marks_approved(self, provision):
+        qr_request = make_request(self.manager)
+        response = self.approve(qr_request)
+        self.assertEqual(response.status_code, 200, response.data)
+        qr_request.refresh_from_db()
+        self.assertEqual(qr_request.status, GuestQRRequest.Status.APPROVED)
+        self.assertEqual(qr_request.approved_by, self.reviewer)
+        self.assertEqual(qr_request.novus_credential_id, '3')
+        provision.assert_called_once()
+
+    def test_claim_is_conditional(self, provision):
+        qr_request = make_request(self.manager)
+        # Another reviewer claims the row after we loaded it.
+        GuestQRRequest.objects.filter(pk=qr_request.pk).update(
+            status=GuestQRRequest.Status.APPROVING,
+        )
+        serializer = ApproveSerializer(
+            instance=qr_request, data={},
+            context={'request': SimpleNamespace(user=self.reviewer)},
+        )
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        provision.assert_not_called()
+        qr_request.refresh_from_db()
+        self.assertEqual(qr_request.status, GuestQRRequest.Status.APPROVING)
+
+    def test_novus_failure_returns_request_to_pending(self, provision):
+        provision.side_effect = NovusAPIError('NOVUS is down')
+        qr_request = make_request(self.manager)
+        response = self.approve(qr_request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('novus', response.data)
+        qr_request.refresh_from_db()
+        self.assertEqual(qr_request.status, GuestQRRequest.Status.PENDING)
+
+    def test_credential_of_a_failed_attempt_is_reused(self, provision):
+        provision.side_effect = novus_services.provision_qr_for_request
+        qr_request = make_request(
+            self.manager, novus_user_id='1', novus_card_id='2', novus_credential_id='3',
+            qr_number='123456', credential_expires_at=timezone.now() + timedelta(days=30),
+        )
+        with mock.patch.object(novus_services, 'get_client', side_effect=AssertionError):
+            response = self.approve(qr_request)
+        self.assertEqual(response.status_code, 200, response.data)
+        qr_request.refresh_from_db()
+        self.assertEqual(qr_request.status, GuestQRRequest.Status.APPROVED)
+        self.assertEqual(qr_request.qr_number, '123456')
+
+    def test_lost_claim_is_not_marked_approved(self, provision):
+        def provision_slowly(qr_request, allocate_qr_number):
+            fake_provision(qr_request, allocate_qr_number)
+            # The claim went stale meanwhile and another reviewer took it.
+            release_stale_approvals(timedelta(0))
+            GuestQRRequest.objects.filter(pk=qr_request.pk).update(
+                status=GuestQRRequest.Status.APPROVING, claimed_by=self.other_reviewer,
+            )
+
+        provision.side_effect = provision_slowly
+        qr_request = make_request(self.manager)
+        with mock.patch('qr_requests.serializers.enqueue_approval') as enqueue, \
+                mock.patch('qr_requests.serializers.quotas.record_approved') as record:
+            response = self.approve(qr_request)
+        self.assertEqual(response.status_code, 400)
+        enqueue.assert_not_called()
+        record.assert_not_called()
+        qr_request.refresh_from_db()
+        # Left to the other reviewer, with the credential to reuse.
+        self.assertEqual(qr_request.status, GuestQRRequest.Status.APPROVING)
+        self.assertIsNone(qr_request.approved_by)
+        self.assertEqual(qr_request.novus_credential_id, '3')
+
+    def test_lease_of_another_reviewer_blocks_approval(self, provision):
+        qr_request = make_request(self.manager)
+        claim_next(self.other_reviewer, 1)
+        response = self.approve(qr_request)
+        self.assertEqual(response.status_code, 400)
+        provision.assert_not_called()
+
+    def test_stale_approvals_are_released(self, provision):
+        stale = make_request(self.manager)
+        fresh = make_request(self.manager, guest_email='fresh@example.com')
+        GuestQRRequest.objects.filter(pk__in=[stale.pk, fresh.pk]).update(
+            status=GuestQRRequest.Status.APPROVING,
+        )
+        GuestQRRequest.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(release_stale_approvals(timedelta(minutes=5)), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, GuestQRRequest.Status.PENDING)
+        self.assertEqual(fresh.status, GuestQRRequest.Status.APPROVING)
+
+        # Released requests can be approved again.
+        self.assertEqual(self.approve(stale).status_code, 200)
+
+    def test_release_stale_approvals_command(self, provision):
+        qr_request = make_request(self.manager)
+        GuestQRRequest.objects.filter(pk=qr_request.pk).update(
+            status=GuestQRRequest.Status.APPROVING,
+            updated_at=timezone.now() - timedelta(hours=1),
+        )
+        call_command('release_stale_approvals', stdout=mock.Mock())
+        qr_request.refresh_from_db()
+        self.assertEqual(qr_request.status, GuestQRRequest.Status.PENDING)
+
+
+# ── Idempotency-Key ────────────────────────────────────────────────
+
+
+class IdempotencyTests(UsersMixin, TestCase):
+    payload = {'guest_name': 'Guest', 'guest_surname': 'One', 'guest_email': 'g@example.com'}
+
+    def create(self, key, payload=None):
+        return self.client_for(self.manager).post(
+            reverse('qr_requests:create'), payload or self.payload,
+            format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.create('k1')
+        second = self.create('k1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(GuestQRRequest.objects.count(), 1)
+
+    def test_reusing_a_key_with_another_body_is_rejected(self):
+        self.create('k1')
+        response = self.create('k1', {**self.payload, 'guest_name': 'Other'})
+        self.assertEqual(response.status_code, 422)
+
+    def test_raised_validation_error_releases_the_key(self):
+        response = self.create('k1', {'guest_name': 'Guest'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        # Not replayed: the corrected retry runs with the same key.
+        self.assertEqual(self.create('k1').status_code, 201)
+
+    def test_in_progress_key_conflicts_until_stale(self):
+        self.create('k1')
+        record = IdempotencyKey.objects.get()
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            state=IdempotencyKey.State.IN_PROGRESS,
+        )
+        GuestQRRequest.objects.all().delete()
+        self.assertEqual(self.create('k1').status_code, 409)
+
+        # The worker holding it died: the key is taken over.
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            created_at=timezone.now() - timedelta(hours=1),
+        )
+        response = self.create('k1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(GuestQRRequest.objects.count(), 1)
+
+
+# ── QR number allocation ───────────────────────────────────────────
+
+
+@override_settings(QR_NUMBER_LENGTH=4, QR_NUMBER_CHECK_DIGIT=False, QR_NUMBER_BLOCK_SIZE=3)
+class AllocatorTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        allocator.reset()
+        self.addCleanup(allocator.reset)
+
+    def test_luhn_check_digit(self):
+        self.assertEqual(luhn_check_digit('7992739871'), '3')
+
+    def test_workers_never_hand_out_the_same_number(self):
+        first, second = QRNumberAllocator(), QRNumberAllocator()
+        numbers = [a.allocate() for _ in range(5) for a in (first, second)]
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertTrue(all(len(n) == 4 for n in numbers))
+        # Four blocks of three were reserved from the shared sequence.
+        self.assertEqual(QRNumberSequence.objects.get().next_value, 1000 + 4 * 3)
+
+    def test_numbers_already_in_use_are_skipped(self):
+        make_request(self.manager, qr_number='1000')
+        self.assertEqual(QRNumberAllocator().allocate(), '1001')
+
+    @override_settings(QR_NUMBER_CHECK_DIGIT=True)
+    def test_check_digit_is_appended(self):
+        number = QRNumberAllocator().allocate()
+        self.assertEqual(number, '100' + luhn_check_digit('100'))
+
+    @override_settings(QR_NUMBER_LENGTH=1)
+    def test_exhausted_number_space_raises(self):
+        numbers = QRNumberAllocator()
+        for _ in range(9):
+            numbers.allocate()
+        with self.assertRaises(QRNumberExhausted):
+            numbers.allocate()
+
+    def test_reset_forgets_the_reserved_block(self):
+        allocator.allocate_qr_number()
+        allocator.reset()
+        self.assertEqual(allocator.allocate_qr_number(), '1003')
+
+
+# ── Review leases ──────────────────────────────────────────────────
+
+
+class ReviewQueueTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.requests = [
+            make_request(self.manager, guest_email=f'g{i}@example.com') for i in range(5)
+        ]
+
+    def test_reviewers_get_disjoint_leases(self):
+        mine = claim_next(self.reviewer, 3)
+        theirs = claim_next(self.other_reviewer, 3)
+        self.assertEqual(len(mine), 3)
+        self.assertEqual(len(theirs), 2)
+        self.assertFalse({r.pk for r in mine} & {r.pk for r in theirs})
+
+    def test_higher_priority_first(self):
+        GuestQRRequest.objects.filter(pk=self.requests[-1].pk).update(priority=5)
+        self.assertEqual(claim_next(self.reviewer, 1)[0].pk, self.requests[-1].pk)
+
+    def test_claiming_again_renews_and_tops_up(self):
+        first = claim_next(self.reviewer, 2, lease_seconds=60)
+        again = claim_next(self.reviewer, 3, lease_seconds=600)
+        self.assertEqual(len(again), 3)
+        self.assertTrue({r.pk for r in first} <= {r.pk for r in again})
+        self.assertTrue(all(r.claimed_until > timezone.now() + timedelta(seconds=300) for r in again))
+
+    def test_expired_leases_are_free(self):
+        claim_next(self.reviewer, 5)
+        GuestQRRequest.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(leases_of(self.reviewer).exists())
+        self.assertEqual(len(claim_next(self.other_reviewer, 5)), 5)
+
+    def test_release(self):
+        held = claim_next(self.reviewer, 3)
+        self.assertEqual(release(self.reviewer, [held[0].pk]), 1)
+        self.assertEqual(leases_of(self.reviewer).count(), 2)
+        self.assertEqual(release(self.reviewer), 2)
+        self.assertEqual(len(claim_next(self.other_reviewer, 5)), 5)
+
+
+# ── Manager quotas ─────────────────────────────────────────────────
+
+
+@override_settings(QUOTA_REQUESTS_PER_DAY=5, QUOTA_OPEN_PENDING=3, QUOTA_ACTIVE_CREDENTIALS=4)
+class QuotaTests(UsersMixin, TestCase):
+
+    def test_reserve_up_to_the_tightest_limit(self):
+        self.assertEqual(quotas.reserve(self.manager, 2), 2)
+        with self.assertRaises(quotas.QuotaExceeded):
+            quotas.reserve(self.manager, 2)
+        self.assertEqual(quotas.reserve(self.manager, 2, partial=True), 1)
+        with self.assertRaises(quotas.QuotaExceeded):
+            quotas.reserve(self.manager, 1, partial=True)
+        self.assertEqual(quotas.current(self.manager).open_pending, 3)
+
+    def test_create_endpoint_enforces_quota(self):
+        client = self.client_for(self.manager)
+        statuses = [
+            client.post(reverse('qr_requests:create'), {
+                'guest_name': 'G', 'guest_surname': str(i), 'guest_email': f'g{i}@example.com',
+            }, format='json').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+        self.assertEqual(GuestQRRequest.objects.count(), 3)
+
+    def test_transitions_move_the_counters(self):
+        quotas.reserve(self.manager, 3)
+        quotas.record_approved(self.manager.pk)
+        quotas.record_closed(self.manager.pk)
+        quota = quotas.current(self.manager)
+        self.assertEqual((quota.open_pending, quota.active_credentials), (1, 1))
+        # Active credentials count pending requests too: 1 + 1 + 2 = 4.
+        self.assertEqual(quotas.reserve(self.manager, 5, partial=True), 2)
+
+    def test_per_manager_override(self):
+        quotas.current(self.manager)
+        ManagerQuota.objects.filter(pk=self.manager.pk).update(max_open_pending=0)
+        # 0 means unlimited; the other limits still apply.
+        self.assertEqual(quotas.reserve(self.manager, 10, partial=True), 4)
+
+    def test_new_day_recounts_from_the_requests_table(self):
+        make_request(self.manager)
+        make_request(self.manager, guest_email='b@example.com')
+        quota = quotas.current(self.manager)
+        self.assertEqual((quota.created_today, quota.open_pending), (2, 2))
+        ManagerQuota.objects.filter(pk=self.manager.pk).update(
+            day=timezone.localdate() - timedelta(days=1), created_today=99, open_pending=99,
+        )
+        GuestQRRequest.objects.update(created_at=timezone.now() - timedelta(days=1))
+        quota = quotas.current(self.manager)
+        self.assertEqual((quota.created_today, quota.open_pending), (0, 2))
+
+
+# ── Admin bulk review ──────────────────────────────────────────────
+
+
+@mock.patch('qr_requests.serializers.provision_qr_for_request', side_effect=fake_provision)
+class AdminBulkReviewTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        from django.contrib.admin.sites import site
+
+        self.admin = site._registry[GuestQRRequest]
+        patcher = mock.patch.object(self.admin, 'message_user')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = SimpleNamespace(user=self.reviewer, POST={})
+        for i in range(3):
+            make_request(self.manager, guest_email=f'g{i}@example.com')
+
+    def test_approves_selected(self, provision):
+        self.admin.approve_selected(self.request, GuestQRRequest.objects.all())
+        self.assertEqual(
+            GuestQRRequest.objects.filter(status=GuestQRRequest.Status.APPROVED).count(), 3,
+        )
+
+    @override_settings(ADMIN_BULK_ACTION_MAX=2)
+    def test_selection_is_capped(self, provision):
+        self.admin.approve_selected(self.request, GuestQRRequest.objects.all())
+        provision.assert_not_called()
+
+    @override_settings(ADMIN_BULK_ACTION_SECONDS=0)
+    def test_stops_starting_approvals_after_the_time_budget(self, provision):
+        self.admin.approve_selected(self.request, GuestQRRequest.objects.all())
+        provision.assert_not_called()
+        self.assertIn('3 request(s) were left pending', self.admin.message_user.call_args.args[1])
+
+
+# ── Guest notifications ────────────────────────────────────────────
+
+
+@override_settings(
+    GUEST_NOTIFICATIONS_ENABLED=True, NOTIFY_IN_PROCESS=False,
+    SMS_BACKEND='qr_requests.sms.LocmemSMSBackend',
+)
+class NotificationTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.qr_request = make_request(
+            self.manager, guest_phone='+994501234567', qr_number='123456',
+            status=GuestQRRequest.Status.APPROVED,
+        )
+        sms.outbox.clear()
+        mail.outbox.clear()
+        self.notifications = notifications.enqueue_approval(self.qr_request)
+
+    def test_batch_is_sent_once(self):
+        outcome = notifications.deliver_due()
+        self.assertEqual(outcome, {GuestNotification.Status.SENT: 2})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].attachments[0][2], 'image/png')
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(notifications.deliver_due(), {})
+
+    def test_failure_is_retried_with_backoff(self):
+        with mock.patch.object(notifications, '_email', side_effect=ValueError('boom')):
+            outcome = notifications.deliver_due()
+        self.assertEqual(outcome[GuestNotification.Status.QUEUED], 1)
+        email = GuestNotification.objects.get(channel=GuestNotification.Channel.EMAIL)
+        self.assertEqual((email.attempts, email.last_error), (1, 'boom'))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+    def test_result_of_a_reclaimed_batch_is_not_recorded(self):
+        sender = notifications._send_emails
+
+        def overrun(batch):
+            # Our lease ran out and another sender reclaimed the rows.
+            GuestNotification.objects.update(
+                next_attempt_at=timezone.now() + timedelta(minutes=5),
+            )
+            return sender(batch)
+
+        with mock.patch.object(notifications, '_send_emails', side_effect=overrun):
+            outcome = notifications.deliver_due()
+        self.assertEqual(outcome, {})
+        self.assertEqual(
+            set(GuestNotification.objects.values_list('status', flat=True)),
+            {GuestNotification.Status.SENDING},
+        )
+
+    def test_expired_lease_stops_sending(self):
+        with mock.patch.object(notifications, '_lease_expired', return_value=True):
+            notifications.deliver_due()
+        self.assertEqual((len(mail.outbox), len(sms.outbox)), (0, 0))
+
+
+# ── Export ─────────────────────────────────────────────────────────
+
+
+class ExportTests(UsersMixin, TestCase):
+
+    def test_csv_cells_never_start_a_formula(self):
+        make_request(
+            self.manager, guest_name='=HYPERLINK("http://evil")', guest_surname='-2+3',
+            guest_phone='+994501234567', remark='@SUM(A1)',
+        )
+        response = self.client_for(self.manager).get(reverse('qr_requests:export'))
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0]['guest_name'], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(rows[0]['guest_surname'], "'-2+3")
+        self.assertEqual(rows[0]['guest_phone'], '+994501234567')
+        self.assertEqual(rows[0]['remark'], "'@SUM(A1)")
+        self.assertEqual(rows[0]['guest_email'], 'guest@example.com')
+
+
+    def test_numbers_and_phones_export_unchanged(self):
+        for phone in ('+994 50 123-45-67', '-12.5', '+1 (555) 0100'):
+            make_request(self.manager, guest_phone=phone, guest_email=f'{phone}@example.com')
+        make_request(self.manager, guest_phone='+cmd|calc', guest_email='dde@example.com')
+        client = self.client_for(self.manager)
+        rows = list(csv.DictReader(io.StringIO(b''.join(
+            client.get(reverse('qr_requests:export')).streaming_content,
+        ).decode())))
+        self.assertEqual(
+            sorted(row['guest_phone'] for row in rows),
+            sorted(["'+cmd|calc", '+1 (555) 0100', '+994 50 123-45-67', '-12.5']),
+        )
+
+        response = client.get(reverse('qr_requests:export'), {'file_format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertIn('+cmd|calc', {json.loads(line)['guest_phone'] for line in lines})
+
+
+# ── Replica routing ────────────────────────────────────────────────
+
+
+class ReplicaPinTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def bearer_client(self, user):
+        return APIClient(HTTP_AUTHORIZATION=f'Bearer {issue_tokens(user)["token"]}')
+
+    def reads_from_replica(self, client):
+        with mock.patch('core.middleware.set_replica_reads', wraps=set_replica_reads) as reads:
+            self.assertEqual(client.get(reverse('qr_requests:my-list')).status_code, 200)
+        return mock.call(True) in reads.call_args_list
+
+    def test_write_pins_only_that_client_to_the_primary(self):
+        client, other = self.bearer_client(self.manager), self.bearer_client(self.manager)
+        self.assertTrue(self.reads_from_replica(client))
+
+        client.post(reverse('qr_requests:create'), {}, format='json')
+        self.assertFalse(self.reads_from_replica(client))
+        self.assertTrue(self.reads_from_replica(other))
+
+    @override_settings(DEBUG=False)
+    def test_replicas_refuse_a_per_process_cache(self):
+        with mock.patch('core.middleware.replica_aliases', return_value=['replica_1']):
+            with self.assertRaises(ImproperlyConfigured):
+                ReplicaRoutingMiddleware(lambda request: None)
+
+
+# ── Response compression ───────────────────────────────────────────
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=10)
+class CompressionTests(TestCase):
+    body = b'{"results": []}' * 100
+
+    def compress(self, path, response=None):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING='gzip')
+        request.resolver_match = resolve(path)
+        response = response or HttpResponse(self.body, content_type='application/json')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip_length_is_padded_at_random(self):
+        path = reverse('qr_requests:my-list')
+        responses = [self.compress(path) for _ in range(20)]
+        self.assertEqual({r['Content-Encoding'] for r in responses}, {'gzip'})
+        self.assertEqual({gzip.decompress(r.content) for r in responses}, {self.body})
+        self.assertGreater(len({len(r.content) for r in responses}), 1)
+
+    def test_secret_bearing_responses_are_not_compressed(self):
+        for path in (reverse('login'), reverse('token_refresh'), reverse('admin:index')):
+            self.assertNotIn('Content-Encoding', self.compress(path))
+
+        response = HttpResponse(self.body, content_type='application/json')
+        response.set_cookie('csrftoken', 'secret')
+        response = self.compress(reverse('qr_requests:my-list'), response)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response.content, self.body)
+
+
+# ── Request profiling ──────────────────────────────────────────────
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0.0)
+class ProfilingTests(UsersMixin, TestCase):
+
+    def profile(self, client):
+        with mock.patch('core.middleware.RequestProfiler') as profiler:
+            profiler.return_value.start.return_value = False
+            client.get(reverse('qr_requests:all-list'), HTTP_X_PROFILE='1')
+        return profiler.return_value.start.called
+
+    def test_header_starts_a_profile_for_superusers_only(self):
+        self.assertFalse(self.profile(self.client_for(self.manager)))
+        self.assertFalse(self.profile(APIClient(HTTP_AUTHORIZATION='Bearer not-a-token')))
+        self.assertTrue(self.profile(self.client_for(self.reviewer)))
+        token = issue_tokens(self.reviewer)['token']
+        self.assertTrue(self.profile(APIClient(HTTP_AUTHORIZATION=f'Bearer {token}')))
+
+
+# ── NOVUS provisioning store ───────────────────────────────────────
+
+
+class ProvisioningStoreTests(UsersMixin, TestCase):
+
+    def test_pooled_card_is_claimed_once(self):
+        NovusCardPoolEntry.objects.create(novus_card_id='7', qr_number='1001')
+        entry = novus_services.take_pooled_card()
+        self.assertEqual(entry.qr_number, '1001')
+        self.assertIsNone(novus_services.take_pooled_card())
+
+        novus_services.release_pooled_card(entry)
+        self.assertEqual(novus_services.card_pool_available(), 1)
+
+        entry = novus_services.take_pooled_card()
+        NovusCardPoolEntry.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(novus_services.release_stale_card_claims(timedelta(minutes=5), ['7']), 0)
+        self.assertFalse(NovusCardPoolEntry.objects.exists())
+
+    @override_settings(NOVUS_IDENTITY_VERIFY='never')
+    def test_returning_guest_reuses_the_novus_user(self):
+        NovusGuestIdentity.objects.create(email='guest@example.com', novus_user_id='42')
+        qr_request = make_request(self.manager, guest_email=' Guest@Example.com')
+        with mock.patch.object(novus_services, 'create_guest_user') as create:
+            self.assertEqual(novus_services.resolve_guest_user(None, 'token', qr_request), 42)
+        create.assert_not_called()
+
+        other = make_request(self.manager, guest_email='new@example.com')
+        with mock.patch.object(novus_services, 'create_guest_user', return_value=43):
+            self.assertEqual(novus_services.resolve_guest_user(None, 'token', other), 43)
+        self.assertEqual(NovusGuestIdentity.objects.get(email='new@example.com').novus_user_id, '43')
+
+
+@override_settings(NOVUS_IDENTITY_VERIFY='stale', NOVUS_IDENTITY_VERIFY_AFTER_DAYS=30)
+class IdentityReuseTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.identity = NovusGuestIdentity.objects.create(
+            email='guest@example.com', phone='+994501234567', novus_user_id='42',
+        )
+        self.qr_request = make_request(self.manager)
+
+    def resolve(self, qr_request=None, found=True):
+        with mock.patch.object(
+            novus_services, 'get_guest_user', return_value={'id': 42} if found else None,
+        ) as lookup, mock.patch.object(novus_services, 'create_guest_user', return_value=43) as create:
+            user_id = novus_services.resolve_guest_user(None, 'token', qr_request or self.qr_request)
+        return user_id, lookup.called, create.called
+
+    def age(self, days):
+        NovusGuestIdentity.objects.update(verified_at=timezone.now() - timedelta(days=days))
+
+    def test_fresh_identity_is_reused_without_asking_novus(self):
+        self.age(1)
+        self.assertEqual(self.resolve(), (42, False, False))
+
+    def test_stale_identity_is_verified_first(self):
+        self.age(31)
+        self.assertEqual(self.resolve(), (42, True, False))
+        self.identity.refresh_from_db()
+        self.assertLess(timezone.now() - self.identity.verified_at, timedelta(minutes=1))
+
+    def test_identity_novus_no_longer_has_is_replaced(self):
+        self.age(31)
+        self.assertEqual(self.resolve(found=False), (43, True, True))
+        self.assertEqual(NovusGuestIdentity.objects.get().novus_user_id, '43')
+
+    def test_phone_match_is_opt_in(self):
+        self.age(1)
+        other = make_request(self.manager, guest_email='other@example.com', guest_phone='+994 50 123 45 67')
+        self.assertEqual(self.resolve(other), (43, False, True))
+        with self.settings(NOVUS_IDENTITY_MATCH_PHONE=True):
+            NovusGuestIdentity.objects.filter(email='other@example.com').delete()
+            self.assertEqual(self.resolve(other), (42, False, False))
+
+
+# ── NOVUS limiter ──────────────────────────────────────────────────
+
+
+class LimiterDirMixin:
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        limits = override_settings(
+            NOVUS_LIMITER_ENABLED=True, NOVUS_LIMITER_DIR=directory.name,
+            NOVUS_LIMITER_WAIT_TIMEOUT=0.05, NOVUS_LIMITS={'default': {'concurrency': 1}},
+        )
+        limits.enable()
+        self.addCleanup(limits.disable)
+
+
+class LimiterTests(LimiterDirMixin, SimpleTestCase):
+
+    def test_endpoint_key(self):
+        self.assertEqual(endpoint_key('/api/Users/42?expand=1'), '/api/Users')
+        self.assertEqual(endpoint_key('api/Cards'), '/api/Cards')
+
+    def test_concurrency_is_shared_between_processes(self):
+        # Separate limiters open their own slot files, like two workers.
+        worker, other = NovusLimiter(), NovusLimiter()
+        with worker.acquire('/api/Users/1'):
+            with self.assertRaises(NovusBusyError):
+                with other.acquire('/api/Users/2'):
+                    pass
+            # Limits are per endpoint.
+            with other.acquire('/api/Cards'):
+                pass
+        with other.acquire('/api/Users/2') as waited:
+            self.assertLess(waited, 0.05)
+
+    @override_settings(NOVUS_LIMITS={'/api/Users': {'rate': 1, 'burst': 2}})
+    def test_rate_allows_a_burst_then_refuses_past_the_timeout(self):
+        limiter = NovusLimiter()
+        for _ in range(2):
+            with limiter.acquire('/api/Users'):
+                pass
+        with self.assertRaises(NovusBusyError):
+            with limiter.acquire('/api/Users'):
+                pass
+
+    @override_settings(NOVUS_LIMITER_ENABLED=False)
+    def test_disabled_limiter_never_waits(self):
+        limiter = NovusLimiter()
+        with limiter.acquire('/api/Users'), limiter.acquire('/api/Users') as waited:
+            self.assertEqual(waited, 0.0)
+
+
+class LimiterForkTests(LimiterDirMixin, TestCase):
+
+    def test_reset_drops_slot_files_shared_with_the_master(self):
+        limiter = NovusLimiter()
+        with limiter.acquire('/api/Users'):
+            pass
+        # The master's copy of the slot file, held while a worker runs.
+        master = os.dup(limiter._slots['/api/Users']._fds[0])
+        self.addCleanup(os.close, master)
+        fcntl.flock(master, fcntl.LOCK_EX)
+
+        limiter.reset()
+        with self.assertRaises(NovusBusyError):
+            with limiter.acquire('/api/Users'):
+                pass
+
+    def test_after_fork_resets_the_limiter(self):
+        with mock.patch('novus.limiter.limiter.reset') as reset:
+            after_fork()
+        reset.assert_called_once()
+
+
+# ── Credential renewal ─────────────────────────────────────────────
+
+
+class RenewCredentialsTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        soon = timezone.now() + timedelta(days=5)
+        self.due = [
+            make_request(
+                self.manager, status=GuestQRRequest.Status.APPROVED, qr_number=f'70{n}',
+                novus_user_id=str(n), novus_card_id=str(n), novus_credential_id=str(100 + n),
+                credential_expires_at=soon + timedelta(minutes=n),
+            )
+            for n in range(3)
+        ]
+        self.later = make_request(
+            self.manager, status=GuestQRRequest.Status.APPROVED, qr_number='799',
+            novus_user_id='9', novus_card_id='9', novus_credential_id='109',
+            credential_expires_at=timezone.now() + timedelta(days=90),
+        )
+        self.renewed = []
+        token = mock.patch(
+            'qr_requests.management.commands.renew_credentials.SharedToken',
+            return_value=SimpleNamespace(client=None, call=lambda fn: fn('token')),
+        )
+        client = mock.patch('qr_requests.management.commands.renew_credentials.get_client')
+        renew = mock.patch(
+            'qr_requests.management.commands.renew_credentials.renew_credential',
+            side_effect=self.renew,
+        )
+        for patcher in (token, client, renew):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def renew(self, client, token, *, novus_credential_id, **fields):
+        if novus_credential_id == 101:
+            raise NovusAPIError('Credential locked', status_code=409)
+        self.renewed.append(novus_credential_id)
+
+    def run_command(self, *args):
+        call_command('renew_credentials', '--days=30', '--batch-size=2', *args,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_renews_due_credentials_in_batches(self):
+        before = {r.pk: r.credential_expires_at for r in self.due}
+        self.run_command()
+        self.assertEqual(sorted(self.renewed), [100, 102])
+        for qr_request in self.due:
+            qr_request.refresh_from_db()
+        self.assertGreater(self.due[0].credential_expires_at, before[self.due[0].pk])
+        self.assertEqual(self.due[1].credential_expires_at, before[self.due[1].pk])
+        self.assertGreater(self.due[2].credential_expires_at, before[self.due[2].pk])
+
+    def test_dry_run_calls_nothing(self):
+        self.run_command('--dry-run')
+        self.assertEqual(self.renewed, [])
+
+    def test_resumes_from_the_checkpoint(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'renew.json')
+        first = self.due[1]
+        with open(path, 'w') as fh:
+            json.dump({
+                'cutoff': (timezone.now() + timedelta(days=30)).isoformat(),
+                'cursor': [first.credential_expires_at.isoformat(), str(first.pk)],
+                'renewed': 1, 'failed': 1,
+            }, fh)
+        self.run_command(f'--checkpoint={path}')
+        self.assertEqual(self.renewed, [102])
+        with open(path) as fh:
+            state = json.load(fh)
+        self.assertEqual((state['done'], state['renewed'], state['failed']), (True, 2, 1))
+
+
+# ── Retention ──────────────────────────────────────────────────────
+
+
+class ArchiveTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        old = timezone.now() - timedelta(days=120)
+        Status = GuestQRRequest.Status
+        self.old_rejected = make_request(self.manager, status=Status.REJECTED)
+        self.expired = make_request(
+            self.manager, status=Status.APPROVED, qr_number='900', credential_expires_at=old,
+        )
+        self.kept = [
+            make_request(self.manager, status=Status.REJECTED),
+            make_request(self.manager, status=Status.APPROVED, qr_number='901',
+                         credential_expires_at=timezone.now() + timedelta(days=10)),
+            make_request(self.manager),
+        ]
+        GuestQRRequest.objects.filter(pk=self.old_rejected.pk).update(updated_at=old)
+
+    def archive(self, *args):
+        with mock.patch('qr_requests.management.commands.archive_requests.time.sleep'):
+            call_command('archive_requests', *args, stdout=io.StringIO())
+
+    def test_moves_due_requests_in_chunks(self):
+        self.archive('--batch-size=1', '--max-rows=1')
+        self.assertEqual(ArchivedQRRequest.objects.count(), 1)
+
+        self.archive('--batch-size=1')
+        self.assertEqual(
+            set(ArchivedQRRequest.objects.values_list('pk', flat=True)),
+            {self.old_rejected.pk, self.expired.pk},
+        )
+        self.assertEqual(
+            set(GuestQRRequest.objects.values_list('pk', flat=True)),
+            {r.pk for r in self.kept},
+        )
+        self.assertEqual(ArchivedQRRequest.objects.get(pk=self.expired.pk).qr_number, '900')
+
+    def test_dry_run_moves_nothing(self):
+        self.archive('--dry-run')
+        self.assertFalse(ArchivedQRRequest.objects.exists())
+
+    def test_archive_is_scoped_to_the_owner(self):
+        self.archive()
+        other = User.objects.create_user('other', role=User.Role.MANAGER)
+        url = reverse('qr_requests:archive-list')
+
+        def count(user):
+            return self.client_for(user).get(url).data['count']
+
+        self.assertEqual((count(self.manager), count(other), count(self.reviewer)), (2, 0, 2))
+
+
+# ── NOVUS reconciliation ───────────────────────────────────────────
+
+
+class ReconciliationTests(UsersMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.expires_at = timezone.now() + timedelta(days=100)
+        self.qr_request = make_request(
+            self.manager, status=GuestQRRequest.Status.APPROVED, qr_number='800',
+            novus_user_id='1', novus_card_id='2', novus_credential_id='3',
+            credential_expires_at=self.expires_at,
+        )
+        self.reconciler = Reconciler(SimpleNamespace(client=None, call=lambda fn: fn('token')))
+
+    def check(self, user=True, card=None, credential=None):
+        card = {'number': '800'} if card is None else card
+        credential = credential or {
+            'userId': 1, 'cards': [2], 'expirationDate': self.expires_at.isoformat(),
+        }
+        with mock.patch('novus.reconciliation.get_guest_user', return_value={'id': 1} if user else None), \
+                mock.patch('novus.reconciliation.get_qr_card', return_value=card or None), \
+                mock.patch('novus.reconciliation.get_credential', return_value=credential):
+            return [kind for kind, _ in self.reconciler.check_request(self.qr_request)]
+
+    def test_kinds_match_the_model(self):
+        kinds = {value for name, value in vars(Kind).items() if name.isupper()}
+        self.assertEqual(kinds, set(NovusDiscrepancy.Kind.values))
+
+    def test_findings(self):
+        self.assertEqual(self.check(), [])
+        self.assertEqual(self.check(card={'number': '801'}), [Kind.CARD_NUMBER])
+        self.assertEqual(self.check(card={}), [Kind.CARD_MISSING])
+        later = (self.expires_at + timedelta(days=2)).isoformat()
+        self.assertEqual(
+            self.check(credential={'userId': 9, 'qrCodes': [2], 'expirationDate': later}),
+            [Kind.CREDENTIAL_LINK, Kind.CREDENTIAL_EXPIRY],
+        )
+
+    def test_users_are_fetched_once(self):
+        self.reconciler._users['1'] = False
+        self.assertEqual(self.check(user=True), [Kind.USER_MISSING])
+
+    def test_record_findings_resolves_what_is_gone(self):
+        self.assertEqual(record_findings({self.qr_request: [
+            (Kind.CARD_MISSING, {}), (Kind.CREDENTIAL_EXPIRY, {}),
+        ]}), 2)
+        record_findings({self.qr_request: [(Kind.CARD_MISSING, {'seen': 2})]})
+        open_kinds = NovusDiscrepancy.objects.filter(resolved_at__isnull=True)
+        self.assertEqual(list(open_kinds.values_list('kind', 'detail')), [(Kind.CARD_MISSING, {'seen': 2})])
+
+        record_findings({self.qr_request: []})
+        self.assertFalse(open_kinds.exists())
+        self.assertEqual(NovusDiscrepancy.objects.count(), 2)
+
+
+# ── Gate verification ──────────────────────────────────────────────
+
+
+@override_settings(QR_VERIFY_SYNC_SECONDS=0, QR_VERIFY_RELOAD_SECONDS=600)
+class VerificationTests(UsersMixin, TestCase):
+
+    def approved(self, qr_number, **fields):
+        return make_request(
+            self.manager, status=GuestQRRequest.Status.APPROVED, qr_number=qr_number, **fields,
+        )
+
+    def test_only_superusers_and_scanners_verify(self):
+        self.approved('5001')
+        scanner = User.objects.create_user('gate', role=User.Role.MANAGER)
+        scanner.user_permissions.add(Permission.objects.get(codename='verify_qr'))
+        url = reverse('qr_requests:verify', args=['5001'])
+
+        self.assertEqual(self.client_for(self.manager).get(url).status_code, 403)
+        for user in (scanner, self.reviewer):
+            response = self.client_for(user).get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['manager'], 'manager')
+
+    def test_delta_sync_picks_up_other_workers_changes(self):
+        index = QRVerificationIndex()
+        index.load()
+        self.assertIsNone(index.lookup('5002'))
+
+        # Written by another worker: no signal reaches this index.
+        qr_request = make_request(self.manager)
+        GuestQRRequest.objects.filter(pk=qr_request.pk).update(
+            status=GuestQRRequest.Status.APPROVED, qr_number='5002', updated_at=timezone.now(),
+        )
+        self.assertEqual(index.lookup('5002').request_id, str(qr_request.pk))
+
+        GuestQRRequest.objects.filter(pk=qr_request.pk).update(
+            status=GuestQRRequest.Status.REJECTED, updated_at=timezone.now(),
+        )
+        self.assertIsNone(index.lookup('5002'))
+
+    def test_record_changed_reuses_known_manager_names(self):
+        self.approved('5003')
+        index = QRVerificationIndex()
+        index.load()
+        qr_request = GuestQRRequest.objects.get(qr_number='5003')
+        qr_request.guest_name = 'Renamed'
+        with self.assertNumQueries(0):
+            index.record_changed(qr_request)
+        self.assertEqual(index._entries['5003'].guest_name, 'Renamed')
+        self.assertEqual(index._entries['5003'].manager, 'manager')
+
+
+# ── Batch lookup ───────────────────────────────────────────────────
+
+
+class BatchLookupTests(UsersMixin, TestCase):
+
+    def lookup(self, user, ids):
+        client = self.client_for(user) if user else APIClient()
+        return client.post(reverse('qr_requests:batch'), {'ids': ids}, format='json')
+
+    def test_results_keep_order_and_list_missing_ids(self):
+        first, second = make_request(self.manager), make_request(self.manager)
+        unknown = uuid.uuid4()
+        ids = [str(second.pk), str(first.pk), str(second.pk), str(unknown)]
+        response = self.lookup(self.manager, ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r['id'] for r in response.data['results']], [str(second.pk), str(first.pk)],
+        )
+        self.assertEqual(response.data['missing'], [str(unknown)])
+
+        query = ','.join(ids)
+        response = self.client_for(self.manager).get(reverse('qr_requests:batch'), {'ids': query})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_managers_only_see_their_own(self):
+        other_manager = User.objects.create_user('manager2', role=User.Role.MANAGER)
+        theirs = make_request(other_manager)
+        response = self.lookup(self.manager, [str(theirs.pk)])
+        self.assertEqual(response.data['missing'], [str(theirs.pk)])
+        self.assertEqual(len(self.lookup(self.reviewer, [str(theirs.pk)]).data['results']), 1)
+        self.assertEqual(self.lookup(None, [str(theirs.pk)]).status_code, 401)
+
+    @override_settings(REQUEST_BATCH_MAX=2)
+    def test_size_cap_and_malformed_ids(self):
+        ids = [str(uuid.uuid4()) for _ in range(3)]
+        self.assertEqual(self.lookup(self.manager, ids).status_code, 400)
+        self.assertEqual(self.lookup(self.manager, ['not-a-uuid']).status_code, 400)
+        self.assertEqual(self.lookup(self.manager, 'not-a-list').status_code, 400)
+
+
+# ── Bulk import ────────────────────────────────────────────────────
+
+
+@override_settings(IMPORT_CHUNK_SIZE=10, IMPORT_MAX_ROWS=100)
+class ImportTests(UsersMixin, TestCase):
+    header = ['Guest Name', 'guest_surname', 'guest_email', 'guest_phone']
+    rows = [
+        ['Ann', 'One', 'ann@example.com', '+994501234567'],
+        ['Bob', 'Two', 'not-an-email', ''],
+        ['Cem', 'Three', 'cem@example.com', ''],
+        ['Dan', 'Four', 'dan@example.com', ''],
+    ]
+
+    def upload(self, upload):
+        return self.client_for(self.manager).post(
+            reverse('qr_requests:import'), {'file': upload}, format='multipart',
+        )
+
+    def csv_file(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([self.header, *rows])
+        return SimpleUploadedFile('guests.csv', buffer.getvalue().encode(), 'text/csv')
+
+    def test_csv_reports_invalid_rows_and_inserts_the_rest(self):
+        response = self.upload(self.csv_file(self.rows))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (3, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertIn('guest_email', response.data['errors'][0]['errors'])
+        self.assertEqual(
+            GuestQRRequest.objects.get(guest_name='Ann').guest_phone, '+994501234567',
+        )
+
+    @skipUnless(openpyxl, 'openpyxl is not installed')
+    def test_xlsx(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for row in [self.header, *self.rows[:1]]:
+            sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        response = self.upload(SimpleUploadedFile('guests.xlsx', buffer.getvalue()))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+
+    @override_settings(QUOTA_REQUESTS_PER_DAY=2)
+    def test_quota_inserts_what_fits(self):
+        response = self.upload(self.csv_file(self.rows))
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['quota_exceeded']['row'], 5)
+        self.assertEqual(GuestQRRequest.objects.count(), 2)
+
+    @override_settings(IMPORT_MAX_ROWS=2)
+    def test_rows_past_the_limit_are_reported(self):
+        response = self.upload(self.csv_file(self.rows))
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['truncated_at']['row'], 4)
+        self.assertNotIn('quota_exceeded', response.data)
+
+    def test_missing_columns_are_rejected(self):
+        upload = SimpleUploadedFile('guests.csv', b'guest_name\nAnn\n', 'text/csv')
+        response = self.upload(upload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('guest_email', response.data['detail'])
+
+
+# ── Tracing ────────────────────────────────────────────────────────
+
+
+class TracingTests(SimpleTestCase):
+    trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+    def traceparent(self, flags):
+        return f'00-{self.trace_id}-00f067aa0ba902b7-{flags}'
+
+    def test_traceparent_parsing(self):
+        self.assertEqual(
+            tracing._parse_traceparent(self.traceparent('01')),
+            (self.trace_id, '00f067aa0ba902b7', True),
+        )
+        for header in (
+            None, '', 'garbage', f'00-{self.trace_id}-00f067aa0ba902-01',
+            f'00-{"0" * 32}-00f067aa0ba902b7-01', f'00-{"x" * 32}-00f067aa0ba902b7-01',
+        ):
+            self.assertIsNone(tracing._parse_traceparent(header), header)
+
+    @override_settings(TRACING_ENABLED=True, TRACING_SAMPLE_RATE=1.0)
+    def test_caller_can_only_veto_sampling(self):
+        with tracing.start_trace(self.traceparent('01')) as trace:
+            self.assertEqual((trace.trace_id, trace.sampled), (self.trace_id, True))
+        with tracing.start_trace(self.traceparent('00')) as trace:
+            self.assertFalse(trace.sampled)
+        with self.settings(TRACING_SAMPLE_RATE=0.0):
+            with tracing.start_trace(self.traceparent('01')) as trace:
+                self.assertFalse(trace.sampled)
+
+    def test_full_queue_drops_spans_instead_of_blocking(self):
+        exporting, proceed, exported = threading.Event(), threading.Event(), []
+
+        class SlowExporter(tracing.SpanExporter):
+            batch_size = 1
+
+            def export(self, batch):
+                exporting.set()
+                proceed.wait(5)
+                exported.extend(batch)
+
+        exporter = SlowExporter(max_queue=2)
+        self.addCleanup(proceed.set)
+
+        def span(n):
+            return tracing.Span(f's{n}', self.trace_id, f'{n:016x}', None, 0, 0)
+
+        exporter.submit(span(0))
+        self.assertTrue(exporting.wait(5))
+        for n in range(1, 10):
+            exporter.submit(span(n))  # returns at once; only two fit
+        proceed.set()
+        exporter.flush()
+        self.assertEqual([s.name for s in exported], ['s0', 's1', 's2'])
+
+
+# ── Database profiles ──────────────────────────────────────────────
+
+
+class DatabaseConfigTests(TestCase):
+    base_dir = tempfile.gettempdir()
+
+    def config(self, raw, **env):
+        with mock.patch.dict(os.environ, env):
+            return database_config(Path(self.base_dir), raw)
+
+    def test_sqlite_profile(self):
+        config = self.config('sqlite:////srv/guest.db', SQLITE_BUSY_TIMEOUT_MS='2500')
+        self.assertEqual(config['NAME'], '/srv/guest.db')
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(config['OPTIONS']['timeout'], 2.5)
+        self.assertIn('PRAGMA journal_mode=WAL;', config['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA busy_timeout=2500;', config['OPTIONS']['init_command'])
+        self.assertEqual(self.config('')['NAME'], Path(self.base_dir) / 'db.sqlite3')
+
+    def test_connections_apply_the_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], int(sqlite_pragmas()['busy_timeout']))
+
+    def test_postgres_profile(self):
+        url = 'postgres://app:p%40ss@db:6432/guests?sslmode=require'
+        config = self.config(url, DB_CONN_MAX_AGE='30')
+        self.assertEqual(
+            (config['USER'], config['PASSWORD'], config['HOST'], config['PORT'], config['NAME']),
+            ('app', 'p@ss', 'db', '6432', 'guests'),
+        )
+        self.assertEqual(config['CONN_MAX_AGE'], 30)
+        self.assertEqual(config['OPTIONS'], {'sslmode': 'require'})
+
+        pooled = self.config(url, DB_POOL='True', DB_POOL_MAX_SIZE='4')
+        self.assertEqual(pooled['CONN_MAX_AGE'], 0)
+        self.assertEqual(pooled['OPTIONS']['pool']['max_size'], 4)
+
+        with self.assertRaises(ValueError):
+            self.config('mysql://db/guests')
+
+    def test_replicas_mirror_default_in_tests(self):
+        with mock.patch.dict(os.environ, {'DATABASE_REPLICA_URLS': 'postgres://r1/g, postgres://r2/g'}):
+            replicas = replica_configs(Path(self.base_dir))
+        self.assertEqual(list(replicas), ['replica_1', 'replica_2'])
+        self.assertEqual(replicas['replica_2']['HOST'], 'r2')
+        self.assertEqual(replicas['replica_1']['TEST'], {'MIRROR': 'default'})
+
+
+# ── Logging ────────────────────────────────────────────────────────
+
+
+class LoggingTests(UsersMixin, TestCase):
+
+    def record(self, name='novus.client', level=logging.INFO, **extra):
+        record = logging.makeLogRecord({'name': name, 'levelno': level, 'msg': 'call %s', 'args': ('x',)})
+        record.__dict__.update(extra)
+        return record
+
+    def test_access_line_carries_request_and_user(self):
+        with logs.redirect_output(io.StringIO()) as output:
+            response = self.client_for(self.manager).get(
+                reverse('qr_requests:all-list'),
+                HTTP_TRACEPARENT='00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01',
+            )
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        access = [line for line in lines if line['logger'] == 'core.requests']
+        self.assertEqual(len(access), 1)
+        self.assertEqual(access[0]['status_code'], response.status_code)
+        self.assertEqual(access[0]['request_id'], '4bf92f3577b34da6a3ce929d0e0e4736')
+        self.assertEqual(access[0]['user_id'], str(self.manager.pk))
+        self.assertIn('duration_ms', access[0])
+
+    def test_json_formatter(self):
+        record = self.record(duration_ms=12.5, user_id='7', request_id='-')
+        entry = json.loads(logs.JsonFormatter().format(record))
+        self.assertEqual(
+            (entry['logger'], entry['message'], entry['duration_ms'], entry['user_id']),
+            ('novus.client', 'call x', 12.5, '7'),
+        )
+        self.assertNotIn('request_id', entry)
+
+    def test_sampling_is_decided_per_trace(self):
+        sampling = logs.SamplingFilter({'novus': 0.5, 'novus.auth': 0})
+        self.assertTrue(sampling.filter(self.record(level=logging.WARNING)))
+        self.assertFalse(sampling.filter(self.record(name='novus.auth')))
+        self.assertTrue(sampling.filter(self.record(name='core.requests')))
+        for trace_id, kept in (('0' * 24 + '00000001', True), ('0' * 24 + 'ffffffff', False)):
+            with mock.patch('core.logs.tracing.current_trace_id', return_value=trace_id):
+                self.assertEqual(
+                    [sampling.filter(self.record()) for _ in range(5)], [kept] * 5,
+                )
+
+    def test_full_queue_drops_records(self):
+        output = io.StringIO()
+        handler = logs.QueueHandler(stream=output, maxsize=2)
+        self.addCleanup(handler.close)
+        handler.listener.stop()
+        for _ in range(5):
+            handler.handle(self.record())
+        self.assertEqual(handler.dropped, 3)
+
+        handler.listener.start()
+        handler.flush()
+        self.assertEqual(output.getvalue().splitlines(), ['call x', 'call x'])
@@ -11,28 +11,65 @@ urlpatterns = [
         views.QRRequestCreateView.as_view(),
         name='create',
     ),
+    path(
+        'import/',
+        views.QRRequestImportView.as_view(),
+        name='import',
+    ),
     path(
         'my/',
         views.QRRequestMyListView.as_view(),
         name='my-list',
     ),
+    path(
+        'quota/',
+        views.QRRequestQuotaView.as_view(),
+        name='quota',
+    ),
     path(
         '<uuid:pk>/',
         views.QRRequestDeleteView.as_view(),
         name='delete',
     ),
 
+    # Batch lookup by IDs (manager: own, superuser: all)
+    path(
+        'batch/',
+        views.QRRequestBatchView.as_view(),
+        name='batch',
+    ),
+
     # SuperUser endpoints
     path(
         'all/',
         views.QRRequestAllListView.as_view(),
         name='all-list',
     ),
+    path(
+        'export/',
+        views.QRRequestExportView.as_view(),
+        name='export',
+    ),
     path(
         'pending/',
         views.QRRequestPendingListView.as_view(),
         name='pending-list',
     ),
+    path(
+        'queue/',
+        views.ReviewQueueView.as_view(),
+        name='review-queue',
+    ),
+    path(
+        'queue/claim/',
+        views.ReviewQueueClaimView.as_view(),
+        name='review-queue-claim',
+    ),
+    path(
+        'queue/release/',
+        views.ReviewQueueReleaseView.as_view(),
+        name='review-queue-release',
+    ),
     path(
         '<uuid:pk>/approve/',
         views.QRRequestApproveView.as_view(),
@@ -44,6 +81,42 @@ urlpatterns = [
         name='reject',
     ),
 
+    # Guest notification status (manager: own, superuser: all)
+    path(
+        '<uuid:pk>/notifications/',
+        views.QRRequestNotificationListView.as_view(),
+        name='notifications',
+    ),
+
+    # Archive (manager: own, superuser: all)
+    path(
+        'archive/',
+        views.QRRequestArchiveListView.as_view(),
+        name='archive-list',
+    ),
+    path(
+        'archive/<uuid:pk>/',
+        views.QRRequestArchiveDetailView.as_view(),
+        name='archive-detail',
+    ),
+
+    # Gate verification (superusers and accounts with qr_requests.verify_qr)
+    path(
+        'verify/',
+        views.QRVerifyBatchView.as_view(),
+        name='verify-batch',
+    ),
+    path(
+        'verify/snapshot/',
+        views.QRVerifySnapshotView.as_view(),
+        name='verify-snapshot',
+    ),
+    path(
+        'verify/<str:qr_number>/',
+        views.QRVerifyView.as_view(),
+        name='verify',
+    ),
+
     # QR Code download (accessible by manager and superuser)
     path(
         '<uuid:pk>/qr-code/',
@@ -0,0 +1,228 @@
+"""
+In-memory index of active QR numbers for gate verification.
+
+Each worker process keeps ``qr_number → VerifiedGuest`` for every
+approved request.  The index is
+
+* loaded in full on first use (or at startup, see core.wsgi),
+* updated immediately in this process by the approve/reject/delete
+  signals (``record_changed`` / ``record_removed``),
+* caught up with changes made by other workers by a delta query on
+  ``updated_at`` at most every ``QR_VERIFY_SYNC_SECONDS``,
+* rebuilt from scratch every ``QR_VERIFY_RELOAD_SECONDS`` so rows
+  deleted by other processes eventually disappear.
+
+Lookups are a dict access; only the request that triggers a sync pays
+for the query, the others keep reading the current snapshot.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import GuestQRRequest
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = (
+    'pk', 'qr_number', 'status', 'guest_name', 'guest_surname',
+    'manager__username', 'credential_expires_at', 'manager_id',
+)
+
+# Delta syncs re-read this much history, so rows committed just after a
+# sync with an earlier updated_at are not missed. Re-applying is harmless.
+_SYNC_OVERLAP = timedelta(seconds=10)
+
+
+@dataclass(frozen=True, slots=True)
+class VerifiedGuest:
+    request_id: str
+    qr_number: str
+    guest_name: str
+    guest_surname: str
+    manager: str
+    expires_at: datetime | None
+
+    def is_active(self, now: datetime) -> bool:
+        return self.expires_at is None or self.expires_at > now
+
+
+class QRVerificationIndex:
+
+    def __init__(self):
+        self._entries: dict[str, VerifiedGuest] = {}
+        self._by_request: dict[str, str] = {}
+        # manager_id → username, so record_changed() needs no query for
+        # managers already seen in a load or sync.
+        self._managers: dict = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._loaded = False
+        self._watermark = None
+        self._synced_at = 0.0
+        self._reloaded_at = 0.0
+        self._version = None
+
+    # ── reads ──────────────────────────────────────────────────────
+
+    def lookup(self, qr_number: str) -> VerifiedGuest | None:
+        self._maybe_sync()
+        return self._entries.get(qr_number)
+
+    def lookup_many(self, qr_numbers) -> dict[str, VerifiedGuest | None]:
+        self._maybe_sync()
+        entries = self._entries
+        return {number: entries.get(number) for number in qr_numbers}
+
+    def snapshot(self) -> tuple[str, list[VerifiedGuest]]:
+        """Return ``(version, entries)``; the version changes with the content."""
+        self._maybe_sync()
+        with self._lock:
+            if self._version is None:
+                self._version = self._digest()
+            return self._version, list(self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ── loading ────────────────────────────────────────────────────
+
+    def load(self) -> None:
+        """(Re)build the index from the database."""
+        with self._sync_lock:
+            self._load()
+
+    def _load(self) -> None:
+        started = time.monotonic()
+        started_at = timezone.now()
+        rows = (
+            GuestQRRequest.objects
+            .filter(status=GuestQRRequest.Status.APPROVED, qr_number__isnull=False)
+            .values_list(*_FIELDS)
+            .iterator(chunk_size=5000)
+        )
+        entries, by_request, managers = {}, {}, {}
+        for row in rows:
+            guest = _guest(row)
+            entries[guest.qr_number] = guest
+            by_request[guest.request_id] = guest.qr_number
+            managers[row[7]] = guest.manager
+        with self._lock:
+            self._entries = entries
+            self._by_request = by_request
+            self._managers = managers
+            self._watermark = started_at - _SYNC_OVERLAP
+            self._loaded = True
+            self._version = None
+        self._synced_at = self._reloaded_at = time.monotonic()
+        logger.info(
+            'QR verification index loaded: %d codes in %.0f ms.',
+            len(entries), (time.monotonic() - started) * 1000,
+        )
+
+    def _maybe_sync(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._synced_at < settings.QR_VERIFY_SYNC_SECONDS:
+            return
+        blocking = not self._loaded
+        if not self._sync_lock.acquire(blocking=blocking):
+            return  # another thread is syncing; serve the current snapshot
+        try:
+            if not self._loaded or now - self._reloaded_at >= settings.QR_VERIFY_RELOAD_SECONDS:
+                self._load()
+            elif now - self._synced_at >= settings.QR_VERIFY_SYNC_SECONDS:
+                self._sync()
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self) -> None:
+        started_at = timezone.now()
+        rows = list(
+            GuestQRRequest.objects
+            .filter(updated_at__gte=self._watermark)
+            .values_list(*_FIELDS)
+        )
+        for row in rows:
+            self._managers[row[7]] = row[5]
+            if row[2] == GuestQRRequest.Status.APPROVED and row[1]:
+                self._put(_guest(row))
+            else:
+                self._discard(str(row[0]))
+        self._watermark = started_at - _SYNC_OVERLAP
+        self._synced_at = time.monotonic()
+
+    # ── incremental updates ────────────────────────────────────────
+
+    def record_changed(self, qr_request) -> None:
+        if not self._loaded:
+            return
+        if qr_request.status == GuestQRRequest.Status.APPROVED and qr_request.qr_number:
+            self._put(VerifiedGuest(
+                request_id=str(qr_request.pk),
+                qr_number=qr_request.qr_number,
+                guest_name=qr_request.guest_name,
+                guest_surname=qr_request.guest_surname,
+                manager=self._manager_name(qr_request),
+                expires_at=qr_request.credential_expires_at,
+            ))
+        else:
+            self._discard(str(qr_request.pk))
+
+    def _manager_name(self, qr_request) -> str:
+        username = self._managers.get(qr_request.manager_id)
+        if username is None:
+            # Loaded unless cached on the instance; once per new manager.
+            username = self._managers[qr_request.manager_id] = qr_request.manager.username
+        return username
+
+    def record_removed(self, request_id) -> None:
+        if self._loaded:
+            self._discard(str(request_id))
+
+    def _put(self, guest: VerifiedGuest) -> None:
+        with self._lock:
+            previous = self._by_request.get(guest.request_id)
+            if previous is not None and previous != guest.qr_number:
+                self._entries.pop(previous, None)
+            if self._entries.get(guest.qr_number) == guest:
+                return
+            self._entries[guest.qr_number] = guest
+            self._by_request[guest.request_id] = guest.qr_number
+            self._version = None
+
+    def _discard(self, request_id: str) -> None:
+        with self._lock:
+            qr_number = self._by_request.pop(request_id, None)
+            if qr_number is not None:
+                self._entries.pop(qr_number, None)
+                self._version = None
+
+    def _digest(self) -> str:
+        # Content-derived, so every worker reports the same version (and
+        # ETag) for the same set of codes. Computed lazily on snapshot.
+        digest = hashlib.sha1()
+        for qr_number in sorted(self._entries):
+            guest = self._entries[qr_number]
+            digest.update(f'{qr_number}|{guest.request_id}|{guest.expires_at}\n'.encode())
+        return digest.hexdigest()[:16]
+
+
+def _guest(row) -> VerifiedGuest:
+    pk, qr_number, _, name, surname, manager, expires_at, _ = row
+    return VerifiedGuest(
+        request_id=str(pk),
+        qr_number=qr_number,
+        guest_name=name,
+        guest_surname=surname,
+        manager=manager,
+        expires_at=expires_at,
+    )
+
+
+index = QRVerificationIndex()
@@ -1,21 +1,46 @@
-import io
-
-import qrcode
-from django.http import HttpResponse
-from rest_framework import status
-from rest_framework.generics import CreateAPIView, GenericAPIView, ListAPIView
+import csv
+import re
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.generics import (
+    CreateAPIView,
+    GenericAPIView,
+    ListAPIView,
+    RetrieveAPIView,
+)
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from accounts.permissions import IsManager, IsSuperUser
-from .models import GuestQRRequest
+from accounts.permissions import CanVerifyQR, IsManager, IsSuperUser
+from core import tracing
+from .filters import apply_request_filters
+from .idempotency import idempotent
+from .importers import ImportFormatError, iter_rows
+from .models import ArchivedQRRequest, GuestNotification, GuestQRRequest
+from .qrimage import render_qr_png
+from . import queue as review_queue
+from . import quotas
 from .serializers import (
     ApproveSerializer,
+    ArchivedQRRequestSerializer,
+    GuestNotificationSerializer,
     GuestQRRequestCreateSerializer,
     GuestQRRequestListSerializer,
+    QuotaSerializer,
     RejectSerializer,
+    ReviewClaimSerializer,
+    ReviewReleaseSerializer,
 )
+from .verification import index as verification_index
 
 
 # ── Manager Endpoints ────────────────────────────────────────────────
@@ -27,6 +52,118 @@ class QRRequestCreateView(CreateAPIView):
     serializer_class = GuestQRRequestCreateSerializer
     permission_classes = [IsManager]
 
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class QRRequestImportView(APIView):
+    """
+    POST /api/qr-requests/import/ — Manager bulk-imports guests from CSV/XLSX.
+
+    The upload (multipart field ``file``) is streamed row by row, each row
+    is validated with the same rules as a single create, and valid rows
+    are inserted with chunked ``bulk_create``. Invalid rows are reported
+    back with their row number; they do not block the valid ones. Once
+    the manager's quota is used up the remaining rows are skipped and
+    reported in ``quota_exceeded``; rows past ``IMPORT_MAX_ROWS`` are
+    skipped the same way and reported in ``truncated_at``.  Either way
+    ``created`` tells the client how many rows are already in.
+    """
+
+    permission_classes = [IsManager]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'detail': 'Upload a CSV or XLSX file in the "file" field.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        chunk_size = settings.IMPORT_CHUNK_SIZE
+        max_rows = settings.IMPORT_MAX_ROWS
+        max_errors = settings.IMPORT_MAX_ERRORS
+
+        # One serializer instance validates every row: building the field
+        # set once is much cheaper than a serializer per row.
+        validator = GuestQRRequestCreateSerializer(context={'request': request})
+
+        created = 0
+        failed = 0
+        errors = []
+        batch = []
+        quota_error = None
+        truncated_at = None
+        try:
+            for row_number, row in iter_rows(upload):
+                if created + failed + len(batch) >= max_rows:
+                    truncated_at = {
+                        'row': row_number,
+                        'detail': f'Imports are limited to {max_rows} rows per file; '
+                                  f'this and later rows were skipped.',
+                    }
+                    break
+                try:
+                    data = validator.run_validation(row)
+                except serializers.ValidationError as exc:
+                    failed += 1
+                    if len(errors) < max_errors:
+                        errors.append({'row': row_number, 'errors': exc.detail})
+                    continue
+
+                batch.append((row_number, GuestQRRequest(manager=request.user, **data)))
+                if len(batch) >= chunk_size:
+                    inserted = self._insert(request.user, batch)
+                    created += inserted
+                    if inserted < len(batch):
+                        quota_error = self._quota_error(batch[inserted][0])
+                        break
+                    batch = []
+        except ImportFormatError as exc:
+            return Response(
+                {'detail': str(exc), 'created': created},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if batch and quota_error is None:
+            inserted = self._insert(request.user, batch)
+            created += inserted
+            if inserted < len(batch):
+                quota_error = self._quota_error(batch[inserted][0])
+
+        body = {
+            'created': created,
+            'failed': failed,
+            'errors': errors,
+            'errors_truncated': failed > len(errors),
+        }
+        if quota_error is not None:
+            body['quota_exceeded'] = quota_error
+        if truncated_at is not None:
+            body['truncated_at'] = truncated_at
+        return Response(
+            body,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @staticmethod
+    def _insert(manager, batch) -> int:
+        """Insert as much of ``batch`` as the manager's quota allows."""
+        # Each chunk commits on its own so locks are held only briefly.
+        with tracing.span('db.import_chunk', rows=len(batch)), transaction.atomic():
+            try:
+                granted = quotas.reserve(manager, len(batch), partial=True)
+            except quotas.QuotaExceeded:
+                return 0
+            GuestQRRequest.objects.bulk_create([obj for _, obj in batch[:granted]])
+        return granted
+
+    @staticmethod
+    def _quota_error(row_number) -> dict:
+        return {'row': row_number, 'detail': 'Request quota reached; this and later rows were skipped.'}
+
 
 class QRRequestMyListView(ListAPIView):
     """GET /api/qr-requests/my/ — Manager sees their own QR requests."""
@@ -35,7 +172,10 @@ class QRRequestMyListView(ListAPIView):
     permission_classes = [IsManager]
 
     def get_queryset(self):
-        return GuestQRRequest.objects.filter(manager=self.request.user)
+        return apply_request_filters(
+            GuestQRRequest.objects.filter(manager=self.request.user),
+            self.request.query_params,
+        )
 
 
 class QRRequestDeleteView(GenericAPIView):
@@ -54,10 +194,93 @@ class QRRequestDeleteView(GenericAPIView):
                 {'detail': 'Only PENDING requests can be deleted.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        instance.delete()
+        # Conditional delete so a request claimed for approval in the
+        # meantime is left alone.
+        deleted, _ = GuestQRRequest.objects.filter(
+            pk=instance.pk,
+            status=GuestQRRequest.Status.PENDING,
+        ).delete()
+        if not deleted:
+            return Response(
+                {'detail': 'Only PENDING requests can be deleted.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        quotas.record_closed(instance.manager_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class QRRequestQuotaView(APIView):
+    """GET /api/qr-requests/quota/ — The manager's quota usage and what remains."""
+
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        quota = quotas.current(request.user)
+        usage = quotas.usage(quota)
+        remaining = [u.remaining for u in usage if u.remaining is not None]
+        data = {
+            'day': quota.day,
+            **{u.name: u.as_dict() for u in usage},
+            'remaining': min(remaining) if remaining else None,
+        }
+        return Response(QuotaSerializer(data).data)
+
+
+# ── Batch lookup (manager: own rows, superuser: all) ─────────────────
+
+
+class QRRequestBatchView(APIView):
+    """
+    GET  /api/qr-requests/batch/?ids=<uuid>,<uuid>,…
+    POST /api/qr-requests/batch/  {"ids": [...]}  (for lists too long for a URL)
+
+    Returns the visible requests among ``ids`` in the order asked, fetched
+    with one query; ids that do not exist or belong to another manager are
+    listed in ``missing``.
+    """
+
+    permission_classes = [IsManager | IsSuperUser]
+
+    def get(self, request):
+        raw = request.query_params.get('ids', '')
+        return self._lookup([part for part in raw.split(',') if part.strip()])
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        if not isinstance(ids, list):
+            return Response(
+                {'detail': '"ids" must be a list of request IDs.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self._lookup(ids)
+
+    def _lookup(self, raw_ids):
+        limit = settings.REQUEST_BATCH_MAX
+        if len(raw_ids) > limit:
+            return Response(
+                {'detail': f'At most {limit} IDs per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ids = list(dict.fromkeys(uuid.UUID(str(raw).strip()) for raw in raw_ids))
+        except ValueError:
+            return Response(
+                {'detail': 'Every ID must be a UUID.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = GuestQRRequest.objects.select_related('manager', 'approved_by', 'claimed_by')
+        if not self.request.user.is_superuser_role:
+            queryset = queryset.filter(manager=self.request.user)
+        found = queryset.in_bulk(ids)
+        return Response({
+            'results': GuestQRRequestListSerializer(
+                [found[pk] for pk in ids if pk in found], many=True,
+            ).data,
+            'missing': [str(pk) for pk in ids if pk not in found],
+        })
+
+
 # ── SuperUser Endpoints ──────────────────────────────────────────────
 
 
@@ -66,7 +289,12 @@ class QRRequestAllListView(ListAPIView):
 
     serializer_class = GuestQRRequestListSerializer
     permission_classes = [IsSuperUser]
-    queryset = GuestQRRequest.objects.all()
+
+    def get_queryset(self):
+        return apply_request_filters(
+            GuestQRRequest.objects.all(),
+            self.request.query_params,
+        )
 
 
 class QRRequestPendingListView(ListAPIView):
@@ -76,9 +304,196 @@ class QRRequestPendingListView(ListAPIView):
     permission_classes = [IsSuperUser]
 
     def get_queryset(self):
-        return GuestQRRequest.objects.filter(
-            status=GuestQRRequest.Status.PENDING,
+        return apply_request_filters(
+            GuestQRRequest.objects.filter(
+                status=GuestQRRequest.Status.PENDING,
+            ),
+            self.request.query_params,
+        )
+
+
+class ReviewQueueView(APIView):
+    """GET /api/qr-requests/queue/ — Pending requests the reviewer holds a lease on."""
+
+    permission_classes = [IsSuperUser]
+
+    def get(self, request):
+        leases = review_queue.leases_of(request.user).select_related(
+            'manager', 'approved_by', 'claimed_by',
         )
+        return Response(GuestQRRequestListSerializer(leases, many=True).data)
+
+
+class ReviewQueueClaimView(APIView):
+    """
+    POST /api/qr-requests/queue/claim/ — Lease the next pending requests.
+
+    Body: {"count": N, "lease_seconds": optional}. Renews the reviewer's
+    current leases and tops them up to N, highest priority and oldest
+    first, skipping requests other reviewers hold.
+    """
+
+    permission_classes = [IsSuperUser]
+
+    def post(self, request):
+        serializer = ReviewClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        leases = review_queue.claim_next(
+            request.user,
+            serializer.validated_data['count'],
+            serializer.validated_data.get('lease_seconds'),
+        )
+        return Response(GuestQRRequestListSerializer(leases, many=True).data)
+
+
+class ReviewQueueReleaseView(APIView):
+    """POST /api/qr-requests/queue/release/ — Drop leases ({"ids": [...]} or all)."""
+
+    permission_classes = [IsSuperUser]
+
+    def post(self, request):
+        serializer = ReviewReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = review_queue.release(request.user, serializer.validated_data.get('ids'))
+        return Response({'released': released})
+
+
+# ── Archive (manager: own rows, superuser: all) ──────────────────────
+
+
+class _ArchiveScopeMixin:
+    serializer_class = ArchivedQRRequestSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = ArchivedQRRequest.objects.select_related('manager', 'approved_by')
+        if not self.request.user.is_superuser_role:
+            queryset = queryset.filter(manager=self.request.user)
+        return queryset
+
+
+class QRRequestArchiveListView(_ArchiveScopeMixin, ListAPIView):
+    """GET /api/qr-requests/archive/ — Archived requests (same filters as the lists)."""
+
+    def get_queryset(self):
+        return apply_request_filters(super().get_queryset(), self.request.query_params)
+
+
+class QRRequestArchiveDetailView(_ArchiveScopeMixin, RetrieveAPIView):
+    """GET /api/qr-requests/archive/{id}/ — One archived request."""
+
+    lookup_field = 'pk'
+
+
+class _Echo:
+    """File-like object whose write() just returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheets treat cells starting with these as formulas (CSV injection).
+_FORMULA_PREFIXES = ('=', '@', '\t', '\r')
+# '+' and '-' start formulas too, but plain numbers and phone numbers
+# ('-12.5', '+994 50 123-45-67') must export unchanged.
+_SIGNED_PREFIXES = ('+', '-')
+_PLAIN_NUMBER = re.compile(r'[+-]?\d+(?:[.,]\d+)?|\+\d[\d ()-]*')
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if not isinstance(value, str):
+        return value
+    if value.startswith(_FORMULA_PREFIXES) or (
+        value.startswith(_SIGNED_PREFIXES) and not _PLAIN_NUMBER.fullmatch(value)
+    ):
+        return "'" + value
+    return value
+
+
+class QRRequestExportView(APIView):
+    """
+    GET /api/qr-requests/export/ — Stream request history as CSV or NDJSON.
+
+    Superusers export every request, managers only their own. Accepts the
+    same filters as the list views plus ``file_format=csv|ndjson``. Rows are
+    read with ``values_list().iterator()`` and written as they are fetched,
+    so memory stays flat regardless of the result size.  CSV cells that a
+    spreadsheet would run as a formula are prefixed with ``'``; NDJSON is
+    written as stored.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    EXPORT_COLUMNS = (
+        ('id', 'id'),
+        ('guest_name', 'guest_name'),
+        ('guest_surname', 'guest_surname'),
+        ('guest_email', 'guest_email'),
+        ('guest_phone', 'guest_phone'),
+        ('remark', 'remark'),
+        ('status', 'status'),
+        ('rejection_reason', 'rejection_reason'),
+        ('manager', 'manager__username'),
+        ('approved_by', 'approved_by__username'),
+        ('approved_at', 'approved_at'),
+        ('novus_user_id', 'novus_user_id'),
+        ('novus_card_id', 'novus_card_id'),
+        ('novus_credential_id', 'novus_credential_id'),
+        ('qr_number', 'qr_number'),
+        ('credential_expires_at', 'credential_expires_at'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+    def get(self, request):
+        file_format = request.query_params.get('file_format', 'csv').lower()
+        if file_format not in ('csv', 'ndjson'):
+            return Response(
+                {'detail': 'file_format must be "csv" or "ndjson".'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = GuestQRRequest.objects.all()
+        if not request.user.is_superuser_role:
+            queryset = queryset.filter(manager=request.user)
+        queryset = apply_request_filters(queryset, request.query_params)
+        # Fix the database now: rows are streamed after the view (and any
+        # replica routing around it) has returned.
+        queryset = queryset.using(queryset.db)
+
+        headers = [name for name, _ in self.EXPORT_COLUMNS]
+        rows = queryset.values_list(
+            *(lookup for _, lookup in self.EXPORT_COLUMNS)
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+        if file_format == 'csv':
+            content = self._csv_stream(headers, rows)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content = self._ndjson_stream(headers, rows)
+            content_type = 'application/x-ndjson'
+
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="qr_requests_{stamp}.{file_format}"'
+        )
+        return response
+
+    @staticmethod
+    def _csv_stream(headers, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([_csv_cell(value) for value in row])
+
+    @staticmethod
+    def _ndjson_stream(headers, rows):
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(headers, row))) + '\n'
 
 
 class QRRequestApproveView(GenericAPIView):
@@ -88,6 +503,7 @@ class QRRequestApproveView(GenericAPIView):
     lookup_field = 'pk'
     queryset = GuestQRRequest.objects.all()
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = ApproveSerializer(
@@ -126,6 +542,20 @@ class QRRequestRejectView(GenericAPIView):
         )
 
 
+class QRRequestNotificationListView(ListAPIView):
+    """GET /api/qr-requests/{id}/notifications/ — Delivery status of guest messages."""
+
+    serializer_class = GuestNotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        queryset = GuestNotification.objects.filter(qr_request_id=self.kwargs['pk'])
+        if not self.request.user.is_superuser_role:
+            queryset = queryset.filter(qr_request__manager=self.request.user)
+        return queryset
+
+
 class QRCodeDownloadView(APIView):
     """GET /api/qr-requests/{id}/qr-code/ — Download QR code image for approved request."""
 
@@ -161,25 +591,97 @@ class QRCodeDownloadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Generate QR code image
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_request.qr_number)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color='black', back_color='white')
-
-        # Write image to bytes buffer
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-
         # Create response with image
         filename = f"qr_{qr_request.guest_name}_{qr_request.guest_surname}.png"
-        response = HttpResponse(buffer.getvalue(), content_type='image/png')
+        response = HttpResponse(render_qr_png(qr_request.qr_number), content_type='image/png')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
+
+
+# ── Gate verification ────────────────────────────────────────────────
+
+
+def _verification_result(qr_number, guest, now):
+    if guest is None:
+        return {'qr_number': qr_number, 'valid': False, 'status': 'UNKNOWN'}
+    active = guest.is_active(now)
+    return {
+        'qr_number': qr_number,
+        'valid': active,
+        'status': 'ACTIVE' if active else 'EXPIRED',
+        'guest_name': guest.guest_name,
+        'guest_surname': guest.guest_surname,
+        'manager': guest.manager,
+        'expires_at': guest.expires_at,
+    }
+
+
+class QRVerifyView(APIView):
+    """GET /api/qr-requests/verify/{qr_number}/ — Check a scanned code."""
+
+    permission_classes = [CanVerifyQR]
+
+    def get(self, request, qr_number):
+        guest = verification_index.lookup(qr_number)
+        return Response(_verification_result(qr_number, guest, timezone.now()))
+
+
+class QRVerifyBatchView(APIView):
+    """POST /api/qr-requests/verify/ — Check many codes: {"qr_numbers": [...]}."""
+
+    permission_classes = [CanVerifyQR]
+
+    def post(self, request):
+        qr_numbers = request.data.get('qr_numbers')
+        if not isinstance(qr_numbers, list) or not all(isinstance(n, str) for n in qr_numbers):
+            return Response(
+                {'detail': '"qr_numbers" must be a list of strings.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(qr_numbers) > settings.QR_VERIFY_BATCH_MAX:
+            return Response(
+                {'detail': f'At most {settings.QR_VERIFY_BATCH_MAX} codes per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        now = timezone.now()
+        found = verification_index.lookup_many(qr_numbers)
+        return Response({
+            'results': [_verification_result(n, found[n], now) for n in qr_numbers],
+        })
+
+
+class QRVerifySnapshotView(APIView):
+    """
+    GET /api/qr-requests/verify/snapshot/ — All active codes for offline scanners.
+
+    Entries are positional arrays (see "fields") to keep the payload small.
+    The version doubles as ETag: send it in If-None-Match to get a 304 when
+    nothing changed.
+    """
+
+    permission_classes = [CanVerifyQR]
+
+    FIELDS = ('qr_number', 'guest_name', 'guest_surname', 'manager', 'expires_at')
+
+    def get(self, request):
+        version, guests = verification_index.snapshot()
+        etag = f'"{version}"'
+        # CompressionMiddleware weakens the ETag; accept either form back.
+        if request.headers.get('If-None-Match', '').removeprefix('W/') == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            now = timezone.now()
+            response = Response({
+                'version': version,
+                'generated_at': now,
+                'fields': self.FIELDS,
+                'entries': [
+                    [
+                        g.qr_number, g.guest_name, g.guest_surname, g.manager,
+                        g.expires_at.isoformat() if g.expires_at else None,
+                    ]
+                    for g in guests if g.is_active(now)
+                ],
+            })
+        response['ETag'] = etag
+        return response
@@ -1,8 +1,8 @@
-import { useState } from "react";
+import { useRef, useState } from "react";
 import type { FormEvent } from "react";
 import type { QRRequestCreatePayload } from "../types/api.ts";
-import { createQRRequest } from "../services/qrRequestService.ts";
-import { extractErrorMessage } from "../hooks/useApiError.ts";
+import { createQRRequest, newIdempotencyKey } from "../services/qrRequestService.ts";
+import { extractErrorMessage, isRetryableError } from "../hooks/useApiError.ts";
 
 interface CreateRequestFormProps {
   onCreated: () => void;
@@ -23,10 +23,13 @@ export default function CreateRequestForm({
   const [error, setError] = useState<string | null>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [success, setSuccess] = useState(false);
+  // Kept across retries of the same submission; an edit starts a new one.
+  const submissionKey = useRef<string | null>(null);
 
   const handleChange = (
     e: React.ChangeEvent<HTMLInputElement | HTMLTextAreaElement>,
   ) => {
+    submissionKey.current = null;
     setForm((prev) => ({ ...prev, [e.target.name]: e.target.value }));
     setError(null);
     setSuccess(false);
@@ -38,12 +41,15 @@ export default function CreateRequestForm({
     setError(null);
     setSuccess(false);
 
+    submissionKey.current ??= newIdempotencyKey();
     try {
-      await createQRRequest(form);
+      await createQRRequest(form, submissionKey.current);
+      submissionKey.current = null;
       setForm({ ...initialForm });
       setSuccess(true);
       onCreated();
     } catch (err) {
+      if (!isRetryableError(err)) submissionKey.current = null;
       setError(extractErrorMessage(err));
     } finally {
       setIsSubmitting(false);
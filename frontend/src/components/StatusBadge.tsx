@@ -6,6 +6,11 @@ const statusConfig: Record<QRRequestStatus, { bg: string; text: string; label: s
     text: "text-amber-700",
     label: "Pending",
   },
+  APPROVING: {
+    bg: "bg-sky-50",
+    text: "text-sky-700",
+    label: "Approving",
+  },
   APPROVED: {
     bg: "bg-emerald-50",
     text: "text-emerald-700",
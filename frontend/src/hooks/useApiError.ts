@@ -27,6 +27,15 @@ export function extractErrorMessage(error: unknown): string {
   return "An unexpected error occurred.";
 }
 
+// True when the request may or may not have taken effect (no response,
+// 5xx, or 409 "still being processed"): retry it with the same
+// Idempotency-Key. Any other response is final for that key.
+export function isRetryableError(error: unknown): boolean {
+  if (!(error instanceof AxiosError)) return false;
+  const status = error.response?.status;
+  return status === undefined || status >= 500 || status === 409;
+}
+
 export function useApiError() {
   return useCallback((error: unknown): string => {
     return extractErrorMessage(error);
@@ -1,13 +1,14 @@
-import { useCallback, useEffect, useState } from "react";
+import { useCallback, useEffect, useRef, useState } from "react";
 import type { QRRequest } from "../types/api.ts";
 import {
   approveRequest,
   downloadQRCode,
   getAllRequests,
   getPendingRequests,
+  newIdempotencyKey,
   rejectRequest,
 } from "../services/qrRequestService.ts";
-import { extractErrorMessage } from "../hooks/useApiError.ts";
+import { extractErrorMessage, isRetryableError } from "../hooks/useApiError.ts";
 import RequestsTable from "../components/RequestsTable.tsx";
 import RejectDialog from "../components/RejectDialog.tsx";
 import Pagination from "../components/Pagination.tsx";
@@ -25,6 +26,9 @@ export default function SuperUserDashboard() {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [actionLoading, setActionLoading] = useState<string | null>(null);
+  // One idempotency key per request being approved, reused on retry
+  // until the outcome is known.
+  const approveKeys = useRef(new Map<string, string>());
 
   // Reject dialog state
   const [rejectTarget, setRejectTarget] = useState<QRRequest | null>(null);
@@ -62,10 +66,14 @@ export default function SuperUserDashboard() {
       return;
     }
     setActionLoading(id);
+    const key = approveKeys.current.get(id) ?? newIdempotencyKey();
+    approveKeys.current.set(id, key);
     try {
-      await approveRequest(id);
+      await approveRequest(id, key);
+      approveKeys.current.delete(id);
       await fetchRequests(page, viewMode);
     } catch (err) {
+      if (!isRetryableError(err)) approveKeys.current.delete(id);
       alert(extractErrorMessage(err));
     } finally {
       setActionLoading(null);
@@ -1,7 +1,11 @@
 import apiClient, { getAccessToken } from "./apiClient.ts";
 import type {
+  ArchivedQRRequest,
+  GuestNotification,
+  ManagerQuota,
   PaginatedResponse,
   QRRequest,
+  QRRequestBatchResponse,
   QRRequestCreatePayload,
   QRRequestCreateResponse,
   RejectPayload,
@@ -12,12 +16,20 @@ const API_BASE_URL =
 
 // ── Manager endpoints ──────────────────────────────────────────
 
+// Create the idempotency key once per logical submission (form submit,
+// approve click) and pass the same key again when retrying it.
+export function newIdempotencyKey(): string {
+  return crypto.randomUUID();
+}
+
 export async function createQRRequest(
   payload: QRRequestCreatePayload,
+  idempotencyKey: string,
 ): Promise<QRRequestCreateResponse> {
   const { data } = await apiClient.post<QRRequestCreateResponse>(
     "/api/qr-requests/",
     payload,
+    { headers: { "Idempotency-Key": idempotencyKey } },
   );
   return data;
 }
@@ -32,10 +44,48 @@ export async function getMyRequests(
   return data;
 }
 
+export async function getMyQuota(): Promise<ManagerQuota> {
+  const { data } = await apiClient.get<ManagerQuota>("/api/qr-requests/quota/");
+  return data;
+}
+
 export async function deleteRequest(id: string): Promise<void> {
   await apiClient.delete(`/api/qr-requests/${id}/`);
 }
 
+export async function getRequestNotifications(
+  id: string,
+): Promise<GuestNotification[]> {
+  const { data } = await apiClient.get<GuestNotification[]>(
+    `/api/qr-requests/${id}/notifications/`,
+  );
+  return data;
+}
+
+// Current state of specific requests (own for managers, any for
+// superusers), e.g. after a bulk operation. POST keeps long ID lists
+// out of the URL.
+export async function getRequestsByIds(
+  ids: string[],
+): Promise<QRRequestBatchResponse> {
+  const { data } = await apiClient.post<QRRequestBatchResponse>(
+    "/api/qr-requests/batch/",
+    { ids },
+  );
+  return data;
+}
+
+// Managers see their own archived requests, superusers all of them.
+export async function getArchivedRequests(
+  page = 1,
+): Promise<PaginatedResponse<ArchivedQRRequest>> {
+  const { data } = await apiClient.get<PaginatedResponse<ArchivedQRRequest>>(
+    "/api/qr-requests/archive/",
+    { params: { page } },
+  );
+  return data;
+}
+
 // ── SuperUser endpoints ────────────────────────────────────────
 
 export async function getAllRequests(
@@ -58,9 +108,36 @@ export async function getPendingRequests(
   return data;
 }
 
-export async function approveRequest(id: string): Promise<QRRequest> {
+// Review queue: lease pending requests so reviewers never collide.
+export async function getMyReviewQueue(): Promise<QRRequest[]> {
+  const { data } = await apiClient.get<QRRequest[]>("/api/qr-requests/queue/");
+  return data;
+}
+
+export async function claimReviewRequests(count = 10): Promise<QRRequest[]> {
+  const { data } = await apiClient.post<QRRequest[]>(
+    "/api/qr-requests/queue/claim/",
+    { count },
+  );
+  return data;
+}
+
+export async function releaseReviewRequests(ids?: string[]): Promise<number> {
+  const { data } = await apiClient.post<{ released: number }>(
+    "/api/qr-requests/queue/release/",
+    ids ? { ids } : {},
+  );
+  return data.released;
+}
+
+export async function approveRequest(
+  id: string,
+  idempotencyKey: string,
+): Promise<QRRequest> {
   const { data } = await apiClient.post<QRRequest>(
     `/api/qr-requests/${id}/approve/`,
+    undefined,
+    { headers: { "Idempotency-Key": idempotencyKey } },
   );
   return data;
 }
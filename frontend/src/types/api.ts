@@ -38,7 +38,7 @@ export interface TokenRefreshResponse {
   refresh: string;
 }
 
-export type QRRequestStatus = "PENDING" | "APPROVED" | "REJECTED";
+export type QRRequestStatus = "PENDING" | "APPROVING" | "APPROVED" | "REJECTED";
 
 export interface QRRequest {
   id: string;
@@ -56,8 +56,48 @@ export interface QRRequest {
   novus_card_id: string | null;
   novus_credential_id: string | null;
   qr_number: string | null;
+  credential_expires_at: string | null;
   created_at: string;
   updated_at: string;
+  priority: number;
+  claimed_by: UserBrief | null;
+  claimed_until: string | null;
+}
+
+export interface ArchivedQRRequest
+  extends Omit<QRRequest, "priority" | "claimed_by" | "claimed_until"> {
+  archived_at: string;
+}
+
+export interface QRRequestBatchResponse {
+  results: QRRequest[];
+  missing: string[];
+}
+
+export interface QuotaLimit {
+  used: number;
+  limit: number | null;
+  remaining: number | null;
+}
+
+export interface ManagerQuota {
+  day: string;
+  requests_today: QuotaLimit;
+  open_pending: QuotaLimit;
+  active_credentials: QuotaLimit;
+  remaining: number | null;
+}
+
+export interface GuestNotification {
+  id: number;
+  channel: "EMAIL" | "SMS";
+  recipient: string;
+  status: "QUEUED" | "SENDING" | "SENT" | "FAILED";
+  attempts: number;
+  last_error: string;
+  next_attempt_at: string;
+  created_at: string;
+  sent_at: string | null;
 }
 
 export interface QRRequestCreatePayload {